@@ -0,0 +1,506 @@
+import logging
+import math
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+# mne_lsl takes over a second to import (it loads scipy.signal): it is imported on first use, by the
+# discovery and stream-opening threads, so that the window shows without waiting for it
+if TYPE_CHECKING:
+    from mne_lsl.stream import StreamLSL
+
+
+class DeviceInfo:
+    """Device information class, including channel selection, sample frequency, and device name"""
+
+    def __init__(self, channel_picks, sample_freq, name=""):
+        self.channel_picks = channel_picks
+        self.sample_freq = sample_freq
+        self.name = name  # Newly added device name attribute
+
+    def __repr__(self):
+        return (
+            f"DeviceInfo(name={self.name}, channel_picks={self.channel_picks}, "
+            f"sample_freq={self.sample_freq} Hz)"
+        )
+
+class DeviceInfoDatabase:
+    """Collection of channels and sampling frequencies for all devices"""
+
+    # Muse
+    MUSE_ALL = DeviceInfo(["AF7", "AF8", "TP10"],
+                          256,
+                          "Muse All")
+
+    MUSE = DeviceInfo(["AF7"],
+                      256,
+                      "Muse")
+
+    #### Muse S + BlueMuse + mne-lsl viewer will hang after a few minutes due to freq config problem"""
+    # MUSE_S = DeviceInfo(["AF7"],
+    #                      512,  # BlueMuse shows 512, marked 256hz in stream, and actual push rate is
+    #                                         is 512 Hz. Use this value here.
+                         # "Muse S")
+
+    # MNE-LSL Player
+    PLAYER_ALL = DeviceInfo(["EEG Fpz-Cz", "EEG Pz-Oz"],
+                            100,
+                            "Player All")
+
+    PLAYER = DeviceInfo(["EEG Fpz-Cz"],
+                        100,
+                        "Player")
+
+    # TGAM
+    TGMA_ALL = DeviceInfo(["Fp1", "Fp2"],
+                          512,
+                          "TGMA All")
+
+    TGMA = DeviceInfo(["Fp1"], 512,
+                      "TGAM")
+
+    # Flexolink
+    FLEXOLINK_ALL = DeviceInfo(["Fpz-Raw", "Fpz-Filtered"], 250,
+                      "Flexo")
+    FLEXOLINK = DeviceInfo(["Fpz-Filtered"], 250,
+                      "Flexo")
+
+
+def local_clock():
+    """LSL clock of this machine, in seconds (the timestamps of clocksync inlets are on it)"""
+    from mne_lsl.lsl import local_clock as lsl_local_clock
+    return lsl_local_clock()
+
+
+class SampleRingBuffer:
+    """
+    Fixed-size ring of (channels x samples) data, timestamps and arrival times.
+    One thread writes, any thread reads with its own cursor: an absolute sample index, so a reader
+    that fell more than `capacity` samples behind knows exactly how many samples it missed.
+    """
+
+    def __init__(self, num_channels, capacity):
+        self.num_channels = num_channels
+        self.capacity = capacity
+        self.data = np.zeros((num_channels, capacity))
+        self.timestamps = np.zeros(capacity)
+        self.arrivals = np.zeros(capacity)  # local_clock() when the sample's chunk was acquired
+        self.total_written = 0  # Absolute index of the next sample to be written
+        self._lock = threading.Lock()
+
+    def write(self, data, timestamps, arrival=0.0):
+        """
+        :param data: 2D array (channels x samples).
+        :param timestamps: 1D array (samples).
+        :param arrival: local_clock() time at which the chunk was acquired.
+        """
+        n_samples = len(timestamps)
+        if n_samples > self.capacity:  # Only the newest `capacity` samples can be kept
+            data, timestamps = data[:, -self.capacity:], timestamps[-self.capacity:]
+        with self._lock:
+            start = (self.total_written + n_samples - len(timestamps)) % self.capacity
+            first = min(len(timestamps), self.capacity - start)
+            self.data[:, start:start + first] = data[:, :first]
+            self.timestamps[start:start + first] = timestamps[:first]
+            self.arrivals[start:start + first] = arrival
+            self.data[:, :len(timestamps) - first] = data[:, first:]
+            self.timestamps[:len(timestamps) - first] = timestamps[first:]
+            self.arrivals[:len(timestamps) - first] = arrival
+            self.total_written += n_samples
+
+    def read_since(self, cursor):
+        """
+        Copy out everything written since `cursor`.
+        :param cursor: Absolute sample index returned by the previous call (0 at first).
+        :return: (data, timestamps, arrivals, new_cursor, n_lost); n_lost samples were overwritten before being read.
+        """
+        with self._lock:
+            end = self.total_written
+            start = max(cursor, end - self.capacity)
+            idx = np.arange(start, end) % self.capacity
+            data, timestamps, arrivals = self.data[:, idx], self.timestamps[idx], self.arrivals[idx]
+        return data, timestamps, arrivals, end, start - cursor
+
+
+class StreamAcquisition:
+    """
+    Dedicated acquisition thread of one LSL stream.
+    The thread pulls the inlet continuously (StreamLSL in manual acquisition mode) and copies every
+    chunk into a large ring buffer and, when recording, into the record writer. Neither depends on the
+    GUI thread, so a busy UI delays the plots but loses no data; the GUI drains the ring at its render rate.
+
+    Chunks are taken exactly as pulled (no window-size rounding), timestamps are kept next to the
+    samples, and the timestamps are checked for gaps (missing samples) and overlaps (repeated or
+    out-of-order samples).
+    """
+    # Continuity is judged on the drift of the timestamps from the expected timeline (first timestamp
+    # + n / sfreq), not on the steps between samples: bridges that push samples without a timestamp
+    # (e.g. TGAM, from a serial callback) deliver them in bursts, with steps far from 1 / sfreq.
+    # Samples may arrive late but not early, so the reference follows the earliest samples of each chunk;
+    # a drift above it by more than the tolerance that persists over two chunks is a gap, a drift below
+    # it is an overlap. Slow clock-rate differences are followed by the reference.
+    CONTINUITY_TOLERANCE_SECS = 0.075
+    DRIFT_FOLLOW_RATE = 0.05  # Share of the drift within tolerance absorbed by the reference per chunk
+    WARNING_INTERVAL_SECS = 60  # Discontinuity warnings are summarized at most this often
+
+    def __init__(self, stream: "StreamLSL", ring_secs=60, poll_interval=0.005):
+        """
+        :param stream: Connected StreamLSL, created with connect(acquisition_delay=None) and with its
+                       channel selection (pick, reference channels) already applied. With the
+                       'clocksync' processing flag, timestamps are on this machine's local_clock(),
+                       which makes sample-to-screen latency measurable.
+        :param ring_secs: Seconds of data the GUI may fall behind before it misses samples.
+        :param poll_interval: Sleep between inlet pulls when no data is pending.
+        """
+        self.stream = stream
+        self.sample_freq = stream.info["sfreq"]
+        self.poll_interval = poll_interval
+        self.pull_interval = 0.0  # Minimum seconds between pulls (low-power mode); the LSL inlet buffers meanwhile
+        self.ring = SampleRingBuffer(len(stream.ch_names), math.ceil(ring_secs * self.sample_freq))
+
+        # Recording sink, swapped by the GUI thread: (writer, rows) or None
+        self._recorder = None
+        self._recorder_lock = threading.Lock()
+
+        # Counters (written by the acquisition thread)
+        self.samples_received = 0
+        self.chunks_received = 0
+        self.samples_per_sec = 0.0
+        self._rate_window_start = time.time()
+        self._rate_window_samples = 0
+        self.error = None
+
+        # Continuity counters (written by the acquisition thread)
+        self.last_timestamp = None  # LSL timestamp of the newest sample
+        self.gap_count = 0
+        self.gap_samples = 0  # Samples missing according to the timestamps
+        self.overlap_count = 0
+        self.overlap_samples = 0  # Samples whose timestamps went back in time
+        self._timeline_start = None  # Timestamp of the first sample
+        self._timeline_samples = 0  # Samples since the first one
+        self._drift_reference = 0.0  # Drift (s) of on-time samples from the expected timeline
+        self._pending_gap = None  # Drift of a chunk that arrived late, confirmed as a gap if the next one is too
+        self._unreported = [0, 0, 0, 0]  # Gaps, gap samples, overlaps, overlap samples since the last warning
+        self._last_warning = 0.0
+
+        stream.add_callback(self._on_chunk)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._acquire_loop, name=f"Acquisition-{stream.name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop pulling; the stream can then be disconnected"""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+
+    def set_recorder(self, writer, rows=slice(None)):
+        """Send `rows` of every acquired chunk to `writer` (RecordWriter), or stop with writer=None"""
+        with self._recorder_lock:
+            self._recorder = None if writer is None else (writer, rows)
+
+    def _acquire_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                n_before = self.samples_received
+                self.stream.acquire()  # Calls _on_chunk for each pulled chunk
+            except Exception as e:
+                self.error = e
+                logging.error(f"Acquisition of {self.stream.name} stopped: {e}")
+                return
+            if self.samples_received == n_before:
+                self._stop_event.wait(max(self.poll_interval, self.pull_interval))
+            elif self.pull_interval:
+                self._stop_event.wait(self.pull_interval)
+
+    def _on_chunk(self, data, timestamps, info):
+        """StreamLSL callback, acquisition thread: data is (samples x channels)"""
+        arrival = local_clock()
+        data_t = data.T
+        discontinuity = self._check_continuity(timestamps)
+        self.ring.write(data_t, timestamps, arrival)
+        with self._recorder_lock:
+            if self._recorder is not None:
+                writer, rows = self._recorder
+                if discontinuity:
+                    writer.annotate(discontinuity)
+                writer.append(data_t[rows], timestamps)
+        self._count_samples(len(timestamps))
+        return data, timestamps
+
+    def _check_continuity(self, timestamps):
+        """
+        Update the gap / overlap counters with one chunk.
+        :return: Description of the discontinuities found (for the recording), or None
+        """
+        if self.sample_freq <= 0 or len(timestamps) == 0:  # Irregular streams have no expected step
+            return None
+        self.last_timestamp = timestamps[-1]
+        if self._timeline_start is None:
+            self._timeline_start = timestamps[0]
+        expected = self._timeline_start + (self._timeline_samples + np.arange(len(timestamps))) / self.sample_freq
+        self._timeline_samples += len(timestamps)
+        drift = float(np.min(timestamps - expected)) - self._drift_reference  # Of the earliest sample
+        tolerance = max(self.CONTINUITY_TOLERANCE_SECS, 2 / self.sample_freq)
+
+        events = []
+        if drift > tolerance:
+            if self._pending_gap is None:  # Late chunk: a gap only if the next chunk is late as well
+                self._pending_gap = drift
+                return None
+            drift = min(drift, self._pending_gap)
+            missing = round(drift * self.sample_freq)
+            self.gap_count += 1
+            self.gap_samples += missing
+            self._unreported[0] += 1
+            self._unreported[1] += missing
+            events.append(f"Stream gap: {missing} samples missing")
+            self._drift_reference += drift
+        elif drift < -tolerance:
+            repeated = round(-drift * self.sample_freq)
+            self.overlap_count += 1
+            self.overlap_samples += repeated
+            self._unreported[2] += 1
+            self._unreported[3] += repeated
+            events.append(f"Stream overlap: {repeated} samples out of order")
+            self._drift_reference += drift
+        else:
+            self._drift_reference += self.DRIFT_FOLLOW_RATE * drift
+        self._pending_gap = None
+        if not events:
+            return None
+
+        now = time.time()
+        if now - self._last_warning >= self.WARNING_INTERVAL_SECS:
+            gaps, gap_samples, overlaps, overlap_samples = self._unreported
+            logging.warning(f"{self.stream.name}: {gaps} gap(s), {gap_samples} samples missing; "
+                            f"{overlaps} overlap(s), {overlap_samples} samples out of order"
+                            + (f" in the last {now - self._last_warning:.0f} s" if self._last_warning else ""))
+            self._unreported = [0, 0, 0, 0]
+            self._last_warning = now
+        return "; ".join(events)
+
+    def _count_samples(self, n_samples):
+        """Update the throughput counters; the rate is refreshed about once per second"""
+        self.samples_received += n_samples
+        self.chunks_received += 1
+        self._rate_window_samples += n_samples
+
+        elapsed = time.time() - self._rate_window_start
+        if elapsed >= 1.0:
+            self.samples_per_sec = self._rate_window_samples / elapsed
+            self._rate_window_start += elapsed
+            self._rate_window_samples = 0
+
+
+class StreamDiscovery:
+    """
+    Background LSL stream discovery.
+    A thread resolves the network continuously (and immediately on refresh()), so the GUI never waits
+    for a resolve timeout: menus read the cache, and connecting uses the cached StreamInfo.
+    """
+
+    def __init__(self, stype="eeg", interval=3.0, resolve_timeout=1.0, expire_secs=10.0):
+        """
+        :param stype: Stream type to keep (case-insensitive, so 'EEG' and 'eeg' outlets both match).
+        :param interval: Seconds between two resolves.
+        :param resolve_timeout: Duration of one resolve.
+        :param expire_secs: Streams not seen for this long are dropped from the cache.
+        """
+        self.stype = stype.lower()
+        self.interval = interval
+        self.resolve_timeout = resolve_timeout
+        self.expire_secs = expire_secs
+
+        self._streams = {}  # {identity: (StreamInfo, last seen time)}
+        self._lock = threading.Lock()
+        self.version = 0  # Incremented whenever the set of cached streams changes
+        self._refresh_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._discover_loop, name="StreamDiscovery", daemon=True)
+
+    @staticmethod
+    def identity(sinfo):
+        """Key distinguishing LSL outlets"""
+        return sinfo.name, sinfo.stype, sinfo.source_id
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._refresh_event.set()
+
+    def refresh(self):
+        """Resolve again now instead of at the next interval"""
+        self._refresh_event.set()
+
+    def get_streams(self):
+        """Cached StreamInfo of the streams seen recently, sorted by name"""
+        with self._lock:
+            return sorted((sinfo for sinfo, _ in self._streams.values()), key=lambda sinfo: sinfo.name)
+
+    def _discover_loop(self):
+        from mne_lsl.lsl import resolve_streams
+
+        while not self._stop_event.is_set():
+            try:
+                found = [sinfo for sinfo in resolve_streams(timeout=self.resolve_timeout)
+                         if sinfo.stype.lower() == self.stype]
+            except Exception as e:
+                logging.error(f"Stream discovery failed: {e}")
+                found = []
+
+            now = time.time()
+            with self._lock:
+                before = set(self._streams)
+                for sinfo in found:
+                    self._streams[self.identity(sinfo)] = (sinfo, now)
+                for key, (_, last_seen) in list(self._streams.items()):
+                    if now - last_seen > self.expire_secs:
+                        del self._streams[key]
+                if set(self._streams) != before:
+                    self.version += 1
+
+            self._refresh_event.wait(self.interval)
+            self._refresh_event.clear()
+
+
+def open_lsl_stream(device_info, sinfo):
+    """
+    Open a resolved stream for a StreamSession (blocking: LSL handshake and clock sync take about a second).
+    :param device_info: Device profile; channel_picks=None takes all EEG channels of the stream.
+    :return: (device_info with its channel picks and the stream's own sample rate, connected StreamLSL)
+    """
+    import mne
+    from mne_lsl.stream import StreamLSL
+
+    mne.set_log_level('WARNING')
+    # The cached identity resolves immediately. Manual acquisition: the session's acquisition
+    # thread pulls the inlet, see StreamAcquisition. clocksync puts timestamps on local_clock()
+    stream = StreamLSL(bufsize=5, name=sinfo.name, stype=sinfo.stype, source_id=sinfo.source_id)
+    stream.connect(acquisition_delay=None, processing_flags=("clocksync",))
+    stream.pick("eeg")
+
+    assert "CPz" not in stream.ch_names
+    # Indicators, recordings and the acquisition all use the rate of the stream actually connected,
+    # which differs from the profile's when no stream at that rate was found
+    sample_freq = stream.info["sfreq"]
+    if sample_freq <= 0:
+        stream.disconnect()
+        raise ValueError(f"{sinfo.name} has an irregular sample rate, which is not supported")
+    if sample_freq != device_info.sample_freq:
+        logging.info(f"{sinfo.name} streams at {sample_freq:g} Hz, not the {device_info.sample_freq} Hz of {device_info.name}")
+    channel_picks = list(stream.ch_names) if device_info.channel_picks is None else device_info.channel_picks
+    device_info = DeviceInfo(channel_picks, sample_freq, device_info.name)
+    stream.add_reference_channels("CPz")
+    return device_info, stream
+
+
+class StreamSession:
+    """One connected LSL stream: its acquisition thread, channel layout and the indicators bound to it"""
+
+    def __init__(self, device_info, stream, stream_info, metrics, taken_names=()):
+        """
+        :param taken_names: Names of the other sessions; an outlet with the same name (e.g. two identical
+                            headbands) gets its source_id appended.
+        """
+        self.device_info = device_info
+        self.stream: "StreamLSL" = stream
+        # Shown in menus and dock titles, and labels the stream's metrics
+        self.name = (stream_info.name if device_info.name == stream_info.name
+                     else f"{device_info.name}: {stream_info.name}")
+        if self.name in taken_names:
+            self.name = f"{self.name} [{stream_info.source_id}]"
+        self.identity = (stream_info.name, stream_info.stype, stream_info.source_id)  # Distinguishes LSL outlets
+
+        # Data is acquired for all channels at once; indicators use the picked rows
+        self.pick_rows = [stream.ch_names.index(ch) for ch in device_info.channel_picks]
+        self.indicators = []  # Indicator handlers fed by this stream
+
+        # The acquisition thread fills the ring; the GUI thread reads it from `read_cursor` on
+        self.acquisition = StreamAcquisition(stream).start()
+        self.read_cursor = 0
+        self.samples_skipped = 0  # Samples overwritten in the ring before the GUI read them
+        self.register_metrics(metrics)
+
+    def register_metrics(self, metrics):
+        """Expose the acquisition counters; they are read when metrics are collected, not on every chunk"""
+        acquisition = self.acquisition
+        labels = {"stream": self.name}
+        metrics.counter("eeg_stream_samples_total", "Samples acquired",
+                        fn=lambda: acquisition.samples_received, **labels)
+        metrics.gauge("eeg_stream_sample_rate_hz", "Acquired samples per second",
+                      fn=lambda: acquisition.samples_per_sec, **labels)
+        metrics.counter("eeg_stream_gap_samples_total", "Samples missing according to the LSL timestamps",
+                        fn=lambda: acquisition.gap_samples, **labels)
+        metrics.counter("eeg_stream_overlap_samples_total", "Samples with repeated or out-of-order timestamps",
+                        fn=lambda: acquisition.overlap_samples, **labels)
+        metrics.counter("eeg_stream_display_skipped_samples_total", "Samples overwritten before the GUI read them",
+                        fn=lambda: self.samples_skipped, **labels)
+        metrics.gauge("eeg_stream_ring_backlog_samples", "Acquired samples not yet handed to indicators",
+                      fn=lambda: acquisition.ring.total_written - self.read_cursor, **labels)
+
+    def get_new_data(self):
+        """
+        Take everything acquired since the last call (all channels).
+        :return: (data, timestamps, arrivals), or None when nothing new arrived
+        """
+        data, timestamps, arrivals, self.read_cursor, n_lost = self.acquisition.ring.read_since(self.read_cursor)
+        if n_lost:
+            # GUI stalled longer than the ring: plots skip ahead, capture and recording are unaffected
+            self.samples_skipped += n_lost
+            logging.warning(f"{self.name}: display skipped {n_lost} samples")
+        if len(timestamps) == 0:
+            return None
+        return data, timestamps, arrivals
+
+    def get_stats(self):
+        acquisition = self.acquisition
+        return {"samples_received": acquisition.samples_received,
+                "chunks_received": acquisition.chunks_received,
+                "samples_per_sec": acquisition.samples_per_sec,
+                "gap_count": acquisition.gap_count,
+                "gap_samples": acquisition.gap_samples,
+                "overlap_count": acquisition.overlap_count,
+                "overlap_samples": acquisition.overlap_samples,
+                "samples_skipped": self.samples_skipped,
+                "indicators": len(self.indicators)}
+
+    def status_text(self):
+        """One-line acquisition health summary for the status bar"""
+        stats = self.get_stats()
+        text = f"{self.name}: {stats['samples_per_sec']:.0f} Hz"
+        if stats["gap_count"]:
+            text += f", gaps {stats['gap_count']} ({stats['gap_samples']} smp)"
+        if stats["overlap_count"]:
+            text += f", overlaps {stats['overlap_count']} ({stats['overlap_samples']} smp)"
+        if stats["samples_skipped"]:
+            text += f", display skipped {stats['samples_skipped']} smp"
+        return text
+
+    def dispatch(self, data, timestamps, arrivals):
+        """
+        Feed the picked channels to the bound indicators.
+        The newest sample's timestamp and arrival time go to each indicator's latency tracker.
+        """
+        if not self.indicators:
+            return
+        selected_channel_data = data[self.pick_rows]
+        for handler in self.indicators:
+            tracker = handler.latency_tracker
+            if tracker is not None:
+                tracker.begin(timestamps[-1], arrivals[-1])
+            handler.process_new_data_and_update_plot(selected_channel_data)
+            if tracker is not None:
+                tracker.end()
+
+    def disconnect(self):
+        self.acquisition.stop()
+        self.stream.disconnect()
@@ -0,0 +1,274 @@
+import ast
+import importlib
+import importlib.util
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+
+
+class IndicatorEntry:
+    """Cached discovery of one indicator file: its module, indicator class and metadata"""
+
+    def __init__(self, file_name, path):
+        self.file_name = file_name  # Relative to the indicators directory, e.g. "freq_psd_wave.py"
+        self.path = path
+        self.module_name = os.path.splitext(os.path.basename(file_name))[0]
+        self.mtime = None  # Modification time of the loaded version
+        self.dependencies = {}  # {path: modification time} of the indicators-directory modules it imports, at load
+        self.indicator_class = None
+        self.error = None  # Exception of the last load attempt, if it failed
+        self.load_secs = None  # Time to execute the module
+        self.imports = []  # Third-party packages the module imports, at module level or lazily
+        self.metadata = {}  # Class settings, completed with the interval and buffer sizes of the first instance
+        self.lock = threading.Lock()  # Held while the module executes (preloading thread or GUI)
+
+    def describe(self):
+        """Multi-line summary, e.g. for a tooltip"""
+        if self.error is not None:
+            return f"{self.file_name}: failed to load: {self.error}"
+        if self.indicator_class is None:
+            return f"{self.file_name}: not loaded yet"
+        lines = [f"{self.indicator_class.__name__}  (loaded in {self.load_secs * 1000:.0f} ms)"]
+        lines += [f"{key}: {value}" for key, value in self.metadata.items()]
+        if self.imports:
+            lines.append(f"imports: {', '.join(self.imports)}")
+        return "\n".join(lines)
+
+
+class IndicatorRegistry:
+    """
+    Discovery and loading of the indicator files of a directory.
+    Each file is executed once and its indicator class cached with metadata, until the file or a module
+    of the directory it imports (helpers such as __BaseIndicator, other indicators), directly or not,
+    changes: get() then loads the new version, which is how indicators are hot-reloaded while a stream runs.
+    Loaded modules are registered in sys.modules like imported ones; changed modules, and those importing
+    them, are evicted before re-executing so that the new version is imported.
+    Files may be preloaded on a background thread so that opening them later takes no module execution.
+    Qt-free: also used by the headless recorder.
+    """
+    # Class attributes reported in the metadata (see BaseIndicatorHandler)
+    CLASS_SETTINGS = ("overload_policy", "max_pending_intervals", "hidden_policy", "essential")
+    # Never re-executed: their state is shared by every indicator (a new instance would split it)
+    SHARED_MODULES = ("__Global_Config",)
+
+    def __init__(self, indicators_dir):
+        self.indicators_dir = os.path.abspath(indicators_dir)
+        self._entries = {}  # {file_name: IndicatorEntry}
+        self._entries_lock = threading.Lock()
+        self._file_names = None  # Cached scan() result
+        self._scan_mtime = None  # Directory modification time at the last scan
+        self._module_mtimes = {}  # {module name: modification time of the version in sys.modules}
+
+        # Indicator modules import their helpers (__BaseIndicator, ...) from the indicators directory
+        if self.indicators_dir not in sys.path:
+            sys.path.insert(0, self.indicators_dir)
+
+    @property
+    def config(self):
+        """The indicators' in-memory global configuration (indicators/__Global_Config.py), shared with them"""
+        # Imported by name from sys.path, like the indicators do, to share their instance
+        # (importlib: a `from __Global_Config import` in a class body would be name-mangled)
+        return importlib.import_module("__Global_Config").global_config
+
+    def scan(self, refresh=False):
+        """
+        Indicator files (relative paths), sorted; helper files and folders (named __*) are skipped.
+        Cached until the directory content changes, or with refresh=True.
+        """
+        dir_mtime = os.stat(self.indicators_dir).st_mtime
+        if refresh or self._file_names is None or dir_mtime != self._scan_mtime:
+            self._file_names = sorted(self._scan_dir(self.indicators_dir))
+            self._scan_mtime = dir_mtime
+        return list(self._file_names)
+
+    def _scan_dir(self, path, prefix=""):
+        for entry in os.scandir(path):
+            if entry.name.startswith("__"):
+                continue
+            if entry.is_dir():
+                yield from self._scan_dir(entry.path, prefix + entry.name + "/")
+            elif entry.name.endswith(".py"):
+                yield prefix + entry.name
+
+    def entry(self, file_name):
+        """Cache entry of a file, loaded or not"""
+        with self._entries_lock:
+            entry = self._entries.get(file_name)
+            if entry is None:
+                entry = self._entries[file_name] = IndicatorEntry(
+                    file_name, os.path.join(self.indicators_dir, file_name))
+            return entry
+
+    def get(self, file_name):
+        """
+        Indicator class of a file, executing the module only when it was never loaded or changed since.
+        :raises: Whatever loading the module raised (the error is also kept in the entry).
+        """
+        entry = self.entry(file_name)
+        with entry.lock:
+            mtime = os.stat(entry.path).st_mtime
+            if entry.mtime != mtime or self._dependencies_modified(entry):
+                self._load(entry, mtime)
+            if entry.error is not None:
+                raise entry.error
+            return entry.indicator_class
+
+    def create(self, file_name):
+        """New instance of the file's indicator class; the first one completes the metadata"""
+        handler = self.get(file_name)()
+        entry = self.entry(file_name)
+        if "update_interval_secs" not in entry.metadata:
+            entry.metadata.update(
+                update_interval_secs=handler.indicator_update_interval,
+                interval_samples=handler.interval_rawdata_len,
+                pending_buffer_samples=handler.interval_rawdata_len * handler.max_pending_intervals,
+                wave_columns=handler.indicator_wave_columns)
+        return handler
+
+    def is_modified(self, file_name):
+        """Whether the file or one of its dependencies changed since it was loaded (False if it was never loaded)"""
+        entry = self.entry(file_name)
+        try:
+            return entry.mtime is not None and (os.stat(entry.path).st_mtime != entry.mtime
+                                                or self._dependencies_modified(entry))
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _dependencies_modified(entry):
+        for path, mtime in entry.dependencies.items():
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return True
+            except FileNotFoundError:
+                return True
+        return False
+
+    def preload(self, file_names):
+        """Load files on a background thread; get() on one of them waits for it instead of loading it again"""
+        def preload_all():
+            for file_name in file_names:
+                try:
+                    self.get(file_name)
+                    logging.info(f"Preloaded indicator {file_name} in {self.entry(file_name).load_secs * 1000:.0f} ms")
+                except Exception as e:
+                    logging.warning(f"Failed to preload indicator {file_name}: {e}")
+
+        thread = threading.Thread(target=preload_all, name="IndicatorPreload", daemon=True)
+        thread.start()
+        return thread
+
+    def _load(self, entry, mtime):
+        """Execute the module (again) and find its indicator class"""
+        start = time.perf_counter()
+        entry.mtime = mtime
+        entry.error = None
+        previous_module = sys.modules.get(entry.module_name)
+        try:
+            with open(entry.path, "rb") as f:
+                tree = ast.parse(f.read(), entry.path)
+            entry.imports = self._third_party_imports(tree)
+            dependencies = self._local_dependencies(tree)
+            evicted = self._evict_changed_modules(dependencies)
+
+            module = previous_module
+            if (module is None or evicted or getattr(module, "__file__", None) != entry.path
+                    or self._module_mtimes.get(entry.module_name) != mtime):
+                spec = importlib.util.spec_from_file_location(entry.module_name, entry.path)
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[entry.module_name] = module  # Shared with indicators importing this one
+                spec.loader.exec_module(module)
+            # else: already imported, unchanged, by another indicator: its classes are shared
+            entry.dependencies = {path: os.stat(path).st_mtime for path in dependencies.values()}
+            self._module_mtimes.update((name, entry.dependencies[path]) for name, path in dependencies.items())
+            self._module_mtimes[entry.module_name] = mtime
+
+            # The first class defined in the module implementing the indicator interface
+            indicator_class = next(
+                (cls for _, cls in inspect.getmembers(module, inspect.isclass)
+                 if cls.__module__ == entry.module_name
+                 and callable(getattr(cls, "process_new_data_and_update_plot", None))),
+                None)
+            if indicator_class is None:
+                raise ValueError(f"{entry.file_name}: no class implementing process_new_data_and_update_plot")
+        except Exception as e:
+            # Modules importing this one keep the running version
+            if previous_module is not None:
+                sys.modules[entry.module_name] = previous_module
+            else:
+                sys.modules.pop(entry.module_name, None)
+            entry.indicator_class = None
+            entry.error = e
+            return
+        entry.indicator_class = indicator_class
+        entry.load_secs = time.perf_counter() - start
+        entry.metadata = {name: getattr(indicator_class, name) for name in self.CLASS_SETTINGS
+                          if hasattr(indicator_class, name)}
+
+    def _module_path(self, module_name):
+        """File of a module of the indicators directory, or None for other modules (and namespace packages)"""
+        base = os.path.join(self.indicators_dir, *module_name.split("."))
+        for path in (base + ".py", os.path.join(base, "__init__.py")):
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _local_dependencies(self, tree):
+        """
+        Modules of the indicators directory imported by a module, directly or through each other (except SHARED_MODULES).
+        :return: {module name: path}, a module's dependencies listed before it
+        """
+        dependencies = {}
+
+        def visit(tree, visiting):
+            for name in self._imported_modules(tree):
+                path = self._module_path(name)
+                if path is None or name in self.SHARED_MODULES or name in dependencies or name in visiting:
+                    continue
+                with open(path, "rb") as f:
+                    visit(ast.parse(f.read(), path), visiting | {name})
+                dependencies[name] = path
+
+        visit(tree, frozenset())
+        return dependencies
+
+    def _evict_changed_modules(self, dependencies):
+        """
+        Remove from sys.modules the dependencies that changed since they were executed, and those importing them.
+        :return: Names of the removed modules
+        """
+        stale = set()
+        for name, path in dependencies.items():  # Dependencies of a module come before it
+            module = sys.modules.get(name)
+            if module is None:
+                continue
+            mtime = os.stat(path).st_mtime
+            # Imported before the registry saw it (e.g. by the standalone test of a helper): taken as current
+            changed = self._module_mtimes.setdefault(name, mtime) != mtime
+            with open(path, "rb") as f:
+                imports_stale = not stale.isdisjoint(self._imported_modules(ast.parse(f.read(), path)))
+            if changed or imports_stale:
+                stale.add(name)
+                del sys.modules[name]
+                logging.info(f"Indicator module {name} changed, executing it again")
+        return stale
+
+    @staticmethod
+    def _imported_modules(tree):
+        """Absolute module names imported anywhere in the module"""
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names.add(node.module)
+        return names
+
+    def _third_party_imports(self, tree):
+        """Top-level packages imported anywhere in the module, except the standard library and the indicators directory"""
+        names = {name.split(".")[0] for name in self._imported_modules(tree)}
+        return sorted(name for name in names if name not in sys.stdlib_module_names and not name.startswith("__")
+                      and self._module_path(name) is None)
@@ -0,0 +1,140 @@
+import json
+
+import numpy as np
+from pyqtgraph.Qt import QtCore
+
+from GUIComp_Acquisition import local_clock
+
+
+class LatencyTracker:
+    """
+    Sample-to-pixels latency of one indicator, as log-spaced histograms per pipeline stage.
+    All times are local_clock() seconds; sample timestamps are on the same clock (clocksync inlets).
+
+    Stages, for the newest sample of each chunk handed to the indicator:
+        acquisition: sample timestamp -> chunk pulled by the acquisition thread
+        queue:       acquisition -> GUI tick starts the indicator's computation
+        compute:     computation start -> end
+        render:      computation end -> next paint of the indicator's widget
+        total:       sample timestamp -> paint
+    """
+    STAGES = ("acquisition", "queue", "compute", "render", "total")
+
+    def __init__(self, min_ms=0.01, max_ms=100000, bins_per_decade=20):
+        # Bin i covers [edges[i-1], edges[i]); bin 0 and the last bin catch under/overflow
+        decades = np.log10(max_ms) - np.log10(min_ms)
+        self.edges_ms = np.logspace(np.log10(min_ms), np.log10(max_ms), int(decades * bins_per_decade) + 1)
+        self.counts = np.zeros((len(self.STAGES), len(self.edges_ms) + 1), dtype=np.int64)
+        self.max_ms = np.zeros(len(self.STAGES))
+        self.last_ms = np.full(len(self.STAGES), np.nan)
+
+        self.observers = {}  # {stage: metrics Histogram also fed with each measurement, in seconds}
+
+        self._sample_time = None  # Newest sample of the chunk being computed
+        self._compute_start = None
+        self._pending = None  # (sample_time, compute_end) waiting for the next paint
+
+    def begin(self, sample_time, arrival_time):
+        """Computation of a chunk starts"""
+        now = local_clock()
+        self._sample_time = sample_time
+        self._add("acquisition", arrival_time - sample_time)
+        self._add("queue", now - arrival_time)
+        self._compute_start = now
+
+    def end(self):
+        """Computation of the chunk ended; the next paint completes the measurement"""
+        now = local_clock()
+        self._add("compute", now - self._compute_start)
+        # An earlier chunk that was never painted is superseded: stages are measured for what reaches the screen
+        self._pending = (self._sample_time, now)
+
+    def painted(self):
+        """The indicator's widget is being painted"""
+        if self._pending is None:
+            return
+        sample_time, compute_end = self._pending
+        self._pending = None
+        now = local_clock()
+        self._add("render", now - compute_end)
+        self._add("total", now - sample_time)
+
+    def _add(self, stage, secs):
+        i = self.STAGES.index(stage)
+        value_ms = secs * 1000
+        self.counts[i, np.searchsorted(self.edges_ms, value_ms, side='right')] += 1
+        self.max_ms[i] = max(self.max_ms[i], value_ms)
+        self.last_ms[i] = value_ms
+        observer = self.observers.get(stage)
+        if observer is not None:
+            observer.observe(secs)
+
+    def reset(self):
+        self.counts[:] = 0
+        self.max_ms[:] = 0
+        self.last_ms[:] = np.nan
+
+    def percentile(self, stage, q):
+        """Approximate q-th percentile (ms) of a stage: upper edge of the bin holding it; NaN without data"""
+        counts = self.counts[self.STAGES.index(stage)]
+        total = counts.sum()
+        if total == 0:
+            return np.nan
+        i = int(np.searchsorted(np.cumsum(counts), q / 100 * total))
+        return self.edges_ms[min(i, len(self.edges_ms) - 1)]
+
+    def summary_text(self):
+        """Compact p50/p95 line per stage for the dock overlay"""
+        def fmt(value_ms):
+            # The first bin also holds negative values (sample timestamps ahead of the local clock)
+            return f"{'<' + format(value_ms, 'g'):>8}" if value_ms <= self.edges_ms[0] else f"{value_ms:8.1f}"
+
+        lines = []
+        for stage in self.STAGES:
+            p50, p95 = self.percentile(stage, 50), self.percentile(stage, 95)
+            if not np.isnan(p50):
+                lines.append(f"{stage:<11} p50 {fmt(p50)}  p95 {fmt(p95)} ms")
+        return "\n".join(lines) if lines else "latency: no data"
+
+    def to_dict(self):
+        """Histograms and summary statistics, JSON-serializable"""
+        return {
+            "bin_upper_edges_ms": self.edges_ms.tolist() + [None],
+            "stages": {
+                stage: {
+                    "count": int(self.counts[i].sum()),
+                    "p50_ms": self._json_ms(self.percentile(stage, 50)),
+                    "p95_ms": self._json_ms(self.percentile(stage, 95)),
+                    "p99_ms": self._json_ms(self.percentile(stage, 99)),
+                    "max_ms": float(self.max_ms[i]),
+                    "histogram": self.counts[i].tolist(),
+                }
+                for i, stage in enumerate(self.STAGES)
+            },
+        }
+
+    @staticmethod
+    def _json_ms(value):
+        return None if np.isnan(value) else float(value)
+
+    @staticmethod
+    def export_json(trackers, file_name):
+        """
+        Write the latency of several indicators to one JSON file.
+        :param trackers: {indicator name: LatencyTracker}
+        """
+        with open(file_name, "w", encoding="utf-8") as f:
+            json.dump({name: tracker.to_dict() for name, tracker in trackers.items()}, f, indent=1)
+
+
+class PaintWatcher(QtCore.QObject):
+    """Event filter reporting paint events of a widget's viewport to a LatencyTracker"""
+
+    def __init__(self, tracker, parent=None):
+        super().__init__(parent)
+        self.tracker = tracker
+
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Type.Paint:
+            self.tracker.painted()
+        return False
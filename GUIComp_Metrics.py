@@ -0,0 +1,196 @@
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+class Metric:
+    """One time series: a metric name plus a fixed set of labels"""
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels, fn=None):
+        """
+        :param fn: Optional callable returning the current value, evaluated when collected. Lets the
+                   registry read counters that already exist elsewhere at no cost on the hot path.
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.fn = fn
+        self._value = 0.0
+
+    @property
+    def value(self):
+        return float(self.fn()) if self.fn is not None else self._value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1):
+        self._value += amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value):
+        self._value = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+    def __init__(self, name, help_text, labels, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = np.asarray(buckets, dtype=float)
+        self.bucket_counts = np.zeros(len(self.buckets) + 1, dtype=np.int64)  # Last bucket: +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0  # Not exported; buckets only bound the largest value
+
+    def observe(self, value):
+        self.bucket_counts[np.searchsorted(self.buckets, value, side='left')] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Approximate quantile: upper bound of the bucket holding it (NaN without data, inf above the last bucket)"""
+        if self.count == 0:
+            return math.nan
+        i = int(np.searchsorted(np.cumsum(self.bucket_counts), q * self.count))
+        return float(self.buckets[i]) if i < len(self.buckets) else math.inf
+
+
+class MetricsRegistry:
+    """
+    Lightweight in-process metrics (counters, gauges, histograms) with Prometheus text and JSON output.
+    Metrics are identified by name and labels; asking again for the same series returns the same object.
+    Updates are plain attribute writes (safe under the GIL for a single writer per series).
+    """
+
+    def __init__(self):
+        self._metrics = {}  # {(name, sorted label items): Metric}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = cls(name, help_text, dict(labels), **kwargs)
+            return metric
+
+    def counter(self, name, help_text="", fn=None, **labels):
+        return self._get(Counter, name, help_text, labels, fn=fn)
+
+    def gauge(self, name, help_text="", fn=None, **labels):
+        return self._get(Gauge, name, help_text, labels, fn=fn)
+
+    def histogram(self, name, help_text="", buckets=Histogram.DEFAULT_BUCKETS, **labels):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def remove(self, **labels):
+        """Drop every series carrying these labels, e.g. when a dock closes or a stream disconnects"""
+        with self._lock:
+            for key, metric in list(self._metrics.items()):
+                if all(metric.labels.get(k) == v for k, v in labels.items()):
+                    del self._metrics[key]
+
+    def collect(self):
+        """Snapshot of the registered metrics, sorted by name"""
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    @staticmethod
+    def _format_labels(labels, extra=None):
+        items = list(labels.items()) + (list(extra.items()) if extra else [])
+        if not items:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        described = set()
+        for metric in self.collect():
+            if metric.name not in described:
+                described.add(metric.name)
+                if metric.help_text:
+                    lines.append(f"# HELP {metric.name} {metric.help_text}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                cumulative = np.cumsum(metric.bucket_counts)
+                for bound, count in zip(list(metric.buckets) + [math.inf], cumulative):
+                    le = "+Inf" if math.isinf(bound) else f"{bound:g}"
+                    lines.append(f"{metric.name}_bucket{self._format_labels(metric.labels, {'le': le})} {count}")
+                lines.append(f"{metric.name}_sum{self._format_labels(metric.labels)} {metric.sum:.9g}")
+                lines.append(f"{metric.name}_count{self._format_labels(metric.labels)} {metric.count}")
+            else:
+                lines.append(f"{metric.name}{self._format_labels(metric.labels)} {metric.value:.9g}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        """JSON-serializable snapshot"""
+        series = []
+        for metric in self.collect():
+            entry = {"name": metric.name, "type": metric.kind, "labels": metric.labels}
+            if isinstance(metric, Histogram):
+                entry.update(count=metric.count, sum=metric.sum,
+                             buckets={f"{b:g}": int(c) for b, c in zip(metric.buckets, np.cumsum(metric.bucket_counts))})
+            else:
+                value = metric.value
+                entry["value"] = value if math.isfinite(value) else None
+            series.append(entry)
+        return {"metrics": series}
+
+    def write_file(self, file_name):
+        """Export to a file: JSON for *.json, Prometheus text otherwise (e.g. for a textfile collector)"""
+        with open(file_name, "w", encoding="utf-8") as f:
+            if file_name.endswith(".json"):
+                json.dump(self.to_dict(), f, indent=1)
+            else:
+                f.write(self.to_prometheus())
+
+
+class MetricsHTTPServer:
+    """Serve a registry on localhost: /metrics (Prometheus text) and /metrics.json"""
+    DEFAULT_PORT = 9109
+
+    def __init__(self, registry, port=DEFAULT_PORT, host="127.0.0.1"):
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, content_type = json.dumps(registry_ref.to_dict()).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, content_type = registry_ref.to_prometheus().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes are not worth a log line each
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.address = f"http://{host}:{self.server.server_address[1]}/metrics"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="MetricsHTTPServer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
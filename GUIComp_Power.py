@@ -0,0 +1,54 @@
+import logging
+import sys
+
+from pyqtgraph.Qt import QtCore, QtGui
+
+try:
+    from PySide6 import QtDBus  # Screensaver notifications of Linux desktops
+except ImportError:
+    QtDBus = None
+
+
+class ScreenLockMonitor(QtCore.QObject):
+    """
+    Tells whether the user is away from the screen, to switch low-power mode on automatically.
+    Qt reports the application as hidden or suspended on some platforms when the session locks; on
+    Linux desktops the freedesktop / GNOME screensaver D-Bus signal is followed as well.
+    """
+    SCREENSAVER_SERVICES = (("org.freedesktop.ScreenSaver", "/org/freedesktop/ScreenSaver"),
+                            ("org.gnome.ScreenSaver", "/org/gnome/ScreenSaver"))
+
+    def __init__(self, on_change=None, parent=None):
+        """
+        :param on_change: Called with the new `locked` state whenever it changes.
+        """
+        super().__init__(parent)
+        self.on_change = on_change
+        self.locked = False
+        self._app_hidden = False
+        self._screensaver_active = False
+
+        QtGui.QGuiApplication.instance().applicationStateChanged.connect(self._on_application_state)
+        if QtDBus is not None and sys.platform.startswith("linux"):
+            bus = QtDBus.QDBusConnection.sessionBus()
+            for service, path in self.SCREENSAVER_SERVICES:
+                if bus.isConnected() and bus.connect(service, path, service, "ActiveChanged",
+                                                     self, QtCore.SLOT("_on_screensaver_active(bool)")):
+                    logging.debug(f"Following screen lock through {service}")
+
+    def _on_application_state(self, state):
+        self._app_hidden = state in (QtCore.Qt.ApplicationState.ApplicationHidden,
+                                     QtCore.Qt.ApplicationState.ApplicationSuspended)
+        self._update()
+
+    @QtCore.Slot(bool)
+    def _on_screensaver_active(self, active):
+        self._screensaver_active = active
+        self._update()
+
+    def _update(self):
+        locked = self._app_hidden or self._screensaver_active
+        if locked != self.locked:
+            self.locked = locked
+            if self.on_change:
+                self.on_change(locked)
@@ -0,0 +1,99 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+
+
+class ProfileCapture:
+    """
+    Time-bounded cProfile + tracemalloc capture of the running application.
+    Nothing is installed outside a capture, so profiling costs nothing while inactive.
+
+    cProfile sees the thread that starts the capture: the GUI thread, where the stream manager's tick
+    and every indicator run. Allocations are traced in all threads (acquisition and writer included).
+    """
+
+    def __init__(self, output_dir="./profile_reports", top_n=8):
+        """
+        :param output_dir: Where the .pstats, .tracemalloc and report files are saved.
+        :param top_n: Functions / allocation sites listed per module in the report.
+        """
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.profiler = None
+        self.start_time = None
+        self._started_tracemalloc = False
+
+    @property
+    def active(self):
+        return self.profiler is not None
+
+    def start(self):
+        self.profiler = cProfile.Profile()
+        # Leave tracemalloc running afterwards if someone else (e.g. PYTHONTRACEMALLOC) started it
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+        self.start_time = time.time()
+        self.profiler.enable()
+
+    def stop(self, modules):
+        """
+        End the capture and save it.
+        :param modules: {label: source file}; the report lists top functions and allocation sites of each.
+        :return: (report text, list of saved files)
+        """
+        self.profiler.disable()
+        elapsed = time.time() - self.start_time
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        profiler, self.profiler = self.profiler, None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        stem = os.path.join(self.output_dir, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        profiler.dump_stats(stem + ".pstats")  # Open with pstats or snakeviz
+        snapshot.dump(stem + ".tracemalloc")  # Open with tracemalloc.Snapshot.load()
+
+        report = self.format_report(pstats.Stats(profiler), snapshot, modules, elapsed)
+        with open(stem + ".txt", "w", encoding="utf-8") as f:
+            f.write(report)
+        return report, [stem + ".pstats", stem + ".tracemalloc", stem + ".txt"]
+
+    def format_report(self, stats, snapshot, modules, elapsed):
+        lines = [f"Capture: {elapsed:.1f} s, {stats.total_calls} calls on the GUI thread", ""]
+
+        for label, path in modules.items():
+            path = os.path.normcase(os.path.abspath(path))
+            functions = sorted(
+                ((ct, tt, nc, func, line) for (file, line, func), (_, nc, tt, ct, _) in stats.stats.items()
+                 if os.path.normcase(os.path.abspath(file)) == path),
+                reverse=True)[:self.top_n]
+            allocations = snapshot.filter_traces([tracemalloc.Filter(True, path)]).statistics("lineno")[:self.top_n]
+
+            lines.append(f"== {label} ({os.path.basename(path)})")
+            lines.append("   cum ms    own ms    calls  function")
+            for ct, tt, nc, func, line in functions:
+                lines.append(f"{ct * 1000:9.1f} {tt * 1000:9.1f} {nc:8d}  {func}:{line}")
+            if not functions:
+                lines.append("  (not called during the capture)")
+            lines.append("  live KiB   blocks  allocation site")
+            for stat in allocations:
+                lines.append(f"{stat.size / 1024:9.1f} {stat.count:8d}  line {stat.traceback[0].lineno}")
+            if not allocations:
+                lines.append("  (no live allocations)")
+            lines.append("")
+
+        lines.append("== All modules, by cumulative time")
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats("cumulative").print_stats(self.top_n * 2)
+        lines.append(stream.getvalue().strip())
+        lines.append("")
+        lines.append("== All threads, largest live allocation sites")
+        for stat in snapshot.statistics("lineno")[:self.top_n * 2]:
+            lines.append(f"{stat.size / 1024:9.1f} KiB {stat.count:8d}  {stat.traceback[0]}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,620 @@
+import argparse
+import json
+import math
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from fractions import Fraction
+
+import numpy as np
+
+
+class RecordWriter:
+    """
+    Asynchronous recording writer, base of the file formats below.
+    The producer (the acquisition thread) copies samples into preallocated record-sized buffers (append);
+    full records are handed to a background thread that writes them to disk. Buffers come from a fixed pool, so memory
+    stays flat however long the recording is, and a slow disk can never stall the caller: when the
+    pool runs dry, whole records are dropped, counted and marked with an annotation.
+
+    Subclasses implement the file format: _open_file, _write_record, _write_annotation, _flush and _close_file.
+    """
+
+    def __init__(self, file_name, signal_headers, sample_freq, record_secs=1,
+                 max_queued_secs=60, fsync_interval=10.0, batch_secs=0):
+        """
+        :param file_name: Path of the file to create.
+        :param signal_headers: pyedflib-style signal headers, one per channel.
+        :param sample_freq: Samples per channel per second; need not be whole (see whole_record_secs).
+        :param record_secs: Duration of one record, the unit handed to the writer thread; lengthened when
+                            it would not hold a whole number of samples at `sample_freq`.
+        :param max_queued_secs: Size of the buffer pool, i.e. how many seconds of data may wait for the disk.
+        :param fsync_interval: Seconds between forced flushes of the file to disk.
+        :param batch_secs: When set, the writer thread sleeps this long between batches and writes what was
+                           queued meanwhile in one go (fewer wakeups, larger writes). Must stay well below
+                           max_queued_secs, or records are dropped. Can be changed while recording.
+        """
+        self.file_name = file_name
+        self.channel_names = [h['label'] for h in signal_headers]
+        self.channel_count = len(signal_headers)
+        self.sample_freq = self.normalize_sample_freq(sample_freq)
+        self.record_secs = self.whole_record_secs(self.sample_freq, record_secs)
+        self.record_len = round(self.sample_freq * self.record_secs)
+        if self.record_len <= 0:
+            raise ValueError(f"cannot record at {sample_freq} Hz in {record_secs} s records: "
+                             f"a record must hold at least one sample (irregular-rate streams are not supported)")
+        self.fsync_interval = fsync_interval
+        self.batch_secs = batch_secs
+
+        # Physical-to-digital conversion for all channels at once: digital = physical * gain + offset
+        self.phys_min = np.array([h['physical_min'] for h in signal_headers], dtype=float)[:, None]
+        self.phys_max = np.array([h['physical_max'] for h in signal_headers], dtype=float)[:, None]
+        self.dig_min = np.array([h['digital_min'] for h in signal_headers], dtype=float)[:, None]
+        self.dig_max = np.array([h['digital_max'] for h in signal_headers], dtype=float)[:, None]
+        self.gain = (self.dig_max - self.dig_min) / (self.phys_max - self.phys_min)
+        self.offset = self.dig_min - self.phys_min * self.gain
+        # Writer-thread work buffers, one record each
+        self._work_buf = np.empty((self.channel_count, self.record_len))
+        self._digital_buf = np.empty((self.channel_count, self.record_len), dtype=np.int16)
+
+        # Preallocated record buffers: the producer fills one, the writer thread returns them when written
+        self._free_buffers = queue.Queue()
+        for _ in range(max(2, int(max_queued_secs / record_secs))):
+            self._free_buffers.put(np.empty((self.channel_count, self.record_len)))
+        # ("record", buf, t_filled, t_first, t_last) / ("annotation", onset_record, text) / ("close", rename_to)
+        self._work_queue = queue.Queue()
+        self._wake = threading.Event()  # Cuts a batch wait short, e.g. on close
+
+        # Producer state
+        self._current_buf = None  # Record being filled
+        self._fill_pos = 0
+        self._dropping = False  # Current record is being discarded (no free buffer)
+        self._record_t_first = np.nan  # LSL timestamp of the first sample of the current record
+        self._records_enqueued = 0  # Records that will end up in the file
+        self.records_dropped = 0
+        self._gap_records = 0  # Consecutive dropped records not yet annotated
+        self.closed = False
+
+        # Writer-thread counters (read from other threads, written only by the writer)
+        self.records_written = 0
+        self.samples_written = 0
+        self.lag_secs = 0.0  # Time from record completion to record on disk, last record
+        self.max_lag_secs = 0.0
+        self.error = None
+        self.start_time = time.time()
+
+        self._open_file(signal_headers)
+        self._thread = threading.Thread(target=self._write_loop, name=type(self).__name__)
+        self._thread.start()
+
+    @staticmethod
+    def normalize_sample_freq(sample_freq):
+        """
+        Validated sample rate: an int when it is whole (e.g. 256.0 from an LSL stream info), else a float.
+        :raises ValueError: For irregular (0), negative or non-finite rates.
+        """
+        sample_freq = float(sample_freq)
+        if not math.isfinite(sample_freq) or sample_freq <= 0:
+            raise ValueError(f"invalid sample rate {sample_freq} Hz (irregular-rate streams are not supported)")
+        return int(sample_freq) if sample_freq.is_integer() else sample_freq
+
+    @staticmethod
+    def whole_record_secs(sample_freq, record_secs):
+        """
+        Shortest multiple of `record_secs` holding a whole number of samples at `sample_freq`,
+        e.g. 5 s at 250.4 Hz for 1 s (the record duration pyedflib picks for such a rate in EDF).
+        """
+        samples = Fraction(sample_freq).limit_denominator(1000) * Fraction(record_secs).limit_denominator(1000)
+        return record_secs * samples.denominator
+
+    @staticmethod
+    def make_signal_headers(channel_names, sample_freq):
+        """pyedflib-style signal headers of EEG channels in uV (±655 uV on 16 bits)"""
+        return [{
+            'label': name if name else f"Channel_{i}",
+            'dimension': 'uV',
+            'sample_frequency': sample_freq,
+            'physical_min': -327.68*2,
+            'physical_max': 327.67*2,
+            'digital_min': -32768,
+            'digital_max': 32767,
+            'prefilter': '',
+            'transducer': ''
+        } for i, name in enumerate(channel_names)]
+
+    # ------------------------ Producer side ------------------------
+
+    def append(self, data, timestamps=None):
+        """
+        Copy new samples into the current record buffer; never blocks.
+        :param data: 2D array (channels x samples).
+        :param timestamps: Optional LSL timestamps of the samples (1D array).
+        """
+        if self.closed:
+            return
+
+        n_samples = data.shape[1]
+        pos = 0
+        while pos < n_samples:
+            if self._current_buf is None and not self._dropping:
+                try:
+                    self._current_buf = self._free_buffers.get_nowait()
+                except queue.Empty:
+                    # Writer is behind by max_queued_secs: discard this record rather than wait
+                    self._dropping = True
+            if self._fill_pos == 0:
+                self._record_t_first = timestamps[pos] if timestamps is not None else np.nan
+
+            n_copy = min(self.record_len - self._fill_pos, n_samples - pos)
+            if not self._dropping:
+                self._current_buf[:, self._fill_pos:self._fill_pos + n_copy] = data[:, pos:pos + n_copy]
+            self._fill_pos += n_copy
+            pos += n_copy
+
+            if self._fill_pos == self.record_len:
+                t_last = timestamps[pos - 1] if timestamps is not None else np.nan
+                self._finish_record(t_last)
+
+    def _finish_record(self, t_last):
+        if self._dropping:
+            self.records_dropped += 1
+            self._gap_records += 1
+        else:
+            self._flush_gap_annotation()
+            self._work_queue.put(("record", self._current_buf, time.time(), self._record_t_first, t_last))
+            self._records_enqueued += 1
+        self._current_buf = None
+        self._fill_pos = 0
+        self._dropping = False
+
+    def _flush_gap_annotation(self):
+        """Mark consecutive dropped records with a single annotation at the point where they are missing"""
+        if self._gap_records:
+            text = f"Recording gap: {self._gap_records * self.record_secs:g} s dropped"
+            self._work_queue.put(("annotation", self._records_enqueued, text))
+            self._gap_records = 0
+
+    def annotate(self, text):
+        """Add an annotation at the current end of the recording, e.g. to mark a stream gap"""
+        if self.closed:
+            return
+        self._work_queue.put(("annotation", self._records_enqueued + self._fill_pos / self.record_len, text))
+
+    def close(self, rename_to=None):
+        """
+        Finish the recording without waiting for the disk: the writer thread writes what is queued,
+        closes the file and renames it to `rename_to`. An incomplete last record is discarded.
+        The outcome is known once `finished`: `file_name` is the final name, `error` is set if it failed.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self._flush_gap_annotation()
+        self._work_queue.put(("close", rename_to))
+        self._wake.set()
+
+    @property
+    def finished(self):
+        """Whether the file is complete after close(): the writer thread wrote, closed and renamed it (or failed)"""
+        return self.closed and not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        """Wait until the file is finished after close(); returns `finished`"""
+        self._thread.join(timeout)
+        return self.finished
+
+    @property
+    def queue_depth(self):
+        """Number of records waiting to be written"""
+        return self._work_queue.qsize()
+
+    def get_stats(self):
+        """Throughput / lag counters for status display"""
+        elapsed = max(time.time() - self.start_time, 1e-6)
+        return {
+            "records_written": self.records_written,
+            "records_dropped": self.records_dropped,
+            "queue_depth": self.queue_depth,
+            "write_rate": self.samples_written / elapsed,  # Samples per second per channel
+            "lag_secs": self.lag_secs,
+            "max_lag_secs": self.max_lag_secs,
+        }
+
+    # ------------------------ Writer thread ------------------------
+
+    def _write_loop(self):
+        last_fsync_time = time.time()
+        while True:
+            if self.batch_secs and self._work_queue.empty():
+                self._wake.wait(self.batch_secs)
+                self._wake.clear()
+            try:
+                item = self._work_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not threading.main_thread().is_alive():
+                    # Application exited without stopping the recording: still leave a valid file
+                    item = ("close", None)
+                else:
+                    continue
+            kind = item[0]
+            if kind == "close":
+                self._close_and_rename(item[1])
+                return
+            if self.error is not None:
+                # Keep draining so the producer gets its buffers back
+                if kind == "record":
+                    self._free_buffers.put(item[1])
+                continue
+
+            try:
+                if kind == "record":
+                    _, buf, t_filled, t_first, t_last = item
+                    self._to_digital(buf)
+                    self._free_buffers.put(buf)
+                    self._write_record(self._digital_buf, t_first, t_last)
+                    self.records_written += 1
+                    self.samples_written += self.record_len
+                    self.lag_secs = time.time() - t_filled
+                    self.max_lag_secs = max(self.max_lag_secs, self.lag_secs)
+                elif kind == "annotation":
+                    _, onset_record, text = item
+                    self._write_annotation(onset_record, text)
+
+                if time.time() - last_fsync_time >= self.fsync_interval:
+                    self._flush()
+                    last_fsync_time = time.time()
+            except Exception as e:
+                self.error = e
+
+    def _to_digital(self, buf):
+        """Convert one record of all channels to int16 (into _digital_buf) in a single vectorized pass"""
+        np.multiply(buf, self.gain, out=self._work_buf)
+        self._work_buf += self.offset
+        np.rint(self._work_buf, out=self._work_buf)
+        np.clip(self._work_buf, self.dig_min, self.dig_max, out=self._work_buf)
+        self._digital_buf[...] = self._work_buf
+
+    def _fsync_path(self):
+        """Push written data from the OS cache to disk"""
+        fd = os.open(self.file_name, os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _close_and_rename(self, rename_to):
+        try:
+            self._close_file()
+            if rename_to:
+                os.rename(self.file_name, rename_to)
+                self.file_name = rename_to
+        except Exception as e:
+            self.error = e
+
+    def _open_file(self, signal_headers):
+        raise NotImplementedError
+
+    def _write_record(self, digital, t_first, t_last):
+        raise NotImplementedError
+
+    def _write_annotation(self, onset_record, text):
+        raise NotImplementedError
+
+    def _flush(self):
+        raise NotImplementedError
+
+    def _close_file(self):
+        raise NotImplementedError
+
+
+class EDFRecordWriter(RecordWriter):
+    """Asynchronous EDF+ writer (one EDF data record = 1 second)"""
+
+    file_ext = ".edf"
+
+    def __init__(self, file_name, signal_headers, sample_freq, **kwargs):
+        super().__init__(file_name, signal_headers, sample_freq, record_secs=1, **kwargs)
+
+    def _open_file(self, signal_headers):
+        import pyedflib  # Imported when a recording starts, not with the GUI
+
+        self.edf_writer = pyedflib.EdfWriter(self.file_name, self.channel_count, file_type=pyedflib.FILETYPE_EDFPLUS)
+        self.edf_writer.setSignalHeaders(signal_headers)
+        # Blocks are written one record at a time: the header's record duration must match ours
+        if not math.isclose(self.edf_writer.record_duration, self.record_secs):
+            self.edf_writer.close()
+            raise ValueError(f"EDF records of {self.edf_writer.record_duration} s at {self.sample_freq} Hz, "
+                             f"expected {self.record_secs} s")
+
+    def _write_record(self, digital, t_first, t_last):
+        # A block is one data record with the channels one after another, as laid out in `digital`
+        if self.edf_writer.blockWriteDigitalShortSamples(digital.reshape(-1)) < 0:
+            raise OSError(f"failed to write record to {self.file_name}")
+
+    def _write_annotation(self, onset_record, text):
+        self.edf_writer.writeAnnotation(float(onset_record * self.record_secs), -1, text)
+
+    def _flush(self):
+        # edflib keeps its own stdio buffer (flushed on close); this syncs what already reached the OS
+        self._fsync_path()
+
+    def _close_file(self):
+        self.edf_writer.close()
+
+
+class CompressedRecordFormat:
+    """
+    Layout of the compact recording format (.csig):
+
+        file header   MAGIC, uint32 header length, JSON header (channels, rates, digital conversion)
+        block*        BLOCK_HEADER + payload; each block is self-delimiting and CRC-checked, so a file cut
+                      short by a crash is still readable up to its last complete block
+        index         INDEX_TAG + array of INDEX_DTYPE entries, one per data block (written on close)
+        trailer       TRAILER: TRAILER_MAGIC, file offset of the index
+
+    Data block payload: int16 samples of all channels, delta-encoded along time, byte-shuffled and
+    zlib-compressed. Annotation block payload: UTF-8 text.
+    """
+    MAGIC = b"CSIGREC\x01"
+    BLOCK_HEADER = struct.Struct("<2sBIQddII")  # tag, kind, n_samples, first_sample, t_first, t_last, payload_len, crc32
+    BLOCK_TAG = b"BK"
+    KIND_DATA = 0
+    KIND_ANNOTATION = 1
+    INDEX_TAG = b"IX"
+    INDEX_DTYPE = np.dtype([("offset", "<u8"), ("first_sample", "<u8"), ("n_samples", "<u4"),
+                            ("t_first", "<f8"), ("t_last", "<f8")])
+    TRAILER = struct.Struct("<8sQ")
+    TRAILER_MAGIC = b"CSIGIDX\x01"
+
+    @staticmethod
+    def encode(digital):
+        """(channels x samples) int16 -> compressed bytes"""
+        delta = np.diff(digital, axis=1, prepend=np.zeros((digital.shape[0], 1), dtype=np.int16))  # Wraps, reversibly
+        shuffled = delta.view(np.uint8).reshape(-1, 2).T  # Low bytes, then high bytes
+        return zlib.compress(np.ascontiguousarray(shuffled).tobytes(), 1)
+
+    @staticmethod
+    def decode(payload, channel_count, n_samples):
+        """Inverse of encode"""
+        shuffled = np.frombuffer(zlib.decompress(payload), dtype=np.uint8).reshape(2, -1)
+        delta = np.ascontiguousarray(shuffled.T).view(np.int16).reshape(channel_count, n_samples)
+        return np.cumsum(delta, axis=1, dtype=np.int16)
+
+
+class CompressedRecordWriter(RecordWriter):
+    """Asynchronous writer of the compact .csig format (see CompressedRecordFormat)"""
+
+    file_ext = ".csig"
+
+    def __init__(self, file_name, signal_headers, sample_freq, record_secs=10, **kwargs):
+        self.index = []  # INDEX_DTYPE entries of the data blocks written so far
+        self.first_sample = 0  # Sample position of the next block
+        super().__init__(file_name, signal_headers, sample_freq, record_secs=record_secs, **kwargs)
+
+    def _open_file(self, signal_headers):
+        self.file = open(self.file_name, "wb")
+        header = json.dumps({
+            "channel_names": self.channel_names,
+            "sample_freq": self.sample_freq,
+            "physical_min": self.phys_min.ravel().tolist(),
+            "physical_max": self.phys_max.ravel().tolist(),
+            "digital_min": self.dig_min.ravel().tolist(),
+            "digital_max": self.dig_max.ravel().tolist(),
+            "dimension": [h.get('dimension', '') for h in signal_headers],
+            "start_time": time.time(),
+        }).encode("utf-8")
+        self.file.write(CompressedRecordFormat.MAGIC + struct.pack("<I", len(header)) + header)
+        self.file.flush()
+
+    def _write_block(self, kind, first_sample, n_samples, t_first, t_last, payload):
+        fmt = CompressedRecordFormat
+        offset = self.file.tell()
+        self.file.write(fmt.BLOCK_HEADER.pack(fmt.BLOCK_TAG, kind, n_samples, first_sample,
+                                              t_first, t_last, len(payload), zlib.crc32(payload)))
+        self.file.write(payload)
+        self.file.flush()  # Hand the complete block to the OS: a crash can only lose the block being written
+        return offset
+
+    def _write_record(self, digital, t_first, t_last):
+        payload = CompressedRecordFormat.encode(digital)
+        offset = self._write_block(CompressedRecordFormat.KIND_DATA, self.first_sample, self.record_len,
+                                   t_first, t_last, payload)
+        self.index.append((offset, self.first_sample, self.record_len, t_first, t_last))
+        self.first_sample += self.record_len
+
+    def _write_annotation(self, onset_record, text):
+        # Annotation blocks carry their own onset (not the position of the next data block)
+        onset_sample = round(onset_record * self.record_len)
+        self._write_block(CompressedRecordFormat.KIND_ANNOTATION, onset_sample, 0, np.nan, np.nan, text.encode("utf-8"))
+
+    def _flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _close_file(self):
+        fmt = CompressedRecordFormat
+        index_offset = self.file.tell()
+        index = np.array(self.index, dtype=fmt.INDEX_DTYPE)
+        self.file.write(fmt.INDEX_TAG + struct.pack("<I", len(index)) + index.tobytes())
+        self.file.write(fmt.TRAILER.pack(fmt.TRAILER_MAGIC, index_offset))
+        self._flush()
+        self.file.close()
+
+
+class CompressedRecordReader:
+    """
+    Random-access reader of .csig recordings, by sample position or by LSL timestamp.
+    Uses the index written on close, or rebuilds it by scanning the blocks if the recording was not
+    closed properly. Also used for offline replay (iter_chunks) and EDF+ export (to_edf).
+    """
+
+    def __init__(self, file_name):
+        fmt = CompressedRecordFormat
+        self.file_name = file_name
+        self.file = open(file_name, "rb")
+
+        if self.file.read(len(fmt.MAGIC)) != fmt.MAGIC:
+            raise ValueError(f"{file_name} is not a .csig recording")
+        header_len, = struct.unpack("<I", self.file.read(4))
+        self.header = json.loads(self.file.read(header_len))
+        self.data_start = self.file.tell()
+
+        self.channel_names = self.header["channel_names"]
+        self.channel_count = len(self.channel_names)
+        self.sample_freq = RecordWriter.normalize_sample_freq(self.header["sample_freq"])
+        phys_min = np.array(self.header["physical_min"])[:, None]
+        phys_max = np.array(self.header["physical_max"])[:, None]
+        dig_min = np.array(self.header["digital_min"])[:, None]
+        dig_max = np.array(self.header["digital_max"])[:, None]
+        self.scale = (phys_max - phys_min) / (dig_max - dig_min)  # physical = digital * scale + phys_offset
+        self.phys_offset = phys_min - dig_min * self.scale
+
+        self.annotations = []  # [(onset_sample, text)]
+        self.index = self._read_index()
+        if self.index is None:
+            self.index = self._scan_blocks()
+        self.n_samples = int(self.index["first_sample"][-1] + self.index["n_samples"][-1]) if len(self.index) else 0
+
+    def _read_index(self):
+        """Read the index written on close; None if the file has no valid trailer"""
+        fmt = CompressedRecordFormat
+        self.file.seek(0, os.SEEK_END)
+        file_len = self.file.tell()
+        if file_len - self.data_start < fmt.TRAILER.size:
+            return None
+        self.file.seek(file_len - fmt.TRAILER.size)
+        magic, index_offset = fmt.TRAILER.unpack(self.file.read(fmt.TRAILER.size))
+        if magic != fmt.TRAILER_MAGIC:
+            return None
+
+        self.file.seek(index_offset)
+        if self.file.read(len(fmt.INDEX_TAG)) != fmt.INDEX_TAG:
+            return None
+        count, = struct.unpack("<I", self.file.read(4))
+        index = np.frombuffer(self.file.read(count * fmt.INDEX_DTYPE.itemsize), dtype=fmt.INDEX_DTYPE)
+
+        self._scan_blocks(end=index_offset, annotations_only=True)
+        return index
+
+    def _scan_blocks(self, end=None, annotations_only=False):
+        """Walk the blocks from the start of the data, stopping at the first incomplete or corrupt one"""
+        fmt = CompressedRecordFormat
+        entries = []
+        offset = self.data_start
+        self.file.seek(offset)
+        while end is None or offset < end:
+            raw = self.file.read(fmt.BLOCK_HEADER.size)
+            if len(raw) < fmt.BLOCK_HEADER.size:
+                break
+            tag, kind, n_samples, first_sample, t_first, t_last, payload_len, crc = fmt.BLOCK_HEADER.unpack(raw)
+            if tag != fmt.BLOCK_TAG:
+                break
+            if kind == fmt.KIND_ANNOTATION or not annotations_only:
+                payload = self.file.read(payload_len)
+                if len(payload) < payload_len or zlib.crc32(payload) != crc:
+                    break
+                if kind == fmt.KIND_ANNOTATION:
+                    self.annotations.append((first_sample, payload.decode("utf-8")))
+                else:
+                    entries.append((offset, first_sample, n_samples, t_first, t_last))
+            else:
+                self.file.seek(payload_len, os.SEEK_CUR)
+            offset = self.file.tell()
+        return np.array(entries, dtype=fmt.INDEX_DTYPE)
+
+    def _read_block(self, block_idx):
+        """Digital samples of one data block"""
+        fmt = CompressedRecordFormat
+        entry = self.index[block_idx]
+        self.file.seek(int(entry["offset"]))
+        header = fmt.BLOCK_HEADER.unpack(self.file.read(fmt.BLOCK_HEADER.size))
+        payload = self.file.read(header[6])
+        return fmt.decode(payload, self.channel_count, int(entry["n_samples"]))
+
+    def read(self, start_sample, n_samples, digital=False):
+        """
+        Read a span of samples, decompressing only the blocks it touches.
+        :return: 2D array (channels x samples), physical units unless digital=True.
+        """
+        start_sample = max(0, int(start_sample))
+        stop_sample = min(self.n_samples, start_sample + int(n_samples))
+        out = np.empty((self.channel_count, max(0, stop_sample - start_sample)), dtype=np.int16)
+        if out.shape[1]:
+            first_block = np.searchsorted(self.index["first_sample"], start_sample, side="right") - 1
+            block_idx = first_block
+            while block_idx < len(self.index) and self.index["first_sample"][block_idx] < stop_sample:
+                block_start = int(self.index["first_sample"][block_idx])
+                block = self._read_block(block_idx)
+                lo = max(start_sample, block_start)
+                hi = min(stop_sample, block_start + block.shape[1])
+                out[:, lo - start_sample:hi - start_sample] = block[:, lo - block_start:hi - block_start]
+                block_idx += 1
+        if digital:
+            return out
+        return out * self.scale + self.phys_offset
+
+    def sample_at_time(self, lsl_time):
+        """Sample position of an LSL timestamp (interpolated within its block)"""
+        if not len(self.index) or np.isnan(self.index["t_first"][0]):
+            raise ValueError(f"{self.file_name} has no LSL timestamps")
+        block_idx = max(0, np.searchsorted(self.index["t_first"], lsl_time, side="right") - 1)
+        entry = self.index[block_idx]
+        return int(entry["first_sample"] + round((lsl_time - entry["t_first"]) * self.sample_freq))
+
+    def read_time(self, lsl_time, duration_secs):
+        """Read `duration_secs` of data starting at LSL timestamp `lsl_time`"""
+        return self.read(self.sample_at_time(lsl_time), duration_secs * self.sample_freq)
+
+    def iter_chunks(self, chunk_len):
+        """Yield consecutive (channels x chunk_len) physical chunks, e.g. to replay a recording into indicators"""
+        for start in range(0, self.n_samples, chunk_len):
+            yield self.read(start, chunk_len)
+
+    def to_edf(self, edf_file_name):
+        """Export to EDF+ (trailing samples that do not fill a whole record are dropped, as in EDF recordings)"""
+        signal_headers = [{
+            'label': name,
+            'dimension': self.header["dimension"][i],
+            'sample_frequency': self.sample_freq,
+            'physical_min': self.header["physical_min"][i],
+            'physical_max': self.header["physical_max"][i],
+            'digital_min': int(self.header["digital_min"][i]),
+            'digital_max': int(self.header["digital_max"][i]),
+            'prefilter': '',
+            'transducer': ''
+        } for i, name in enumerate(self.channel_names)]
+
+        import pyedflib
+
+        edf_writer = pyedflib.EdfWriter(edf_file_name, self.channel_count, file_type=pyedflib.FILETYPE_EDFPLUS)
+        try:
+            edf_writer.setSignalHeaders(signal_headers)
+            # Digital samples are copied as they are: no second quantization.
+            # Records of 1 s, or longer when a second does not hold a whole number of samples
+            record_len = round(self.sample_freq * RecordWriter.whole_record_secs(self.sample_freq, 1))
+            for start in range(0, self.n_samples - record_len + 1, record_len):
+                record = np.ascontiguousarray(self.read(start, record_len, digital=True))
+                edf_writer.blockWriteDigitalShortSamples(record.reshape(-1))
+            for onset_sample, text in self.annotations:
+                edf_writer.writeAnnotation(onset_sample / self.sample_freq, -1, text)
+        finally:
+            edf_writer.close()
+
+    def close(self):
+        self.file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert a .csig recording to EDF+')
+    parser.add_argument('csig_file', help='Recording in the compact .csig format')
+    parser.add_argument('edf_file', nargs='?', help='Output EDF+ file (default: same name with .edf)')
+    args = parser.parse_args()
+
+    reader = CompressedRecordReader(args.csig_file)
+    edf_file = args.edf_file or os.path.splitext(args.csig_file)[0] + EDFRecordWriter.file_ext
+    reader.to_edf(edf_file)
+    reader.close()
+    print(f"Exported {reader.n_samples} samples x {reader.channel_count} channels to {edf_file}")
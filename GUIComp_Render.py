@@ -0,0 +1,69 @@
+from pyqtgraph.Qt import QtCore
+
+
+class RenderScheduler:
+    """
+    Frame-rate governor shared by all docks.
+    Indicators mark themselves dirty when their results change; one timer redraws the dirty ones at most
+    `max_fps` times per second. Updates arriving between two frames are merged: only the latest state
+    is drawn, so a weak machine does not spend CPU on repaints nobody sees.
+    Indicators whose plot cannot be seen are not drawn, and are told so (set_visible) to apply their
+    hidden_policy to computation as well.
+    In low-power mode, frames drop to LOW_POWER_FPS and only essential indicators count as visible.
+    """
+    LOW_POWER_FPS = 1
+
+    def __init__(self, max_fps=20, metrics=None):
+        """
+        :param max_fps: Cap on redraws per second, across all indicators.
+        :param metrics: Optional MetricsRegistry receiving redraw / merged-update counters.
+        """
+        self.metrics = metrics
+        self.handlers = {}  # {indicator handler: (is_visible, redraws counter, merged updates counter)}
+        self.low_power = False
+        self.timer = QtCore.QTimer()
+        self.timer.timeout.connect(self.render_frame)
+        self.set_max_fps(max_fps)
+
+    def set_max_fps(self, max_fps):
+        self.max_fps = max_fps
+        self.timer.start(int(1000 / (self.LOW_POWER_FPS if self.low_power else max_fps)))
+
+    def set_low_power(self, enabled):
+        self.low_power = enabled
+        for indicator_handler in self.handlers:
+            indicator_handler.low_power = enabled
+        self.set_max_fps(self.max_fps)
+
+    def add(self, indicator_handler, label, is_visible=None):
+        """
+        Take over the drawing of an indicator.
+        :param is_visible: Callable telling whether the indicator's plot can be seen (None: always).
+        """
+        indicator_handler.render_deferred = True
+        indicator_handler.low_power = self.low_power
+        if self.metrics is not None:
+            counters = (self.metrics.counter("indicator_redraws_total", "Redraws of the indicator's plot", indicator=label),
+                        self.metrics.counter("indicator_merged_updates_total",
+                                             "Updates merged into a later redraw", indicator=label))
+        else:
+            counters = (None, None)
+        self.handlers[indicator_handler] = (is_visible, *counters)
+
+    def remove(self, indicator_handler):
+        indicator_handler.render_deferred = False
+        indicator_handler.low_power = False
+        self.handlers.pop(indicator_handler, None)
+
+    def render_frame(self):
+        """Redraw every dirty, visible indicator once"""
+        for indicator_handler, (is_visible, redraws, merged) in self.handlers.items():
+            visible = ((is_visible is None or is_visible())
+                       and (indicator_handler.essential or not self.low_power))
+            indicator_handler.set_visible(visible)
+            if not visible or not indicator_handler.dirty:
+                continue
+            if redraws is not None:
+                redraws.inc()
+                merged.inc(indicator_handler.pending_updates - 1)
+            indicator_handler.render()
@@ -1,102 +1,85 @@
 import logging
 import os
+import queue
+import threading
 import traceback
-import mne
 import numpy as np
 from datetime import datetime
 import time
-import pyedflib
-from pyqtgraph.Qt import QtCore, QtWidgets
-from mne_lsl.lsl import resolve_streams
-from mne_lsl.stream import StreamLSL
+from pyqtgraph.Qt import QtCore, QtGui, QtWidgets
 from GUIComp_Utils import GUI_Utils
-from pathlib import Path
-import yaml  
-
-
-mne.set_log_level('WARNING')  # Set MNE log level to WARNING
-
-
-class DeviceInfo:
-    """Device information class, including channel selection, sample frequency, and device name"""
-
-    def __init__(self, channel_picks, sample_freq, name=""):
-        self.channel_picks = channel_picks
-        self.sample_freq = sample_freq
-        self.name = name  # Newly added device name attribute
-
-    def __repr__(self):
-        return (
-            f"DeviceInfo(name={self.name}, channel_picks={self.channel_picks}, "
-            f"sample_freq={self.sample_freq} Hz)"
-        )
-
-class DeviceInfoDatabase:
-    """Collection of channels and sampling frequencies for all devices"""
-
-    # Muse
-    MUSE_ALL = DeviceInfo(["AF7", "AF8", "TP10"],
-                          256,
-                          "Muse All")
-
-    MUSE = DeviceInfo(["AF7"],
-                      256,
-                      "Muse")
-
-    #### Muse S + BlueMuse + mne-lsl viewer will hang after a few minutes due to freq config problem"""
-    # MUSE_S = DeviceInfo(["AF7"],
-    #                      512,  # BlueMuse shows 512, marked 256hz in stream, and actual push rate is
-    #                                         is 512 Hz. Use this value here.
-                         # "Muse S")
-
-    # MNE-LSL Player
-    PLAYER_ALL = DeviceInfo(["EEG Fpz-Cz", "EEG Pz-Oz"],
-                            100,
-                            "Player All")
-
-    PLAYER = DeviceInfo(["EEG Fpz-Cz"],
-                        100,
-                        "Player")
-
-    # TGAM
-    TGMA_ALL = DeviceInfo(["Fp1", "Fp2"],
-                          512,
-                          "TGMA All")
-
-    TGMA = DeviceInfo(["Fp1"], 512,
-                      "TGAM")
-
-    # Flexolink
-    FLEXOLINK_ALL = DeviceInfo(["Fpz-Raw", "Fpz-Filtered"], 250,
-                      "Flexo")
-    FLEXOLINK = DeviceInfo(["Fpz-Filtered"], 250,
-                      "Flexo")
+from GUIComp_Acquisition import DeviceInfo, DeviceInfoDatabase, StreamDiscovery, StreamSession, open_lsl_stream
+from GUIComp_Metrics import MetricsRegistry
+from GUIComp_Recording import RecordWriter, EDFRecordWriter, CompressedRecordWriter
 
 
 class EEGStreamManager:
+    # Low-power mode (see set_low_power): data ticks per second, seconds between acquisition pulls,
+    # and seconds of recording written per batch (below the writers' 60 s buffer pool)
+    LOW_POWER_TICK_HZ = 1
+    LOW_POWER_PULL_SECS = 0.25
+    LOW_POWER_WRITE_BATCH_SECS = 20
 
-
-    def __init__(self, main_window,debug_mode = False):
+    def __init__(self, main_window,debug_mode = False, tick_hz=20):
         self.main_window = main_window
         self.status_bar = main_window.status_bar
-        self.stream: StreamLSL = None  # LSL stream instance
-        self.timer = None
+        self.sessions = {}  # {identity (name, type, source_id): StreamSession}, one per connected LSL outlet
+        self.active_session: StreamSession = None  # Target of new indicators and recordings
+        self.unbound_indicators = []  # Indicators loaded while no stream was connected
+        self.timer = None  # One timer drains every session and feeds the indicators
+        self.tick_interval_ms = int(1000 / tick_hz)
+        self.low_power = False  # Fewer wakeups of the GUI tick, acquisition and recording threads
+        self.record_session: StreamSession = None  # Session being recorded
         self.recording = False  # Whether it is recording
-        self.record_file = None  # Recording file object
+        self.record_file: RecordWriter = None  # Asynchronous recording writer
+        self.closing_files = []  # Writers of stopped recordings still finishing their file
+        self.record_writer_class = EDFRecordWriter  # Recording format
         self.record_file_name = None  # Recording file name
-        self.device_info = None
+        self.record_channel_names = None  # Channels of the current recording
+        self.record_rows = None  # Rows of the acquired data that are recorded
         self.record_button = None  # Recording button reference
-        self.data_buffer = None  
         self.debug_mode = debug_mode
-        self.debug_counter = 0  
-        self.debug_sample_counter = 0 
         self.debug_last_print_time = time.time()  
-        self.write_count = 0  # For tracking file write operations
-        self.first_write_time = None  # For tracking first write timestamp
-        self.total_written_samples = 0  # For tracking total written samples
+        self.next_status_update = 0.0  # Time of the next refresh of the acquisition status label
+        self.next_write_report = 10  # Records written before the next write-rate log message
         self.log_file = open("eeg_stream.log", "a")
         self.log_message("EEGStreamManager initialized")
 
+        # Acquisition, indicator, recording and GUI-loop metrics (see GUIComp_Metrics)
+        self.metrics = MetricsRegistry()
+        self.register_metrics()
+
+        # LSL outlets are resolved in the background; menus and connections use the cache.
+        # Started by the main window once it is shown (the discovery thread imports the LSL library)
+        self.discovery = StreamDiscovery()
+        self.connecting = set()  # Identities of streams being opened
+        self.opened_streams = queue.Queue()  # (deviceInfo, sinfo, stream, error) from open_stream
+
+        # Per-stream rate, gap, overlap and overrun counters, next to the status messages
+        self.stream_status_label = QtWidgets.QLabel()
+        self.status_bar.addPermanentWidget(self.stream_status_label)
+
+    def register_metrics(self):
+        self.tick_duration = self.metrics.histogram("gui_tick_seconds", "Duration of one GUI data tick")
+        self.metrics.gauge("recording_queue_depth", "Records waiting for the writer thread",
+                           fn=lambda: self.record_file.queue_depth if self.record_file else 0)
+        self.metrics.gauge("recording_writer_lag_seconds", "Time from record completion to record on disk",
+                           fn=lambda: self.record_file.lag_secs if self.record_file else 0)
+        self.metrics.gauge("recording_records_written", "Records written to the current recording",
+                           fn=lambda: self.record_file.records_written if self.record_file else 0)
+        self.metrics.gauge("recording_records_dropped", "Records dropped from the current recording",
+                           fn=lambda: self.record_file.records_dropped if self.record_file else 0)
+
+    @property
+    def stream(self):
+        """LSL stream of the active session"""
+        return self.active_session.stream if self.active_session else None
+
+    @property
+    def device_info(self):
+        """Device of the active session"""
+        return self.active_session.device_info if self.active_session else None
+
     def add_conn_menu_on_toolbar(self, toolbar):
         """Add connection menu"""
         connect_menu = QtWidgets.QMenu("🎧", toolbar)
@@ -110,6 +93,29 @@ class EEGStreamManager:
             lambda: self.connect_eeg_stream(DeviceInfoDatabase.TGMA))
         connect_menu.addAction("* FlexoLink (via FlexoTool)").triggered.connect(
             lambda: self.connect_eeg_stream(DeviceInfoDatabase.FLEXOLINK))
+
+        # Multi-channel profiles: indicators compute all channels, each dock picks the one it shows
+        connect_menu.addSeparator()
+        connect_menu.addAction("* Muse 2016, all channels").triggered.connect(
+            lambda: self.connect_eeg_stream(DeviceInfoDatabase.MUSE_ALL))
+        connect_menu.addAction("* LSL Player, all channels").triggered.connect(
+            lambda: self.connect_eeg_stream(DeviceInfoDatabase.PLAYER_ALL))
+        connect_menu.addAction("* TGMA, all channels").triggered.connect(
+            lambda: self.connect_eeg_stream(DeviceInfoDatabase.TGMA_ALL))
+        connect_menu.addAction("* FlexoLink, all channels").triggered.connect(
+            lambda: self.connect_eeg_stream(DeviceInfoDatabase.FLEXOLINK_ALL))
+
+        # Streams currently on the network, with their metadata (refreshed in the background)
+        connect_menu.addSeparator()
+        self.discovered_menu = connect_menu.addMenu("Discovered Streams")
+        connect_menu.aboutToShow.connect(self.rebuild_discovered_menu)
+
+        # Several streams can be connected; new indicators and recordings use the active one
+        connect_menu.addSeparator()
+        self.active_stream_menu = connect_menu.addMenu("Active Stream")
+        self.active_stream_group = QtGui.QActionGroup(self.active_stream_menu)
+        connect_menu.addAction("Disconnect Active Stream").triggered.connect(
+            lambda: self.disconnect_stream(self.active_session))
         connect_button = GUI_Utils.transform_menu_to_toolbutton("🔗", connect_menu)
         toolbar.addWidget(connect_button)
 
@@ -120,225 +126,373 @@ class EEGStreamManager:
         self.record_channel_action = record_menu.addAction("Current Channel")
         self.record_channel_action.triggered.connect(self.record_current_channel)
 
-        # self.record_stream_action = record_menu.addAction("Whole Stream")
-        # self.record_stream_action.triggered.connect(self.record_whole_stream)
+        self.record_stream_action = record_menu.addAction("Whole Stream")
+        self.record_stream_action.triggered.connect(self.record_whole_stream)
+
+        record_menu.addSeparator()
+        self.record_compressed_action = record_menu.addAction("Compressed Format (.csig)")
+        self.record_compressed_action.setCheckable(True)
+        self.record_compressed_action.toggled.connect(self.set_record_format)
         
         self.record_button = GUI_Utils.transform_menu_to_toolbutton("🔴", record_menu)
         toolbar.addWidget(self.record_button)
 
+    def set_record_format(self, compressed):
+        """Select the format of the next recording: EDF+ or the compact .csig format"""
+        self.record_writer_class = CompressedRecordWriter if compressed else EDFRecordWriter
+
     def record_current_channel(self):
         """Handle recording of the current selected channel"""
-        if self.recording:
-            # stop recording
-            self.recording = False
-            self.record_button.setText("🔴")
-            # self.log_message("Recording stopped")
-            self.log_message("Recording stopped")
-            self.close_recording_file()
-        else:
-            if not self.stream:
-                self.log_message("Please connect stream before recording")
-                return
-
-            # start recording
-            self.recording = True
-            self.record_button.setText("🟥")
-            self.record_channel_action.setText("Current Channel")  
-            self.open_recording_file()
-            self.log_message(
-                f"Recording channels {self.device_info.channel_picks} to {self.record_file_name}")
+        self.toggle_recording(whole_stream=False)
 
     def record_whole_stream(self):
-        """Handle 'record whole stream' option"""
-        title = "To Be Implemented"
-        text = "Your contribution to the source repository is more than welcome!"
-        QtWidgets.QMessageBox.information(None, title, text)
+        """Handle 'record whole stream' option: every channel of the connected stream, including CPz"""
+        self.toggle_recording(whole_stream=True)
 
-    def open_recording_file(self):
-        """Open an EDF+ file for recording"""
+    def toggle_recording(self, whole_stream):
+        """Start a recording, or stop the running one"""
+        if self.recording:
+            self.stop_recording()
+            return
+
+        if not self.active_session:
+            self.log_message("Please connect stream before recording")
+            return
+
+        self.record_session = self.active_session
+        if whole_stream:
+            self.record_channel_names = list(self.record_session.stream.ch_names)
+            self.record_rows = slice(None)  # Acquired data already holds all channels
+        else:
+            self.record_channel_names = list(self.record_session.device_info.channel_picks)
+            self.record_rows = self.record_session.pick_rows
+
+        # start recording
+        self.recording = True
+        self.record_button.setText("🟥")
+        self.open_recording_file(whole_stream)
+        self.log_message(
+            f"Recording channels {self.record_channel_names} to {self.record_file_name}")
+
+    def stop_recording(self):
+        """Stop the running recording"""
+        self.recording = False
+        self.record_button.setText("🔴")
+        self.log_message("Recording stopped")
+        self.close_recording_file()
+        self.record_session = None
+
+    def open_recording_file(self, whole_stream=False):
+        """Open an EDF+ (or .csig) file for recording"""
         # Create data_recorded directory if not exists
         os.makedirs("./data_recorded", exist_ok=True)
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.record_file_name = f"./data_recorded/{self.device_info.name}_case_{timestamp}.edf"
-        channel_names = self.device_info.channel_picks
-        channel_count = len(channel_names)
-        sample_rate = self.device_info.sample_freq
-
-        # Create EDF+ file
-        self.record_file = pyedflib.EdfWriter(self.record_file_name, channel_count, file_type=pyedflib.FILETYPE_EDFPLUS)
-
-        # Reset write count and first write time for new recording
-        self.write_count = 0
-        self.first_write_time = time.time()
-        self.total_written_samples = 0
-
-        # Set signal parameters
-        signal_headers = []
-        for i in range(channel_count):
-            signal_headers.append({
-                'label': channel_names[i] if channel_names[i] else f"Channel_{i}",
-                'dimension': 'uV',
-                'sample_frequency': sample_rate,  # Changed from 'sample_rate' to 'sample_frequency'
-                'physical_min': -327.68*2,
-                'physical_max': 327.67*2,
-                'digital_min': -32768,
-                'digital_max': 32767,
-                'prefilter': '',
-                'transducer': ''
-            })
-        self.record_file.setSignalHeaders(signal_headers)
-        # Initialize buffer with proper dimensions
-        self.data_buffer = np.empty((channel_count, 0))
+        scope = "_stream" if whole_stream else ""
+        device_info = self.record_session.device_info
+        self.record_file_name = f"./data_recorded/{device_info.name}{scope}_case_{timestamp}{self.record_writer_class.file_ext}"
+        sample_rate = device_info.sample_freq
+        signal_headers = RecordWriter.make_signal_headers(self.record_channel_names, sample_rate)
 
-    def check_newdata_and_process(self):
-        """Periodically update the display and save the latest data"""
-        try:
-            if self.stream.n_new_samples < 1:
-                return
+        # Create the file; records are written by a background thread
+        self.record_file = self.record_writer_class(
+            self.record_file_name, signal_headers, sample_rate,
+            batch_secs=self.LOW_POWER_WRITE_BATCH_SECS if self.low_power else 0)
+        self.next_write_report = 10
 
-            data, _ = self.get_new_data_from_stream()
+        # Samples go from the acquisition thread straight to the writer, independent of the GUI
+        self.record_session.acquisition.set_recorder(self.record_file, self.record_rows)
 
-            if data is None:
-                return
-
-            if self.debug_mode:
-                samples_this_call = data.shape[1]  # Get number of samples in this call
-                self.debug_sample_counter += samples_this_call
-
-                # Calculate time difference
-                current_time = time.time()
-                if current_time - self.debug_last_print_time >= 1.0:
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    print(f"DEBUG:[{timestamp}] Received samples/s: {self.debug_sample_counter}")
-                    self.debug_sample_counter = 0
-                    self.debug_last_print_time = current_time
-
-            # Keep original data processing logic
-            selected_channel_data = data
-            for handler in self.main_window.loaded_indicators:
-                handler.process_new_data_and_update_plot(selected_channel_data)
-
-            if self.recording and self.record_file:
-                self.save_data_to_file(data)
-        except Exception as e:
-            traceback.print_exc()
-            self.log_message("failed to process new data")
-
-    def save_data_to_file(self, data):
-        # Check if data_buffer is None and initialize if needed 
-        # although numpy 1.x don't need below part of code, but numpy 2.x needs it
-        if self.data_buffer is None:
-            channel_count = len(self.device_info.channel_picks)
-            self.data_buffer = np.empty((channel_count, 0))
-            self.write_count = 0
-            self.first_write_time = time.time()
-            
-        """Save data to an EDF+ file"""
-        # Add new data to buffer
-        self.data_buffer = np.hstack((self.data_buffer, data))
-        
-        required_samples = self.device_info.sample_freq
-        if self.data_buffer.shape[1] >= required_samples:
-            # Extract data for 1 second
-            data_to_write = self.data_buffer[:, :required_samples]
-            self.data_buffer = self.data_buffer[:, required_samples:]
-            
-            # Convert to microvolts and write to file
-            sample_list = [data_to_write[i, :] for i in range(data_to_write.shape[0])]
-            self.record_file.writeSamples(sample_list)
-
-            # Update total written samples
-            self.total_written_samples += data_to_write.shape[1]
-            # Update write count and calculate sample rate every 10 writes
-            self.write_count += 1
-            # Fallback: ensure first_write_time is set
-            if self.first_write_time is None:
-                self.first_write_time = time.time()
-            if self.write_count % 10 == 0:
-                elapsed_time = time.time() - self.first_write_time
-                sample_rate = self.total_written_samples / elapsed_time
-                self.log_message(f"Write sampling rate: {sample_rate:.2f} samples/sec")
+    def check_newdata_and_process(self):
+        """
+        Periodically update the display and save the latest data.
+        One timer serves every session: a tick costs one ring read per stream, plus the work of the
+        indicators bound to streams that actually delivered data. Acquisition and recording run in
+        each session's acquisition thread, so a late tick only delays the plots.
+        """
+        tick_start = time.perf_counter()
+        self.add_opened_streams()
+
+        for session in list(self.sessions.values()):
+            try:
+                new_data = session.get_new_data()
+                if new_data is None:
+                    continue
+                # Indicators get the picked channels
+                session.dispatch(*new_data)
+            except Exception as e:
+                traceback.print_exc()
+                self.log_message(f"failed to process new data of {session.name}")
+
+        if self.debug_mode:
+            current_time = time.time()
+            if current_time - self.debug_last_print_time >= 1.0:
+                timestamp = datetime.now().strftime("%H:%M:%S")
+                for session in self.sessions.values():
+                    print(f"DEBUG:[{timestamp}] {session.name} received samples/s: {session.acquisition.samples_per_sec:.1f}")
+                self.debug_last_print_time = current_time
+
+        if time.time() >= self.next_status_update:
+            self.next_status_update = time.time() + 1.0
+            self.update_stream_status()
+
+        if self.recording and self.record_file:
+            self.check_recording()
+        if self.closing_files:
+            self.check_closing_files()
+
+        self.tick_duration.observe(time.perf_counter() - tick_start)
+
+    def check_recording(self):
+        """Surface writer errors and report throughput (the data itself never passes through here)"""
+        if self.record_file.error is not None:
+            self.log_message(f"Recording write failed: {self.record_file.error}")
+            self.stop_recording()
+            return
+
+        # Report throughput and lag every 10 written records
+        if self.record_file.records_written >= self.next_write_report:
+            self.next_write_report += 10
+            stats = self.record_file.get_stats()
+            self.log_message(
+                f"Write sampling rate: {stats['write_rate']:.2f} samples/sec, "
+                f"writer lag: {stats['lag_secs']:.2f}s (max {stats['max_lag_secs']:.2f}s), "
+                f"queued: {stats['queue_depth']}, dropped: {stats['records_dropped']}")
 
     def close_recording_file(self):
-        """Close the EDF+ file"""
+        """Close the recording file"""
         if self.record_file:
-            self.record_file.close()
-            self.record_file = None
+            self.record_session.acquisition.set_recorder(None)
 
             # Get the current timestamp and generate a new file name
             end_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             base_name, ext = os.path.splitext(self.record_file_name)  # Split file name and extension
             new_file_name = f"{base_name}_to_{end_timestamp}{ext}"
 
-            # Rename the file
-            os.rename(self.record_file_name, new_file_name)
-
-            # Update the file name and display the status
+            # The writer thread flushes the queued records, closes and renames the file;
+            # the outcome is reported once it is done (check_closing_files)
+            self.record_file.close(rename_to=new_file_name)
+            self.closing_files.append(self.record_file)
+            self.record_file = None
             self.record_file_name = new_file_name
-            self.log_message(f"Data saved: {self.record_file_name}")
-
-    def connect_eeg_stream(self, deviceInfo):
-        """Connect to an EEG data stream"""
-        self.device_info = deviceInfo
-        real_freq = deviceInfo.sample_freq
-        
-        # read YAML config file
-        config_path = Path(__file__).parent / 'indicators/indicator_global_config.yaml'
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-        
-        indicator_cfg_freq = config['STREAM']['sample_freq']
-
-        if real_freq != indicator_cfg_freq:
-            # update config
-            config['STREAM']['sample_freq'] = real_freq
-            
-            # write to YAML file
-            with open(config_path, 'w') as f:
-                yaml.dump(config, f, sort_keys=False)
-                
-            self.log_message(f" indicator_global_config.yaml updated: {real_freq}Hz")
-            QtCore.QCoreApplication.processEvents() # make sure the message is displayed
-            indicator_cfg_freq = real_freq
-
-        try:
-            stream_list = resolve_streams(stype='EEG') + resolve_streams(stype='eeg')
-            if not stream_list:
-                self.log_message("No stream found")
+            self.log_message(f"Saving {self.record_file_name}...")
+
+    def check_closing_files(self, wait=False):
+        """
+        Report the recordings whose writer thread finished their file: saved, or the error.
+        :param wait: Wait for the files still being finished (on exit).
+        """
+        for writer in list(self.closing_files):
+            if not (writer.wait() if wait else writer.finished):
+                continue
+            self.closing_files.remove(writer)
+            if writer.error is not None:
+                self.log_message(f"Saving {writer.file_name} failed: {writer.error}")
+            else:
+                self.log_message(f"Data saved: {writer.file_name}")
+
+    def update_indicator_sample_freq(self, real_freq):
+        """
+        Make indicators created from now on (and loaded ones not fed by a stream yet) use `real_freq`.
+        Changed in the in-memory indicator config only: indicator_global_config.yaml keeps its default.
+        """
+        if self.main_window.indicator_registry.config.set_sample_freq(real_freq):
+            self.log_message(f"indicator sample rate: {real_freq}Hz")
+
+    def rebuild_discovered_menu(self):
+        """List the cached streams; connected ones are checked"""
+        self.discovered_menu.clear()
+        connected = set(self.sessions)
+        for sinfo in self.discovery.get_streams():
+            rate = f"{sinfo.sfreq:g} Hz" if sinfo.sfreq > 0 else "irregular rate, not supported"
+            action = self.discovered_menu.addAction(
+                f"{sinfo.name} — {rate}, {sinfo.n_channels} ch ({sinfo.stype}, {sinfo.hostname})")
+            action.setCheckable(True)
+            action.setChecked(StreamDiscovery.identity(sinfo) in connected)
+            # Indicators and recordings need a nominal rate: irregular streams cannot be connected
+            action.setEnabled(not action.isChecked() and sinfo.sfreq > 0)
+            # All EEG channels of the stream (resolved stream infos carry no channel names to match a profile)
+            action.triggered.connect(lambda checked, sinfo=sinfo: self.connect_eeg_stream(
+                DeviceInfo(None, sinfo.sfreq, sinfo.name), sinfo))
+        if self.discovered_menu.isEmpty():
+            self.discovered_menu.addAction("(searching...)").setEnabled(False)
+        self.discovered_menu.addSeparator()
+        self.discovered_menu.addAction("Refresh").triggered.connect(self.discovery.refresh)
+
+    def find_stream_for_device(self, deviceInfo):
+        """Cached stream to connect for a device: not connected yet, regular, preferably at the device's sample rate"""
+        busy = set(self.sessions) | self.connecting
+        stream_list = [sinfo for sinfo in self.discovery.get_streams()
+                       if StreamDiscovery.identity(sinfo) not in busy and sinfo.sfreq > 0]
+        return next((sinfo for sinfo in stream_list if sinfo.sfreq == deviceInfo.sample_freq),
+                    stream_list[0] if stream_list else None)
+
+    def connect_eeg_stream(self, deviceInfo, sinfo=None, attempts_left=5):
+        """
+        Connect to an EEG data stream (in addition to the already connected ones).
+        :param deviceInfo: Device profile; channel_picks=None takes all EEG channels of the stream.
+        :param sinfo: Cached StreamInfo to connect, default: a matching stream from discovery.
+        :param attempts_left: Retries (1 s apart, without blocking the GUI) while discovery finds no stream.
+        """
+        if sinfo is None:
+            sinfo = self.find_stream_for_device(deviceInfo)
+            if sinfo is None:
+                if attempts_left > 0:
+                    self.discovery.refresh()
+                    self.log_message("Searching for streams...")
+                    QtCore.QTimer.singleShot(1000, lambda: self.connect_eeg_stream(deviceInfo, None, attempts_left - 1))
+                else:
+                    self.log_message("No stream found" if not self.sessions else "No other stream found")
                 return
 
-            sinfo = stream_list[0]
-            self.stream = StreamLSL(bufsize=1, name=sinfo.name, stype=sinfo.stype, source_id=sinfo.source_id)
-            self.stream.connect()
-            self.stream.pick("eeg")
-
-            assert "CPz" not in self.stream.ch_names  
-            self.stream.add_reference_channels("CPz")
+        identity = StreamDiscovery.identity(sinfo)
+        if identity in self.connecting or identity in self.sessions:
+            self.log_message(f"{sinfo.name} is already connected")
+            return
 
+        # Opening the inlet (LSL handshake, clock sync) takes about a second: do it off the GUI thread
+        self.connecting.add(identity)
+        self.log_message(f"connecting to {sinfo.name}...")
+        threading.Thread(target=self.open_stream, args=(deviceInfo, sinfo), name="OpenStream", daemon=True).start()
+        if self.timer is None:
             self.start_timer()
-            self.log_message(f"connected to {deviceInfo.channel_picks}")
 
+    def open_stream(self, deviceInfo, sinfo):
+        """Worker thread: open the cached stream, then hand it to the GUI thread through opened_streams"""
+        try:
+            deviceInfo, stream = open_lsl_stream(deviceInfo, sinfo)
+            self.opened_streams.put((deviceInfo, sinfo, stream, None))
         except Exception as e:
-            traceback.print_exc()
-            self.log_message("stream connection failed")
-
-    def disconnect_stream(self):
-        """Disconnect the EEG data stream"""
-        if self.stream:
-            self.stream.disconnect()
+            self.opened_streams.put((deviceInfo, sinfo, None, e))
+
+    def add_opened_streams(self):
+        """GUI thread: start a session for every stream opened since the last tick"""
+        while True:
+            try:
+                deviceInfo, sinfo, stream, error = self.opened_streams.get_nowait()
+            except queue.Empty:
+                return
+            self.connecting.discard(StreamDiscovery.identity(sinfo))
+
+            try:
+                if error is not None:
+                    raise error
+                session = StreamSession(deviceInfo, stream, sinfo, self.metrics,
+                                        taken_names={s.name for s in self.sessions.values()})
+                self.sessions[session.identity] = session
+                self.apply_power_mode(session)
+
+                # Indicators loaded before any stream was connected start with this one
+                for handler in self.unbound_indicators:
+                    self.bind_indicator(handler, session)
+                self.unbound_indicators.clear()
+
+                self.set_active_session(session)
+                self.log_message(f"connected to {session.name} {deviceInfo.channel_picks}")
+
+            except Exception as e:
+                traceback.print_exception(e)
+                self.discovery.refresh()  # The cached stream may be gone
+                self.log_message("stream connection failed")
+
+    def set_active_session(self, session):
+        """Select the stream used by indicators loaded from now on and by new recordings"""
+        self.active_session = session
+        if session is not None:
+            self.update_indicator_sample_freq(session.device_info.sample_freq)
+        self.rebuild_active_stream_menu()
+
+    def rebuild_active_stream_menu(self):
+        self.active_stream_menu.clear()
+        for session in self.sessions.values():
+            action = self.active_stream_menu.addAction(session.name)
+            action.setCheckable(True)
+            action.setChecked(session is self.active_session)
+            action.setActionGroup(self.active_stream_group)
+            action.triggered.connect(lambda checked, session=session: self.set_active_session(session))
+
+    def bind_indicator(self, handler, session=None):
+        """
+        Feed an indicator from a stream (default: the active one).
+        Without any connected stream, it is bound to the next stream that connects.
+        """
+        session = session or self.active_session
+        handler.fed_by_stream = session is not None
+        if session is None:
+            self.unbound_indicators.append(handler)
+            return
+        handler.set_sample_freq(session.device_info.sample_freq)  # Buffers sized for this stream's rate
+        session.indicators.append(handler)
+        self.main_window.on_indicator_bound(handler, session)
+
+    def session_of(self, handler):
+        """Session feeding an indicator, None while it waits for a stream"""
+        return next((session for session in self.sessions.values() if handler in session.indicators), None)
+
+    def unbind_indicator(self, handler):
+        handler.fed_by_stream = False
+        for session in self.sessions.values():
+            if handler in session.indicators:
+                session.indicators.remove(handler)
+        if handler in self.unbound_indicators:
+            self.unbound_indicators.remove(handler)
+
+    def disconnect_stream(self, session=None):
+        """Disconnect one EEG data stream, or all of them"""
+        sessions = list(self.sessions.values()) if session is None else [session]
+        for session in sessions:
+            if session is None or self.sessions.get(session.identity) is not session:
+                continue
+            if self.recording and session is self.record_session:
+                self.stop_recording()
+            session.disconnect()
+            del self.sessions[session.identity]
+            self.metrics.remove(stream=session.name)
+
+            # Its indicators wait for the next connected stream, and adapt to its rate when bound to it
+            for handler in session.indicators:
+                handler.fed_by_stream = False
+            self.unbound_indicators.extend(session.indicators)
+            session.indicators.clear()
+            self.log_message(f"disconnected from {session.name}")
+
+        if self.active_session not in self.sessions.values():
+            self.set_active_session(next(iter(self.sessions.values()), None))
+        self.update_stream_status()
+
+    def update_stream_status(self):
+        self.stream_status_label.setText(" | ".join(session.status_text() for session in self.sessions.values()))
+
+    def get_stream_stats(self):
+        """Throughput counters of every connected stream: {session name: stats}"""
+        return {session.name: session.get_stats() for session in self.sessions.values()}
 
     def start_timer(self):
         """Start a timer"""
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self.check_newdata_and_process)
-        self.timer.start(50)  # Update every 50 ms
+        self.timer.start(self.current_tick_interval_ms())  # Acquisition does not depend on it; plots are drawn by the render scheduler
+
+    def current_tick_interval_ms(self):
+        return int(1000 / self.LOW_POWER_TICK_HZ) if self.low_power else self.tick_interval_ms
+
+    def set_low_power(self, enabled):
+        """
+        Low-power mode: indicators are fed once a second in larger chunks, acquisition threads pull less
+        often (the LSL inlet buffers meanwhile) and the recording is written in large batches.
+        No sample is lost; only latency grows.
+        """
+        self.low_power = enabled
+        if self.timer:
+            self.timer.setInterval(self.current_tick_interval_ms())
+        for session in self.sessions.values():
+            self.apply_power_mode(session)
+        if self.record_file:
+            self.record_file.batch_secs = self.LOW_POWER_WRITE_BATCH_SECS if enabled else 0
+        self.log_message(f"Low-power mode {'on' if enabled else 'off'}")
 
-    def get_new_data_from_stream(self):
-        """Get data from all channels in the EEG stream"""
-        secs_for_new_data = self.stream.n_new_samples / self.device_info.sample_freq
-        data = self.stream.get_data(winsize=secs_for_new_data, picks=self.device_info.channel_picks)  # picks=None means all channels
-        return data
+    def apply_power_mode(self, session):
+        session.acquisition.pull_interval = self.LOW_POWER_PULL_SECS if self.low_power else 0.0
 
     def get_selected_channel_data(self, data):
         """Extract data from the selected channel"""
@@ -0,0 +1,115 @@
+import collections
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
+from pyqtgraph.Qt import QtCore
+
+
+class StallWatchdog:
+    """
+    GUI event-loop stall detector.
+    A QTimer on the GUI thread beats every `beat_interval`; a watchdog thread notices when the beats stop
+    for longer than `threshold_secs` and samples the GUI thread's stack while the stall lasts. When the
+    loop resumes, the stall (duration, module that was executing, stack) is logged and passed to `on_stall`
+    on the GUI thread.
+    """
+
+    def __init__(self, on_stall=None, threshold_secs=0.2, beat_interval=0.05, max_samples=20):
+        """
+        Create on the GUI thread.
+        :param on_stall: Called on the GUI thread with each stall (dict: duration, module, where, stack).
+        :param threshold_secs: Event-loop latency above which the loop is considered stalled.
+        :param beat_interval: Heartbeat period; also bounds the precision of the measured durations.
+        :param max_samples: Stack samples kept per stall.
+        """
+        self.on_stall = on_stall
+        self.threshold_secs = threshold_secs
+        self.beat_interval = beat_interval
+        self.max_samples = max_samples
+        self.module_labels = {}  # {normalized source path: label} of the modules stalls are attributed to
+        self.stall_count = 0
+
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stalls = queue.SimpleQueue()  # Finished stalls, drained on the GUI thread
+
+        self._beat_timer = QtCore.QTimer()
+        self._beat_timer.setInterval(int(beat_interval * 1000))
+        self._beat_timer.timeout.connect(self._beat)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._watch_loop, name="StallWatchdog", daemon=True)
+
+    def set_intervals(self, threshold_secs, beat_interval):
+        """Change the stall threshold and heartbeat period, e.g. to wake up less often in low-power mode"""
+        self.threshold_secs = threshold_secs
+        self.beat_interval = beat_interval
+        self._beat_timer.setInterval(int(beat_interval * 1000))
+
+    def watch_module(self, label, path):
+        """Attribute stalls spent in (or below) the module at `path` to `label`"""
+        self.module_labels[os.path.normcase(os.path.abspath(path))] = label
+
+    def unwatch_module(self, path):
+        self.module_labels.pop(os.path.normcase(os.path.abspath(path)), None)
+
+    def start(self):
+        self._last_beat = time.monotonic()
+        self._beat_timer.start()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._beat_timer.stop()
+        self._stop_event.set()
+
+    def _beat(self):
+        """GUI thread: the event loop is alive; report the stalls that ended"""
+        self._last_beat = time.monotonic()
+        while not self._stalls.empty():
+            stall = self._stalls.get()
+            self.stall_count += 1
+            logging.warning(f"GUI stalled {stall['duration'] * 1000:.0f} ms in {stall['module'] or 'Qt / rendering'}"
+                            f" ({stall['where']})" + (f"\n{stall['stack']}" if stall['stack'] else ""))
+            if self.on_stall:
+                self.on_stall(stall)
+
+    def _watch_loop(self):
+        stall_beat = None  # Last beat before the current stall
+        samples = []
+        while not self._stop_event.wait(min(self.beat_interval, self.threshold_secs / 4)):
+            beat = self._last_beat
+            if stall_beat is not None and beat != stall_beat:  # The loop resumed
+                self._stalls.put(self._summarize(beat - stall_beat, samples))
+                stall_beat, samples = None, []
+            elif time.monotonic() - beat > self.threshold_secs:
+                stall_beat = beat
+                if len(samples) < self.max_samples:
+                    samples.append(self._sample_gui_stack())
+
+    def _sample_gui_stack(self):
+        """(module label or None, stack) of what the GUI thread is executing right now"""
+        frame = sys._current_frames().get(self._gui_thread_id)
+        stack = traceback.extract_stack(frame) if frame is not None else traceback.StackSummary()
+        # Innermost watched module first: helpers called by an indicator resolve to that indicator
+        for entry in reversed(stack):
+            label = self.module_labels.get(os.path.normcase(os.path.abspath(entry.filename)))
+            if label:
+                return label, stack
+        return None, stack
+
+    @staticmethod
+    def _summarize(duration, samples):
+        """Stall record: the module seen in most stack samples, and one of its stacks"""
+        if not samples:  # Resumed between two polls
+            return {"duration": duration, "module": None, "where": "?", "stack": ""}
+        module = collections.Counter(label for label, _ in samples).most_common(1)[0][0]
+        stack = next(stack for label, stack in samples if label == module)
+        innermost = stack[-1] if stack else None
+        where = f"{os.path.basename(innermost.filename)}:{innermost.lineno} {innermost.name}" if innermost else "?"
+        return {"duration": duration, "module": module, "where": where,
+                "stack": "".join(traceback.format_list(stack[-10:])).rstrip()}
@@ -0,0 +1,286 @@
+import argparse
+import csv
+import logging
+import os
+import signal
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from GUIComp_Acquisition import DeviceInfoDatabase, StreamDiscovery, StreamSession, open_lsl_stream
+from GUIComp_IndicatorRegistry import IndicatorRegistry
+from GUIComp_Metrics import MetricsHTTPServer, MetricsRegistry
+from GUIComp_Recording import RecordWriter, EDFRecordWriter, CompressedRecordWriter
+
+
+INDICATORS_DIR = Path(__file__).parent / "indicators"
+
+
+class IndicatorResultWriter:
+    """
+    CSV output of one indicator, fed through its result_sink: one row per channel and result, with the
+    wall-clock time, the LSL time of the newest acquired sample, and the indicator's latest_results().
+    """
+
+    def __init__(self, file_name, channel_names, lsl_clock):
+        """
+        :param lsl_clock: Callable returning the LSL timestamp of the newest acquired sample.
+        """
+        self.file_name = file_name
+        self.channel_names = channel_names
+        self.lsl_clock = lsl_clock
+        self.file = open(file_name, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.columns = None  # Written as the header with the first result
+        self.results_written = 0
+
+    def write(self, handler):
+        # Nothing draws in headless mode: results are consumed here instead of by the render scheduler
+        handler.pending_updates = 0
+        results = handler.latest_results()
+        if results is None:
+            return
+        if self.columns is None:
+            self.columns = list(results)
+            self.writer.writerow(["time", "lsl_time", "channel"] + self.columns)
+
+        now = datetime.now().isoformat(timespec="seconds")
+        lsl_time = self.lsl_clock()
+        for row, channel in enumerate(self.channel_names):
+            values = [results[column][row] for column in self.columns]
+            self.writer.writerow([now, f"{lsl_time:.3f}", channel]
+                                 + [f"{v:.6g}" if isinstance(v, np.floating) else v for v in values])
+        self.results_written += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class HeadlessRecorder:
+    """
+    Unattended recording and indicator computation without Qt or pyqtgraph.
+    Connects to the LSL stream of a device profile, records it with the asynchronous writer, feeds the
+    selected indicators' computation (e.g. sleep staging, band ratios) and writes their results to CSV.
+    Progress goes to the log; metrics to a file (Prometheus text or JSON) and optionally over HTTP.
+
+    One thread wakes up once per tick to hand new data to the indicators. Like the GUI's low-power mode,
+    acquisition pulls the inlet a few times per second and the recording is written in batches.
+    """
+    STATUS_INTERVAL_SECS = 60  # Log line and CSV flush
+    METRICS_INTERVAL_SECS = 10  # Metrics file rewrite
+
+    def __init__(self, device_info, indicator_files, output_dir="./data_recorded",
+                 record_writer_class=EDFRecordWriter, whole_stream=False, tick_secs=1.0,
+                 pull_interval=0.25, write_batch_secs=20, metrics_file=None, metrics_port=None):
+        """
+        :param device_info: DeviceInfoDatabase profile of the stream to record.
+        :param indicator_files: Indicator files (in ./indicators) to compute, e.g. "sleep_EmbSleepNet⭐.py".
+        :param whole_stream: Record every channel of the stream instead of the profile's picks.
+        :param tick_secs: Seconds between hand-overs of new data to the indicators.
+        :param pull_interval: Minimum seconds between LSL inlet pulls (see StreamAcquisition).
+        :param write_batch_secs: Seconds of recording written per batch (see RecordWriter).
+        :param metrics_file: Path rewritten with the metrics every METRICS_INTERVAL_SECS (*.json: JSON).
+        :param metrics_port: Also serve the metrics on localhost at this port.
+        """
+        self.device_info = device_info
+        self.indicator_files = indicator_files
+        self.output_dir = output_dir
+        self.record_writer_class = record_writer_class
+        self.whole_stream = whole_stream
+        self.tick_secs = tick_secs
+        self.pull_interval = pull_interval
+        self.write_batch_secs = write_batch_secs
+        self.metrics_file = metrics_file
+        self.metrics_port = metrics_port
+
+        self.metrics = MetricsRegistry()
+        self.session: StreamSession = None
+        self.case_stem = None  # Output path prefix shared by the recording and the indicator results
+        self.record_file: RecordWriter = None
+        self.record_file_name = None
+        self.result_writers = {}  # {indicator file name: IndicatorResultWriter}
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """Finish the session; safe to call from a signal handler or another thread"""
+        self._stop_event.set()
+
+    def run(self, duration_secs=None):
+        """Record until stop(), a fatal error, or `duration_secs`"""
+        metrics_server = MetricsHTTPServer(self.metrics, self.metrics_port).start() if self.metrics_port else None
+        if metrics_server:
+            logging.info(f"Serving metrics on {metrics_server.address}")
+        try:
+            if not self.connect():
+                return
+            self.start_indicators()
+            self.start_recording()
+            self.process_until_stopped(duration_secs)
+        finally:
+            self.shutdown()
+            if metrics_server:
+                metrics_server.stop()
+
+    def connect(self):
+        """Wait for a stream of the device (preferably at its sample rate) and open it"""
+        discovery = StreamDiscovery().start()
+        try:
+            next_log = 0.0
+            while not self._stop_event.is_set():
+                streams = [s for s in discovery.get_streams() if s.sfreq > 0]  # Irregular streams are not supported
+                sinfo = next((s for s in streams if s.sfreq == self.device_info.sample_freq),
+                             streams[0] if streams else None)
+                if sinfo is not None:
+                    break
+                if time.monotonic() >= next_log:
+                    next_log = time.monotonic() + 10
+                    logging.info(f"Waiting for an EEG stream for {self.device_info.name}...")
+                self._stop_event.wait(1.0)
+            else:
+                return False
+        finally:
+            discovery.stop()
+
+        device_info, stream = open_lsl_stream(self.device_info, sinfo)
+        self.device_info = device_info
+        self.session = StreamSession(device_info, stream, sinfo, self.metrics)
+        self.session.acquisition.pull_interval = self.pull_interval
+        logging.info(f"Connected to {self.session.name} {device_info.channel_picks}")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        scope = "_stream" if self.whole_stream else ""
+        self.case_stem = os.path.join(
+            self.output_dir, f"{device_info.name}{scope}_case_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        return True
+
+    def start_indicators(self):
+        registry = IndicatorRegistry(INDICATORS_DIR)
+        registry.config.set_sample_freq(self.device_info.sample_freq)  # In memory: the YAML file is not rewritten
+
+        channel_names = self.device_info.channel_picks
+        for file_name in self.indicator_files:
+            handler = registry.create(file_name)
+            handler.set_channel_names(channel_names)
+            handler.render_deferred = True  # No plot: mark_dirty() never draws
+
+            writer = IndicatorResultWriter(f"{self.case_stem}_{Path(file_name).stem}.csv", channel_names,
+                                           lambda: self.session.acquisition.last_timestamp or 0.0)
+            handler.result_sink = writer.write
+            self.result_writers[file_name] = writer
+            self.metrics.counter("indicator_results_total", "Results written by the indicator",
+                                 fn=lambda writer=writer: writer.results_written, indicator=Path(file_name).stem)
+            self.session.indicators.append(handler)
+            logging.info(f"Computing {file_name} -> {writer.file_name}")
+
+    def start_recording(self):
+        if self.whole_stream:
+            channel_names, rows = list(self.session.stream.ch_names), slice(None)
+        else:
+            channel_names, rows = list(self.device_info.channel_picks), self.session.pick_rows
+        self.record_file_name = self.case_stem + self.record_writer_class.file_ext
+        self.record_file = self.record_writer_class(
+            self.record_file_name, RecordWriter.make_signal_headers(channel_names, self.device_info.sample_freq),
+            self.device_info.sample_freq, batch_secs=self.write_batch_secs)
+        self.session.acquisition.set_recorder(self.record_file, rows)
+
+        record_file = self.record_file
+        self.metrics.gauge("recording_queue_depth", "Records waiting for the writer thread",
+                           fn=lambda: record_file.queue_depth)
+        self.metrics.gauge("recording_records_written", "Records written to the current recording",
+                           fn=lambda: record_file.records_written)
+        self.metrics.gauge("recording_records_dropped", "Records dropped from the current recording",
+                           fn=lambda: record_file.records_dropped)
+        logging.info(f"Recording channels {channel_names} to {self.record_file_name}")
+
+    def process_until_stopped(self, duration_secs):
+        tick_duration = self.metrics.histogram("headless_tick_seconds", "Duration of one data hand-over to the indicators")
+        end_time = time.monotonic() + duration_secs if duration_secs else None
+        next_status = time.monotonic() + self.STATUS_INTERVAL_SECS
+        next_metrics = time.monotonic()
+
+        while not self._stop_event.wait(self.tick_secs):
+            tick_start = time.perf_counter()
+            new_data = self.session.get_new_data()
+            if new_data is not None:
+                self.session.dispatch(*new_data)
+            tick_duration.observe(time.perf_counter() - tick_start)
+
+            now = time.monotonic()
+            if self.record_file.error is not None:
+                logging.error(f"Recording write failed: {self.record_file.error}")
+                break
+            if self.session.acquisition.error is not None:
+                break  # Already logged by the acquisition thread
+            if now >= next_metrics:
+                next_metrics = now + self.METRICS_INTERVAL_SECS
+                self.write_metrics()
+            if now >= next_status:
+                next_status = now + self.STATUS_INTERVAL_SECS
+                self.log_status()
+            if end_time is not None and now >= end_time:
+                break
+
+    def log_status(self):
+        stats = self.record_file.get_stats()
+        logging.info(f"{self.session.status_text()} | recorded {stats['records_written']} records, "
+                     f"dropped {stats['records_dropped']}, queued {stats['queue_depth']} | "
+                     + ", ".join(f"{Path(name).stem}: {w.results_written}" for name, w in self.result_writers.items()))
+        for writer in self.result_writers.values():
+            writer.flush()
+
+    def write_metrics(self):
+        if self.metrics_file:
+            os.makedirs(os.path.dirname(self.metrics_file) or ".", exist_ok=True)
+            self.metrics.write_file(self.metrics_file)
+
+    def shutdown(self):
+        """Close the recording (the writer thread finishes the file), the result files and the stream"""
+        if self.record_file is not None:
+            self.session.acquisition.set_recorder(None)
+            base_name, ext = os.path.splitext(self.record_file_name)
+            self.record_file_name = f"{base_name}_to_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}"
+            self.record_file.close(rename_to=self.record_file_name)
+            self.record_file.wait()  # The writer thread writes the queued records, closes and renames the file
+            if self.record_file.error is not None:
+                logging.error(f"Saving {self.record_file.file_name} failed: {self.record_file.error}")
+            else:
+                logging.info(f"Data saved: {self.record_file.file_name}")
+        for writer in self.result_writers.values():
+            writer.close()
+        if self.session is not None:
+            self.session.disconnect()
+        self.write_metrics()
+
+
+if __name__ == "__main__":
+    profiles = [name for name, value in vars(DeviceInfoDatabase).items() if not name.startswith("_")]
+    parser = argparse.ArgumentParser(description='ChannelSigExplorer - headless recording and sleep staging')
+    parser.add_argument('--device', choices=profiles, default='TGMA', help='Device profile of the stream')
+    parser.add_argument('--indicators', nargs='*', default=['sleep_EmbSleepNet⭐.py'],
+                        help='Indicator files to compute; their results are written to CSV')
+    parser.add_argument('--whole-stream', action='store_true', help='Record every channel of the stream')
+    parser.add_argument('--format', choices=['edf', 'csig'], default='edf', help='Recording format')
+    parser.add_argument('--output-dir', default='./data_recorded')
+    parser.add_argument('--duration', type=float, help='Stop after this many hours (default: until Ctrl+C)')
+    parser.add_argument('--metrics-file', default='./metrics_reports/headless_metrics.prom',
+                        help='Metrics rewritten every 10 s: Prometheus text, or JSON for *.json')
+    parser.add_argument('--metrics-port', type=int, help='Also serve the metrics on localhost at this port')
+    parser.add_argument('--log-file', default='eeg_headless.log')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s',
+                        handlers=[logging.FileHandler(args.log_file), logging.StreamHandler()])
+
+    recorder = HeadlessRecorder(
+        getattr(DeviceInfoDatabase, args.device), args.indicators, output_dir=args.output_dir,
+        record_writer_class=CompressedRecordWriter if args.format == 'csig' else EDFRecordWriter,
+        whole_stream=args.whole_stream, metrics_file=args.metrics_file, metrics_port=args.metrics_port)
+    signal.signal(signal.SIGINT, lambda *_: recorder.stop())
+    signal.signal(signal.SIGTERM, lambda *_: recorder.stop())
+    recorder.run(args.duration * 3600 if args.duration else None)
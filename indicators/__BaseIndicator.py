@@ -1,26 +1,35 @@
 import itertools
 import logging
 import sys
-from pathlib import Path 
-import yaml  
 
 import numpy as np
-from pyqtgraph.Qt import QtWidgets, QtCore
 
 from __Data_IO_Utils import DataMgr_Raw_In_Intervals, DataMgr_Wave_In_1D
+from __Global_Config import global_config
 from __bands.WaveBands_Utils import Bands_Utils
 
 class BaseIndicatorHandler:
+    # What happens when completed intervals arrive faster than they are processed
+    # (see DataMgr_Raw_In_Intervals), and how many may wait
+    overload_policy = DataMgr_Raw_In_Intervals.DROP_OLDEST
+    max_pending_intervals = 2
 
+    # What happens while the dock is hidden (behind another tab, window minimized); see set_visible()
+    RENDER_ONLY = "render_only"  # Keep computing, skip drawing; the latest state is drawn on show
+    SUSPEND = "suspend"  # Skip computing and drawing; the display resumes with new data on show
+    CATCH_UP = "catch_up"  # Buffer raw intervals without computing; they are computed on show, a few per call
+    hidden_policy = RENDER_ONLY
+    catch_up_backlog = 60  # CATCH_UP: intervals buffered while hidden (older ones would scroll out of the history)
+    catch_up_per_call = 2  # CATCH_UP: buffered intervals computed per call once shown again
+    # Low-power mode pauses every indicator that is not essential (treated as hidden, and RENDER_ONLY
+    # becomes SUSPEND); essential ones keep computing and are drawn at the reduced frame rate
+    essential = False
 
     def __init__(self, indicator_update_interval, indicator_wave_columns=None):        
-        config_path = Path(__file__).parent / 'indicator_global_config.yaml'
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-        
-        logging.basicConfig(level=config['LOGGING']['level'], format=config['LOGGING']['log_format'])
-
-        self.stream_sample_freq = config['STREAM']['sample_freq']
+        # Rate of the connected stream, or the configured default; see set_sample_freq()
+        self.stream_sample_freq = global_config.sample_freq
+        self.fed_by_stream = False  # Set by the stream manager while a stream feeds the indicator: its rate applies
+        global_config.subscribe(self.on_config_changed)
 
         self.plot_widget = None  # Plotting widget
         self.plotted_wave = None  # Curve
@@ -31,38 +40,180 @@ class BaseIndicatorHandler:
         compute the indicator once, and the indicator results are then updated on the plot.
         """
         self.indicator_update_interval = indicator_update_interval
-        interval_rawdata_len = int(self.stream_sample_freq * indicator_update_interval)
+        self.interval_rawdata_len = int(self.stream_sample_freq * indicator_update_interval)
+        self.indicator_wave_columns = indicator_wave_columns
 
-        # Group raw data into intervals and store
-        self.intervalsData_mgr = (
-            DataMgr_Raw_In_Intervals(one_interval_data_len=interval_rawdata_len, num_intervals=2))
+        """
+        Data arrives as (channels x samples). Buffers hold all channels, indicators compute on all
+        channels in one vectorized call, and only `display_channel` is drawn.
+        """
+        self.num_channels = 1
+        self.selected_channel = 0  # Channel chosen in the dock
+        self.display_channel = 0  # Channel drawn: the chosen one, if it exists in the data
+        self.channel_names = []  # Names of the incoming rows when known (set by the main window)
+        self.latency_tracker = None  # Set by the main window to measure sample-to-screen latency
 
-        # indicator_data_in_1d is not required for every indicator
-        if indicator_wave_columns is not None:
-            self.waveDataIn1D_mgr = DataMgr_Wave_In_1D(indicator_wave_columns)
+        """
+        Results and drawing are decoupled: processing stores results and calls mark_dirty(). In the main
+        window a render scheduler redraws dirty indicators at a capped frame rate, so several updates
+        between two frames cost one redraw of the latest state.
+        """
+        self.pending_updates = 0  # Updates marked since the last redraw
+        self.render_deferred = False  # Set by the render scheduler; standalone, mark_dirty() redraws at once
+        self.result_sink = None  # Optional callable(handler) told of every new result, e.g. by the headless recorder
+        self.visible = True  # Whether the plot can be seen, set by the render scheduler
+        self.catching_up = False  # CATCH_UP: computing the intervals buffered while hidden
+        self.low_power = False  # Low-power mode, set by the render scheduler
+        self.allocate_channel_buffers()
             
         # 离线模式相关属性
         self.is_offline_mode = False
         self.offline_data = None
         self.current_position = 0
 
+    def allocate_channel_buffers(self):
+        """(Re)allocate the raw-data buffers for `num_channels` channels"""
+        # Group raw data into intervals and store
+        self.intervalsData_mgr = (
+            DataMgr_Raw_In_Intervals(one_interval_data_len=self.interval_rawdata_len,
+                                     num_intervals=self.max_pending_intervals, num_channels=self.num_channels,
+                                     policy=self.overload_policy))
+        if self.catching_up or (not self.visible and self.hidden_policy == self.CATCH_UP):
+            self.hold_backlog(True)
+
+        # indicator_data_in_1d is not required for every indicator
+        if self.indicator_wave_columns is not None:
+            self.waveDataIn1D_mgr = DataMgr_Wave_In_1D(self.indicator_wave_columns, self.num_channels)
+
+    def allocate_indicator_buffers(self):
+        """Hook: (re)allocate per-channel result history when the channel count changes"""
+        pass
+
+    def update_sample_freq_state(self):
+        """Hook: (re)compute what depends on `stream_sample_freq` (frequency axes, resamplers, window lengths)"""
+        pass
+
+    def set_sample_freq(self, sample_freq):
+        """Adapt to the sample rate of the incoming data: interval length, rate-dependent state and all buffers"""
+        if sample_freq == self.stream_sample_freq:
+            return
+        logging.info(f"{type(self).__name__}: sample rate {self.stream_sample_freq} -> {sample_freq} Hz")
+        self.stream_sample_freq = sample_freq
+        self.interval_rawdata_len = int(sample_freq * self.indicator_update_interval)
+        self.update_sample_freq_state()
+        self.allocate_channel_buffers()
+        self.allocate_indicator_buffers()
+
+    def on_config_changed(self, section, key, value):
+        """Global config subscriber: until a stream feeds the indicator, it follows the configured sample rate"""
+        if (section, key) == ('STREAM', 'sample_freq') and not self.fed_by_stream:
+            self.set_sample_freq(value)
+
+    def set_num_channels(self, num_channels):
+        """Adapt all buffers to the number of incoming channels"""
+        self.num_channels = num_channels
+        self.display_channel = min(self.selected_channel, num_channels - 1)
+        self.allocate_channel_buffers()
+        self.allocate_indicator_buffers()
+
+    def set_display_channel(self, channel_idx):
+        """Select the channel drawn in the plot (computation always covers all channels)"""
+        self.selected_channel = channel_idx
+        self.display_channel = min(channel_idx, self.num_channels - 1)
+        self.mark_dirty()
+
+    def set_channel_names(self, channel_names):
+        """Names of the incoming channels, in row order (may be empty when unknown)"""
+        self.channel_names = list(channel_names)
+
+    def redraw_display_channel(self):
+        """Hook: redraw the plot from stored results (new results, or the displayed channel changed)"""
+        pass
+
+    @property
+    def dirty(self):
+        return self.pending_updates > 0
+
+    def mark_dirty(self):
+        """Request a redraw from the latest results, instead of drawing in the processing code"""
+        if self.result_sink is not None:
+            self.result_sink(self)
+        self.pending_updates += 1
+        if not self.render_deferred:
+            self.render()
+
+    def render(self):
+        """Redraw now; called by the render scheduler for dirty indicators"""
+        self.pending_updates = 0
+        self.redraw_display_channel()
+
+    @property
+    def active_hidden_policy(self):
+        """hidden_policy in effect: in low-power mode nothing non-essential computes just to stay current off-screen"""
+        if self.low_power and not self.essential and self.hidden_policy == self.RENDER_ONLY:
+            return self.SUSPEND
+        return self.hidden_policy
+
+    def set_visible(self, visible):
+        """Called by the render scheduler when the plot is shown or hidden; applies `hidden_policy`"""
+        if visible == self.visible:
+            return
+        self.visible = visible
+        if self.hidden_policy == self.CATCH_UP:
+            if visible:
+                self.catching_up = True
+            else:
+                self.hold_backlog(True)
+
+    def hold_backlog(self, hold):
+        """
+        CATCH_UP: let the interval queue hold the backlog while hidden, or restore its bound once caught up.
+        Intervals aging out of a held backlog are expected and counted apart from overload drops.
+        """
+        intervals = self.intervalsData_mgr
+        intervals.num_intervals = max(self.catch_up_backlog, self.max_pending_intervals) if hold else self.max_pending_intervals
+        intervals.holding_backlog = hold
+
+    def as_channels_x_samples(self, data_arrived):
+        """Normalize incoming data to (channels x samples), adapting buffers if the channel count changed"""
+        data = DataMgr_Raw_In_Intervals.as_channels_x_samples(data_arrived)
+        if data.shape[0] != self.num_channels:
+            self.set_num_channels(data.shape[0])
+        return data
+
     def create_pyqtgraph_plotWidget(self):
         raise NotImplementedError
 
+    def latest_results(self):
+        """
+        Newest result of every channel, for output without a plot: {column name: array (channels,)}.
+        None when the indicator has nothing to export.
+        """
+        return None
+
     def process_1_interval_rawdata_and_update_plot(self, interval_data):
         raise NotImplementedError
 
     def process_new_data_and_update_plot(self, data_arrived):
         """
         Update real-time waveform
-        :param data_arrived: Newly received EEG data
+        :param data_arrived: Newly received EEG data (channels x samples)
         """
-        # Update buffer
-        interval_data = self.intervalsData_mgr.append_new_data_and_return_1st_filled_row(data_arrived)
+        data_arrived = self.as_channels_x_samples(data_arrived)
+        if not self.visible and self.active_hidden_policy == self.SUSPEND:
+            return
 
-        if interval_data is not None:
+        # Update buffer; each interval_data is (channels x samples)
+        self.intervalsData_mgr.append(data_arrived)
+        if not self.visible and self.active_hidden_policy == self.CATCH_UP:
+            return
+
+        limit = self.catch_up_per_call if self.catching_up else None
+        for interval_data in self.intervalsData_mgr.take_filled_intervals(limit):
             self.process_1_interval_rawdata_and_update_plot(interval_data)
-            self.intervalsData_mgr.delete_1st_filled_row()
+        if self.catching_up and self.intervalsData_mgr.behind <= self.max_pending_intervals:
+            self.catching_up = False
+            self.hold_backlog(False)
             
     def test_current_indicator_with_simulated_data(self):
         """
@@ -71,6 +222,8 @@ class BaseIndicatorHandler:
         - Simulate a 256Hz real-time signal data stream.
         - Update the plot and display it.
         """
+        from pyqtgraph.Qt import QtWidgets, QtCore  # Indicators compute without Qt (headless recorder)
+
         # Create PyQt application instance
         app = QtWidgets.QApplication([])
 
@@ -1,162 +1,245 @@
+from collections import deque
+
 import numpy as np
 
 class DataMgr_Raw_In_Intervals:
     """
     Features implemented in this class:
-    * During initialization: Create a 2D array `rawdata_in_intervals`, where each row represents an interval of data.
+    * Incoming samples fill one interval (channels x samples) at a time.
+    * Completed intervals wait in a bounded queue until the indicator processes them. When the indicator
+      falls behind (slow computation, or one chunk completing several intervals), the overload policy
+      decides what is dropped; drops are counted instead of happening silently.
     """
-    def __init__(self, one_interval_data_len, num_intervals):
+    DROP_OLDEST = "drop_oldest"  # Bounded FIFO, one interval per call; when full, the oldest waiting interval is dropped
+    SKIP_TO_LATEST = "skip_to_latest"  # Only the newest completed interval is kept; older waiting ones are dropped
+    COALESCE = "coalesce"  # Every waiting interval is handed over in the same call; when full, the oldest is dropped
+    QUEUE = "queue"  # Bounded FIFO, one interval per call; when full, new intervals are dropped
+    POLICIES = (DROP_OLDEST, SKIP_TO_LATEST, COALESCE, QUEUE)
+
+    def __init__(self, one_interval_data_len, num_intervals, num_channels=1, policy=DROP_OLDEST):
         """
-        Initialize a 2D array where each row represents an interval.
         :param one_interval_data_len: Length of data in each interval.
-        :param num_intervals: Total number of intervals to store.
+        :param num_intervals: Maximum number of completed intervals waiting to be processed.
+        :param num_channels: Number of channels stored side by side in each interval.
+        :param policy: Overload policy, one of POLICIES.
         """
+        if policy not in self.POLICIES:
+            raise ValueError(f"unknown overload policy {policy!r}, expected one of {self.POLICIES}")
         self.interval_len = one_interval_data_len  # Length of each interval
-        self.num_intervals = num_intervals  # Total number of intervals
-        self.buf = np.full((num_intervals, one_interval_data_len), np.nan)  # Initialize a 2D array filled with NaN
-        self.current_positions = np.zeros(num_intervals, dtype=int)  # Current fill position for each row
-
-    def append(self, newdata):
-        """
-        Add new data to `rawdata_in_intervals`.
-        :param newdata: 1D array or list containing the data to append. A scalar is also accepted.
-        """
-        # Convert input data to a NumPy 1D array if it is a scalar
-        if not isinstance(newdata, np.ndarray):
-            data = np.array([newdata])
-        elif newdata.ndim == 0:  # If scalar, convert to 1D array
-            data = np.array([newdata])
-        else:
-            data = newdata.flatten()  # Ensure it's a 1D array
-
-        last_row_idx = self.num_intervals - 1  # Index of the last row
-        current_pos = self.current_positions[last_row_idx]  # Current filled position in the last row
-
-        # Calculate remaining space in the last row
-        remaining_space = self.interval_len - current_pos
+        self.num_intervals = num_intervals
+        self.num_channels = num_channels
+        self.policy = policy
 
-        if len(data) <= remaining_space:
-            # If the new data fits in the remaining space of the last row
-            self.buf[last_row_idx, current_pos:current_pos + len(data)] = data
-            self.current_positions[last_row_idx] += len(data)
-        else:
-            # Fill the remaining space in the last row
-            self.buf[last_row_idx, current_pos:] = data[:remaining_space]
-            self.current_positions[last_row_idx] = self.interval_len
-
-            # Remaining data
-            remaining_data = data[remaining_space:]
-
-            # Calculate the number of shifts (rolls) needed
-            num_rolls = (len(remaining_data) - 1) // self.interval_len + 1
-
-            # Roll the buffer and fill the remaining data
-            for i in range(num_rolls):
-                # Roll the array
-                self.buf = np.roll(self.buf, shift=-1, axis=0)
-                self.current_positions = np.roll(self.current_positions, shift=-1)
-
-                # Clear the last row after the roll
-                self.buf[-1, :] = np.nan
-                self.current_positions[-1] = 0
+        self.fill_buf = np.full((num_channels, one_interval_data_len), np.nan)  # Interval being filled
+        self.fill_pos = 0
+        self.pending = deque()  # Completed intervals, oldest first
 
-                # Fill the data chunk
-                start_idx = i * self.interval_len
-                end_idx = min((i + 1) * self.interval_len, len(remaining_data))
-                chunk = remaining_data[start_idx:end_idx]
+        self.holding_backlog = False  # Set while the queue holds a backlog on purpose (hidden CATCH_UP indicator)
+        self.intervals_completed = 0
+        self.intervals_dropped = 0  # Dropped because the indicator fell behind
+        self.intervals_aged_out = 0  # Dropped from a held backlog: by design, not an overload
 
-                self.buf[-1, :len(chunk)] = chunk
-                self.current_positions[-1] = len(chunk)
-
-        return True
-
-    def find_1st_valid_row(self):
+    @staticmethod
+    def as_channels_x_samples(newdata):
         """
-        Find the earliest row that contains data.
-        :return: Index of the earliest row with data, or None if no data is found.
+        Normalize incoming data to a 2D (channels x samples) array.
+        A scalar or 1D array is one channel.
         """
-        for i, pos in enumerate(self.current_positions):
-            if pos > 0:  # Check if the row contains data
-                return i
-        return None
+        return np.atleast_2d(np.asarray(newdata))
 
-    def append_new_data_and_return_1st_filled_row(self, data_arrived):
-        interval_data = None
-        if self.append(data_arrived):
-            interval_data =  self.get_1st_filled_row()
+    def append(self, newdata):
+        """
+        Add new data; every interval it completes is queued according to the overload policy.
+        :param newdata: 2D array (channels x samples). A scalar or 1D array is accepted for one channel.
+        """
+        data = self.as_channels_x_samples(newdata)
+        if data.shape[0] != self.num_channels:
+            raise ValueError(f"expected {self.num_channels} channel(s), got {data.shape[0]}")
+
+        pos = 0
+        while pos < data.shape[1]:
+            n = min(self.interval_len - self.fill_pos, data.shape[1] - pos)
+            self.fill_buf[:, self.fill_pos:self.fill_pos + n] = data[:, pos:pos + n]
+            self.fill_pos += n
+            pos += n
+            if self.fill_pos == self.interval_len:
+                self._queue_interval(self.fill_buf)
+                self.fill_buf = np.empty((self.num_channels, self.interval_len))
+                self.fill_pos = 0
+        return True
 
-        return interval_data
+    def _queue_interval(self, interval):
+        self.intervals_completed += 1
+        if self.policy == self.SKIP_TO_LATEST:
+            self.intervals_dropped += len(self.pending)
+            self.pending.clear()
+        elif len(self.pending) >= self.num_intervals:
+            if self.holding_backlog:
+                self.intervals_aged_out += 1
+            else:
+                self.intervals_dropped += 1
+            if self.policy == self.QUEUE:
+                return
+            self.pending.popleft()
+        self.pending.append(interval)
+
+    @property
+    def behind(self):
+        """Completed intervals still waiting to be processed"""
+        return len(self.pending)
+
+    def take_filled_intervals(self, limit=None):
+        """
+        Remove and return the intervals to process now, oldest first:
+        all waiting intervals (at most `limit`) with COALESCE, otherwise at most one.
+        """
+        if self.policy == self.COALESCE:
+            count = len(self.pending) if limit is None else min(limit, len(self.pending))
+            return [self.pending.popleft() for _ in range(count)]
+        return [self.pending.popleft()] if self.pending else []
 
-    def find_1st_filled_row_idx(self):
-        """
-        Find the index of the first fully filled interval row.
-        :return: Index of the first fully filled interval, or None if not found.
-        """
-        for i, pos in enumerate(self.current_positions):
-            if pos == self.interval_len:  # Check if the row is fully filled
-                return i
-        return None
+    def append_new_data_and_return_1st_filled_row(self, data_arrived):
+        self.append(data_arrived)
+        return self.get_1st_filled_row()
 
     def delete_1st_filled_row(self):
         """
         Delete the first fully filled interval.
         """
-        first_full_interval_idx = self.find_1st_filled_row_idx()
-        if first_full_interval_idx is not None:
-            self.buf[first_full_interval_idx, :] = np.nan  # Fill with NaN
-            self.current_positions[first_full_interval_idx] = 0  # Reset the position
+        if self.pending:
+            self.pending.popleft()
 
     def get_1st_filled_row(self):
         """
         Retrieve the first fully filled interval.
-        :return: A 1D array of the first fully filled interval. Returns None if no complete interval exists.
+        :return: A 2D array (channels x samples) of the first fully filled interval.
+                 Returns None if no complete interval exists.
         """
-        first_full_interval_idx = self.find_1st_filled_row_idx()
-        if first_full_interval_idx is not None:
-            return self.buf[first_full_interval_idx, :]
-        return None
+        return self.pending[0] if self.pending else None
 
 class DataMgr_Wave_In_1D:
-    def __init__(self, indicator_wave_columns):
+    def __init__(self, indicator_wave_columns, num_channels=1):
         """
-        Initialize a 2D array where each row represents an interval.
-        :param interval_data_len: Length of data in each interval.
-        :param num_intervals: Total number of intervals to store.
+        Initialize a rolling 2D array (channels x columns); each row is the displayed wave of one channel.
+        :param indicator_wave_columns: Number of columns (points) of the wave.
+        :param num_channels: Number of channels.
         """
         self.buf_len = None
         self.buf = None
+        self.num_channels = num_channels
 
         if indicator_wave_columns is not None:
             self.buf_len = indicator_wave_columns
-            self.buf = np.full(self.buf_len, np.nan)
+            self.buf = np.full((num_channels, self.buf_len), np.nan)
 
     def append(self, data_arrived):
         """
         Generic function for appending data with automatic rolling, used for different buffers.
-        :param data_arrived: New data to append (can be scalar or 1D array).
+        :param data_arrived: New data to append (scalar, 1D array for one channel, or channels x samples).
         """
-        if not isinstance(data_arrived, np.ndarray):  # If scalar
-            data = np.asarray(data_arrived)
-            data_len = 1
-        elif data_arrived.shape == ():  # Empty array, return directly
+        data = np.atleast_2d(np.asarray(data_arrived))
+        data_len = data.shape[1]
+        if data_len == 0:  # Nothing to append
             return
-        else:  # Non-empty array
-            data = data_arrived.flatten()  # Flatten data to 1D array
-            data_len = data.shape[0]
 
         # Roll and fill the buffer
-        self.buf = np.roll(self.buf, -data_len)
-        self.buf[-data_len:] = data  # Ensure the assigned data is 1D
+        if data_len >= self.buf_len:
+            self.buf[:] = data[:, -self.buf_len:]
+        else:
+            self.buf = np.roll(self.buf, -data_len, axis=1)
+            self.buf[:, -data_len:] = data
+
+
+class DataMgr_MinMax_Pyramid:
+    """
+    Rolling window of (channels x samples) with a min/max envelope pyramid for level-of-detail drawing.
+    Level k holds the min and max of blocks of 2**k samples, aligned on absolute sample indices, so
+    appending only recomputes the blocks the new samples fall in (O(new samples + levels)), and a view of
+    any length is drawn with about one min/max pair per pixel.
+    """
+    def __init__(self, window_len, num_channels=1, num_levels=12):
+        """
+        :param window_len: Number of samples in the window (the newest ones).
+        :param num_channels: Number of channels.
+        :param num_levels: Coarsest level: blocks of 2**num_levels samples.
+        """
+        self.window_len = window_len
+        self.num_channels = num_channels
+        self.num_levels = num_levels
+        # Ring of whole top-level blocks, one more than the window spans, so blocks at its start stay complete
+        top_block = 1 << num_levels
+        self.capacity = (-(-window_len // top_block) + 1) * top_block
+        self.samples = np.full((num_channels, self.capacity), np.nan)
+        self.mins = [self.samples] + [np.full((num_channels, self.capacity >> k), np.nan)
+                                      for k in range(1, num_levels + 1)]
+        self.maxs = [self.samples] + [np.full((num_channels, self.capacity >> k), np.nan)
+                                      for k in range(1, num_levels + 1)]
+        self.total = 0  # Absolute index of the next sample
+
+    def append(self, data_arrived):
+        """
+        :param data_arrived: New samples (channels x samples).
+        """
+        data = np.atleast_2d(np.asarray(data_arrived))
+        if data.shape[1] > self.capacity:  # Only the newest samples can be kept
+            self.total += data.shape[1] - self.capacity
+            data = data[:, -self.capacity:]
+        n = data.shape[1]
+        if n == 0:
+            return
+
+        pos = self.total % self.capacity
+        first = min(n, self.capacity - pos)
+        self.samples[:, pos:pos + first] = data[:, :first]
+        self.samples[:, :n - first] = data[:, first:]
+        start, self.total = self.total, self.total + n
+
+        # Recompute the touched blocks of each level from the two halves one level below. A half that
+        # starts at or after `total` has not arrived yet (its slot holds older data) and is ignored.
+        for k in range(1, self.num_levels + 1):
+            blocks = np.arange(start >> k, ((self.total - 1) >> k) + 1)
+            child_slots = self.capacity >> (k - 1)
+            left, right = (2 * blocks) % child_slots, (2 * blocks + 1) % child_slots
+            right_arrived = ((2 * blocks + 1) << (k - 1)) < self.total
+            slots = blocks % (self.capacity >> k)
+            self.mins[k][:, slots] = np.where(right_arrived, np.fmin(self.mins[k - 1][:, left], self.mins[k - 1][:, right]),
+                                              self.mins[k - 1][:, left])
+            self.maxs[k][:, slots] = np.where(right_arrived, np.fmax(self.maxs[k - 1][:, left], self.maxs[k - 1][:, right]),
+                                              self.maxs[k - 1][:, left])
+
+    def envelope(self, channel, first, last, max_pairs):
+        """
+        Points drawing samples [first, last) of the window, offsets counted from its oldest sample.
+        :param max_pairs: Number of min/max pairs to aim for, about the plot width in pixels.
+        :return: (x, y): the exact samples when they are few enough, else interleaved min/max of the
+                 finest level with at most about `max_pairs` blocks; x are window offsets (samples).
+        """
+        first, last = max(int(first), 0), min(int(last), self.window_len)
+        if last <= first:
+            return np.empty(0), np.empty(0)
+        window_start = self.total - self.window_len  # Absolute index of offset 0
+
+        n = last - first
+        level = 0 if n <= 2 * max_pairs else min(int(np.ceil(np.log2(n / max_pairs))), self.num_levels)
+        if level == 0:
+            x = np.arange(first, last)
+            return x, self.samples[channel, (x + window_start) % self.capacity]
+
+        blocks = np.arange((window_start + first) >> level, ((window_start + last - 1) >> level) + 1)
+        slots = blocks % (self.capacity >> level)
+        x = np.clip((blocks << level) - window_start, first, last - 1).repeat(2)
+        y = np.stack((self.mins[level][channel, slots], self.maxs[level][channel, slots]), axis=1).ravel()
+        return x, y
 
 
 # Test
 if __name__ == "__main__":
-    handler = DataMgr_Raw_In_Intervals(one_interval_data_len=25, num_intervals=3)
+    handler = DataMgr_Raw_In_Intervals(one_interval_data_len=25, num_intervals=2, num_channels=2)
 
-    # Input data exceeds the length of one interval
-    data = np.array([i for i in range(75)])  # Total of 75 data points, 3 intervals in length
+    # Input data exceeds the length of two intervals: the oldest completed interval is dropped
+    data = np.array([[i for i in range(80)], [-i for i in range(80)]])  # 2 channels, 3.2 intervals in length
     handler.append(data)
 
-    print("Buffer after append:")
-    print(handler.buf)
-    print("Current Positions:", handler.current_positions)
+    print("Waiting intervals:", [interval[0, 0] for interval in handler.pending])
+    print("Completed / dropped:", handler.intervals_completed, handler.intervals_dropped)
+    print("Filling:", handler.fill_buf[:, :handler.fill_pos])
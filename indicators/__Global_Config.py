@@ -0,0 +1,68 @@
+import logging
+import threading
+import weakref
+from pathlib import Path
+
+
+class IndicatorGlobalConfig:
+    """
+    Process-wide indicator configuration.
+    indicator_global_config.yaml is read once, on first use; runtime changes (the sample rate of the
+    connected stream) are made in memory only and passed to the subscribers, e.g. indicators that
+    reallocate their buffers. The file keeps the defaults, used by the standalone indicator tests.
+    """
+
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self._config = None
+        self._load_lock = threading.Lock()
+        self._subscribers = []  # Weak references to callables(section, key, value)
+
+    def _loaded(self):
+        if self._config is None:
+            with self._load_lock:
+                if self._config is None:
+                    import yaml
+
+                    with open(self.config_path, 'r', encoding='utf-8') as f:
+                        config = yaml.safe_load(f)
+                    logging.basicConfig(level=config['LOGGING']['level'], format=config['LOGGING']['log_format'])
+                    self._config = config
+        return self._config
+
+    def get(self, section, key):
+        return self._loaded()[section][key]
+
+    def set(self, section, key, value):
+        """Change a value in memory and notify the subscribers; returns whether it changed"""
+        config = self._loaded()
+        if config[section].get(key) == value:
+            return False
+        config[section][key] = value
+        for ref in list(self._subscribers):
+            callback = ref()
+            if callback is None:
+                self._subscribers.remove(ref)
+            else:
+                callback(section, key, value)
+        return True
+
+    def subscribe(self, callback):
+        """Call `callback(section, key, value)` on every change; bound methods do not keep their object alive"""
+        self._subscribers.append(weakref.WeakMethod(callback) if hasattr(callback, "__self__") else weakref.ref(callback))
+
+    def unsubscribe(self, callback):
+        self._subscribers = [ref for ref in self._subscribers if ref() not in (None, callback)]
+
+    @property
+    def sample_freq(self):
+        """Sample rate (Hz) that new indicators are created for"""
+        return self.get('STREAM', 'sample_freq')
+
+    def set_sample_freq(self, sample_freq):
+        return self.set('STREAM', 'sample_freq', sample_freq)
+
+
+# Indicator modules and helpers must import it as `__Global_Config` (indicators directory on sys.path),
+# so that they all share this instance
+global_config = IndicatorGlobalConfig(Path(__file__).parent / 'indicator_global_config.yaml')
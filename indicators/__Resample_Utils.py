@@ -0,0 +1,95 @@
+import functools
+import math
+
+import numpy as np
+
+
+@functools.lru_cache(maxsize=None)
+def design_polyphase_filter(fs_in, fs_out, filter_half_len=10):
+    """
+    Design (once per rate pair) the anti-aliasing FIR filter of a rational resampler, split into phases.
+    The prototype filter is the same Kaiser-windowed sinc used by scipy.signal.resample_poly.
+    :param fs_in: Input sampling frequency (Hz, integer).
+    :param fs_out: Output sampling frequency (Hz, integer).
+    :param filter_half_len: Number of zero crossings on each side of the sinc.
+    :return: (up, down, phases), where phases[p, t] = h[p + t * up] (read-only 2D array).
+    """
+    divisor = math.gcd(int(fs_in), int(fs_out))
+    up, down = int(fs_out) // divisor, int(fs_in) // divisor
+    if up == down == 1:
+        return 1, 1, None
+
+    max_rate = max(up, down)
+    half_len = filter_half_len * max_rate
+    n = np.arange(-half_len, half_len + 1)
+    cutoff = 1.0 / max_rate  # Relative to the Nyquist frequency of the upsampled signal
+    h = cutoff * np.sinc(cutoff * n) * np.kaiser(len(n), 5.0)
+    h *= up / np.sum(h)  # Unity DC gain after zero-stuffing by `up`
+
+    # Polyphase decomposition: one row per output phase
+    taps_per_phase = -(-len(h) // up)
+    padded = np.zeros(taps_per_phase * up)
+    padded[:len(h)] = h
+    phases = padded.reshape(taps_per_phase, up).T.copy()
+    phases.setflags(write=False)
+    return up, down, phases
+
+
+class Polyphase_Resampler:
+    """
+    Stateful rational resampler/decimator.
+    Chunks of any length are processed as they arrive, and the output is a continuous resampled
+    stream (delayed by the filter's group delay, `delay_secs`), so no chunk boundary artifacts and
+    no whole-epoch resampling spikes.
+    The last axis is time, so (channels x samples) arrays are resampled in one call.
+    """
+    def __init__(self, fs_in, fs_out, filter_half_len=10):
+        self.fs_in = fs_in
+        self.fs_out = fs_out
+        self.up, self.down, self.phases = design_polyphase_filter(fs_in, fs_out, filter_half_len)
+        self.is_identity = self.phases is None
+        self.taps_per_phase = 0 if self.is_identity else self.phases.shape[1]
+        self.delay_secs = 0.0 if self.is_identity else filter_half_len * max(self.up, self.down) / (self.up * fs_in)
+
+        self.history = None  # Last (taps_per_phase - 1) input samples
+        self.n_in = 0  # Input samples consumed so far
+        self.n_out = 0  # Output samples produced so far
+
+    def reset(self):
+        """Forget the filter state, e.g. after a stream reconnect"""
+        self.history = None
+        self.n_in = 0
+        self.n_out = 0
+
+    def process(self, data):
+        """
+        Resample one chunk.
+        :param data: New samples (scalar, 1D array, or N-D array with time on the last axis).
+        :return: Output samples that became available (time on the last axis, possibly empty).
+        """
+        data = np.atleast_1d(np.asarray(data, dtype=float))
+        if self.is_identity:
+            return data
+
+        if self.history is None or self.history.shape[:-1] != data.shape[:-1]:
+            self.reset()
+            self.history = np.zeros(data.shape[:-1] + (self.taps_per_phase - 1,))
+
+        # buf covers absolute input indices [buf_start, n_in)
+        buf = np.concatenate((self.history, data), axis=-1)
+        buf_start = self.n_in - self.history.shape[-1]
+        self.n_in += data.shape[-1]
+
+        # Output n is ready once its newest input sample, (n * down) // up, has arrived
+        n_end = (self.n_in * self.up - 1) // self.down + 1
+        out_idx = np.arange(self.n_out, n_end)
+        self.n_out = n_end
+        self.history = buf[..., buf.shape[-1] - (self.taps_per_phase - 1):].copy()
+        if out_idx.size == 0:
+            return np.empty(data.shape[:-1] + (0,))
+
+        # y[n] = sum_t phases[(n * down) % up, t] * x[(n * down) // up - t]
+        newest = (out_idx * self.down) // self.up - buf_start
+        gather_idx = newest[:, None] - np.arange(self.taps_per_phase)[None, :]
+        coeffs = self.phases[(out_idx * self.down) % self.up]
+        return np.einsum('...nt,nt->...n', buf[..., gather_idx], coeffs)
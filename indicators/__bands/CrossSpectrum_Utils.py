@@ -0,0 +1,75 @@
+import numpy as np
+
+from __bands.WaveBands_Utils import Bands_Utils
+
+
+class CrossSpectrum_Utils:
+    """
+    Cross-channel spectral analysis on (channels x samples) intervals.
+    One batched FFT covers every channel and Welch segment, and the full cross-spectral matrix is
+    formed with a single einsum, so the cost grows with channels^2 * freqs without any per-pair loop.
+    Band definitions come from Bands_Utils.
+    """
+    def __init__(self, bands_num, sample_freq, segment_secs=1.0, overlap=0.5):
+        """
+        :param bands_num: Band configuration of Bands_Utils (4..8).
+        :param sample_freq: Sampling frequency (Hz).
+        :param segment_secs: Welch segment length; coherence needs several segments per interval.
+        :param overlap: Fraction of overlap between consecutive segments.
+        """
+        self.bands_utils = Bands_Utils(bands_num)
+        self.sample_freq = sample_freq
+        self.segment_len = int(segment_secs * sample_freq)
+        self.segment_step = max(1, int(self.segment_len * (1 - overlap)))
+        self.window = np.hanning(self.segment_len)
+
+        self.freqs = np.fft.rfftfreq(self.segment_len, 1 / sample_freq)
+        # Float (bands x freqs) mask, so band sums of the whole matrix are one matrix product
+        self.band_masks = self.bands_utils.band_masks(self.freqs).astype(float)
+
+    def calc_cross_spectrum(self, interval_data):
+        """
+        Welch estimate of the cross-spectral density matrix.
+        :param interval_data: 2D array (channels x samples), at least one segment long.
+        :return: complex array (channels x channels x freqs); S[i, j] = E[X_i * conj(X_j)]
+        """
+        data = np.atleast_2d(interval_data)
+        data = data - np.mean(data, axis=-1, keepdims=True)
+
+        # (channels x segments x segment_len) strided view, no copy until windowing
+        segments = np.lib.stride_tricks.sliding_window_view(data, self.segment_len, axis=-1)[:, ::self.segment_step]
+        spectra = np.fft.rfft(segments * self.window, axis=-1)
+
+        return np.einsum('isf,jsf->ijf', spectra, spectra.conj(), optimize=True) / segments.shape[1]
+
+    def calc_band_connectivity(self, interval_data):
+        """
+        Band-averaged power, coherence and imaginary coherence for all channel pairs.
+        :param interval_data: 2D array (channels x samples).
+        :return: (band_power, coherence, imag_coherence), shapes (channels x bands),
+                 (channels x channels x bands) and (channels x channels x bands).
+                 Bands without frequency bins (above Nyquist) are 0.
+        """
+        band_csd = self.calc_cross_spectrum(interval_data) @ self.band_masks.T  # (channels x channels x bands)
+        band_power = np.real(np.diagonal(band_csd, axis1=0, axis2=1)).T  # (channels x bands)
+
+        norm = np.sqrt(band_power[:, None, :] * band_power[None, :, :])
+        valid = norm > 0
+        coherence = np.divide(np.abs(band_csd) ** 2, norm ** 2, out=np.zeros(norm.shape), where=valid)
+        imag_coherence = np.divide(np.imag(band_csd), norm, out=np.zeros(norm.shape), where=valid)
+
+        return band_power, coherence, imag_coherence
+
+    @staticmethod
+    def calc_asymmetry(band_power, left, right):
+        """
+        Hemispheric asymmetry index ln(P_right) - ln(P_left) for every band.
+        Positive frontal alpha asymmetry means relatively more left-hemisphere activity.
+        :param band_power: (channels x bands) band power.
+        :param left: Row index of the left channel (e.g. AF7).
+        :param right: Row index of the right channel (e.g. AF8).
+        :return: 1D array (bands); NaN where either power is 0.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            asymmetry = np.log(band_power[right]) - np.log(band_power[left])
+        return np.where(np.isfinite(asymmetry), asymmetry, np.nan)
@@ -56,30 +56,39 @@ class Bands_Utils:
         self.bands = {name: info["range"] for name, info in self.bands_config.items()}
         self.colors = [info["color"] for info in self.bands_config.values()]
 
+    def band_masks(self, freqs):
+        """
+        Boolean matrix (bands x freqs) selecting the frequency bins of each band
+        :param freqs: Frequency array of the spectrum
+        """
+        return np.array([(freqs >= low) & (freqs < high) for low, high in self.bands.values()])
+
     def calc_bandpwr_percentage(self, epoch_data, freq):
-        # Compute brainwave power for each frequency band using NumPy
+        """
+        Compute brainwave power for each frequency band using NumPy, for all channels at once
+        :param epoch_data: 1D array (samples) or 2D array (channels x samples)
+        :param freq: Sampling frequency
+        :return: total power (scalar or per channel), band power percentages (bands, or channels x bands)
+        """
         freqs, power_spectrum = self.calc_power_spectrum(epoch_data, fs=freq)
-        total_power_spectrum = np.sum(power_spectrum)
-        band_powers_percentage = []
+        total_power_spectrum = np.sum(power_spectrum, axis=-1)
 
-        for band_name, band_info in self.bands_config.items():
-            low, high = band_info["range"]
-            band_power = np.sum(
-                power_spectrum[(freqs >= low) & (freqs < high)])  # Calculate power for the frequency band
-            band_powers_percentage.append(band_power / total_power_spectrum)
+        # Sum the bins of every band for every channel with one matrix product
+        band_powers = power_spectrum @ self.band_masks(freqs).T
+        band_powers_percentage = band_powers / np.expand_dims(total_power_spectrum, -1)
 
         return total_power_spectrum, band_powers_percentage
 
     def calc_power_spectrum(self, signal, fs):
         """
         Compute the Power Spectral Density (PSD) using NumPy
-        :param signal: Input signal
+        :param signal: Input signal, time on the last axis (1D, or channels x samples)
         :param fs: Sampling frequency
-        :return: Frequency array, Power Spectral Density
+        :return: Frequency array, Power Spectral Density (same leading shape as signal)
         """
-        n = len(signal)  # Length of the signal
+        n = signal.shape[-1]  # Length of the signal
         freq = np.fft.rfftfreq(n, d=1 / fs)  # Compute frequency components
-        fft_vals = np.fft.rfft(signal)  # Fast Fourier Transform
+        fft_vals = np.fft.rfft(signal, axis=-1)  # Fast Fourier Transform
         psd = (1 / (fs * n)) * np.abs(fft_vals) ** 2  # Compute power spectral density
-        psd[1:-1] *= 2  # Convert two-sided spectrum to one-sided spectrum
+        psd[..., 1:-1] *= 2  # Convert two-sided spectrum to one-sided spectrum
         return freq, psd
@@ -0,0 +1,234 @@
+"""
+Out-of-process inference service for EmbedSleepNet.
+
+The service runs in its own Python process (started on demand by the first request), holds the
+only copy of torch and of the model, and micro-batches epochs submitted concurrently by any number
+of staging handlers. Handlers talk to it through EmbedSleepNet_Inference_Client, which returns a
+Future per epoch so that the GUI thread never waits for inference.
+
+Protocol (pickled tuples over a multiprocessing.connection pipe):
+    client -> service: ("infer", request_id, epochs)    epochs: float32 (n_epochs x EPOCH_LEN), e.g. one per channel
+                       ("shutdown",)
+    service -> client: ("result", [request_id, ...], [probs, ...])   probs: (n_epochs x num_classes) softmax output
+                       ("error", [request_id, ...], message)
+"""
+import itertools
+import logging
+import os
+import pathlib
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+EPOCH_LEN = 3000  # Model input: 30 s epoch resampled to 100 Hz
+AUTHKEY_ENV = "EMBEDSLEEPNET_SERVICE_AUTHKEY"
+
+
+class EmbedSleepNet_Inference_Client:
+    """GUI-side proxy of the inference service. One shared instance serves every staging handler."""
+
+    _shared_client = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_batch_size=16, batch_window=0.02):
+        """
+        :param max_batch_size: Maximum number of epochs the service evaluates in one forward pass.
+        :param batch_window: Seconds the service waits for more requests after the first one of a batch.
+        """
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+
+        self._process = None
+        self._conn = None
+        self._outbox = queue.Queue()  # Requests waiting to be sent by the IO thread
+        self._pending = {}  # {request_id: Future}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._io_thread = None
+
+    @classmethod
+    def get_shared_client(cls):
+        """Return the process-wide client, creating it on first use"""
+        with cls._shared_lock:
+            if cls._shared_client is None:
+                cls._shared_client = cls()
+            return cls._shared_client
+
+    def submit(self, epoch):
+        """
+        Queue epochs for inference.
+        :param epoch: 1D array of EPOCH_LEN samples, or 2D (n_epochs x EPOCH_LEN), e.g. one epoch per channel.
+        :return: Future resolved with the softmax probabilities (model class order), 1D or
+                 (n_epochs x num_classes) to match the input.
+        """
+        future = Future()
+        request_id = next(self._request_ids)
+        with self._pending_lock:
+            self._pending[request_id] = future
+        self._outbox.put(("infer", request_id, np.asarray(epoch, dtype=np.float32)))
+        self._ensure_io_thread()
+        return future
+
+    def shutdown(self):
+        """Stop the service process (if running) and fail any outstanding requests"""
+        self._outbox.put(("shutdown",))
+        self._ensure_io_thread()
+        if self._process is not None:
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+    def _ensure_io_thread(self):
+        if self._io_thread is None or not self._io_thread.is_alive():
+            self._io_thread = threading.Thread(target=self._send_loop, name="EmbedSleepNet-client", daemon=True)
+            self._io_thread.start()
+
+    def _start_service(self):
+        """Launch the service process and connect to it"""
+        authkey = os.urandom(16)
+        env = dict(os.environ, **{AUTHKEY_ENV: authkey.hex()})
+        self._process = subprocess.Popen(
+            [sys.executable, str(pathlib.Path(__file__).resolve()),
+             str(self.max_batch_size), str(self.batch_window)],
+            stdout=subprocess.PIPE, env=env, text=True)
+
+        # The service prints its listening address as the first line of stdout
+        address = self._process.stdout.readline().strip()
+        if not address:
+            raise RuntimeError(f"inference service exited with code {self._process.wait()}")
+        self._conn = Client(address, authkey=authkey)
+        threading.Thread(target=self._receive_loop, args=(self._conn,),
+                         name="EmbedSleepNet-results", daemon=True).start()
+        logging.info(f"EmbedSleepNet inference service started (pid {self._process.pid})")
+
+    def _send_loop(self):
+        """IO thread: start the service when needed and forward queued requests to it"""
+        while True:
+            message = self._outbox.get()
+            if message[0] == "shutdown":
+                if self._conn is not None:
+                    self._conn.send(message)
+                return
+
+            try:
+                if self._conn is None:
+                    self._start_service()
+                self._conn.send(message)
+            except Exception as e:
+                logging.error(f"EmbedSleepNet inference service unavailable: {e}")
+                self._conn = None
+                self._fail_pending(e)
+
+    def _receive_loop(self, conn):
+        """Results thread: resolve futures as batches come back"""
+        while True:
+            try:
+                kind, request_ids, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            with self._pending_lock:
+                futures = [self._pending.pop(request_id, None) for request_id in request_ids]
+            for i, future in enumerate(futures):
+                if future is None:
+                    continue
+                if kind == "result":
+                    future.set_result(payload[i])
+                else:
+                    future.set_exception(RuntimeError(payload))
+
+        # Service went away; the next submit() starts a new one
+        if self._conn is conn:
+            self._conn = None
+        self._fail_pending(RuntimeError("inference service stopped"))
+
+    def _fail_pending(self, error):
+        with self._pending_lock:
+            futures = list(self._pending.values())
+            self._pending.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+
+def _load_model():
+    """Load torch and the EmbedSleepNet weights (service process only)"""
+    import torch
+
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+    from __sleep_staging.EmbedSleepNet_model_arch import EmbedSleepNet
+
+    model = EmbedSleepNet()
+    model_path = pathlib.Path(__file__).parent / 'EmbedSleepNet_model_binary.pth'
+    model.load_state_dict(torch.load(model_path, map_location='cpu', weights_only=True))
+    model.eval()
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    model.to(device)
+    return torch, model, device
+
+
+def _run_batch(torch, model, device, batch):
+    """Evaluate a list of ("infer", request_id, epochs) messages in one forward pass"""
+    request_ids = [message[1] for message in batch]
+    try:
+        epochs = np.concatenate([np.atleast_2d(message[2]) for message in batch]).astype(np.float32)
+        # Every epoch is an independent sequence of one epoch: (batch, seq_len=1, 1, EPOCH_LEN)
+        input_data = torch.from_numpy(epochs).view(len(epochs), 1, 1, EPOCH_LEN).to(device)
+        with torch.no_grad():
+            output = model(input_data)
+        probs = torch.softmax(output, dim=2)[:, 0, :].cpu().numpy()
+
+        # Split the batch back into one result per request, with the shape of its input
+        results = []
+        row = 0
+        for message in batch:
+            n_epochs = 1 if message[2].ndim == 1 else message[2].shape[0]
+            results.append(probs[row] if message[2].ndim == 1 else probs[row:row + n_epochs])
+            row += n_epochs
+        return ("result", request_ids, results)
+    except Exception as e:
+        return ("error", request_ids, f"{type(e).__name__}: {e}")
+
+
+def serve(max_batch_size, batch_window):
+    """Service process entry: accept the client, then micro-batch its requests until shutdown"""
+    authkey = bytes.fromhex(os.environ[AUTHKEY_ENV])
+    with Listener(authkey=authkey) as listener:
+        print(listener.address, flush=True)
+        with listener.accept() as conn:
+            torch, model, device = _load_model()
+
+            running = True
+            while running:
+                try:
+                    message = conn.recv()
+                except EOFError:
+                    break
+                if message[0] == "shutdown":
+                    break
+
+                # Collect whatever else arrives within the batch window
+                batch = [message]
+                deadline = time.monotonic() + batch_window
+                while len(batch) < max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not conn.poll(remaining):
+                        break
+                    message = conn.recv()
+                    if message[0] == "shutdown":
+                        running = False
+                        break
+                    batch.append(message)
+
+                conn.send(_run_batch(torch, model, device, batch))
+
+
+if __name__ == '__main__':
+    serve(max_batch_size=int(sys.argv[1]), batch_window=float(sys.argv[2]))
@@ -1,13 +1,17 @@
 from typing import override
 
 import numpy as np
-import pyqtgraph as pg
 
 # Inherit from the base class
 from __BaseIndicator import BaseIndicatorHandler
+from __Data_IO_Utils import DataMgr_Raw_In_Intervals
 from __bands.WaveBands_Utils import Bands_Utils
 
 class BandPowerRatio_Stack_Handler(BaseIndicatorHandler):
+    overload_policy = DataMgr_Raw_In_Intervals.COALESCE
+    max_pending_intervals = 4
+    hidden_policy = BaseIndicatorHandler.CATCH_UP
+
     @override
     def __init__(self):
         super().__init__(indicator_update_interval=2)
@@ -18,15 +22,27 @@ class BandPowerRatio_Stack_Handler(BaseIndicatorHandler):
         # Create a PyQtGraph layout
         self.plot_widget = None
 
-        # Initialize the buffer
-        self.bandpwr_percent_data = np.zeros((self.max_epochs_to_show, self.bands_utils.num_bands))  # Cache the power percentages for each band
-
         self.fill_plots = []  # Store the filled regions for each band
         self.curves = []  # Store the boundary lines for each band
 
+        # Plot data, updated in place: x axis and the stacked (cumulative) band powers (bands x epochs)
+        self.x_data = np.arange(self.max_epochs_to_show)
+        self.stacked_data = np.zeros((self.bands_utils.num_bands, self.max_epochs_to_show))
+
+        # Initialize the buffer
+        self.allocate_indicator_buffers()
+
+    @override
+    def allocate_indicator_buffers(self):
+        # Cache the power percentages for each channel and band
+        self.bandpwr_percent_data = (
+            np.zeros((self.max_epochs_to_show, self.num_channels, self.bands_utils.num_bands)))
+
     @override
     def create_pyqtgraph_plotWidget(self):
         """Create a stacked plot to display the power intensity of brainwave bands."""
+        import pyqtgraph as pg
+
         self.plot_widget = pg.GraphicsLayoutWidget()
         self.plot_widget.setWindowTitle("Real-Time Brainwave Band Power Intensity Stacked Plot (Filled)")
 
@@ -44,16 +60,21 @@ class BandPowerRatio_Stack_Handler(BaseIndicatorHandler):
         # Get the color for each band
         colors = self.bands_utils.colors
 
-        for band, color in zip(self.bands_utils.bands.keys(), colors):
-            # Add a transparent filled region
-            fill = pg.FillBetweenItem(None, None, brush=pg.mkBrush(color + "90"))
-            self.fill_plots.append(fill)
-            plot_item.addItem(fill)
+        # The zero baseline under the first band (not shown)
+        lower_curve = pg.PlotDataItem(self.x_data, np.zeros(self.max_epochs_to_show))
 
+        for band, color in zip(self.bands_utils.bands.keys(), colors):
             # Add a boundary line for each band (ensure it's of type PlotDataItem)
             curve = plot_item.plot(pen=pg.mkPen(color=color, width=2), name=band)
             self.curves.append(curve)
 
+            # Add a transparent filled region between the previous boundary and this one;
+            # it follows its curves, so updates only touch the curves
+            fill = pg.FillBetweenItem(lower_curve, curve, brush=pg.mkBrush(color + "90"))
+            self.fill_plots.append(fill)
+            plot_item.addItem(fill)
+            lower_curve = curve
+
             # Add the current band to the legend
             legend.addItem(curve, band)
 
@@ -66,37 +87,34 @@ class BandPowerRatio_Stack_Handler(BaseIndicatorHandler):
         total_power, band_powers_percentage = (
             self.bands_utils.calc_bandpwr_percentage(interval_data, self.stream_sample_freq))
 
-        # Roll and store the power data
+        # Roll and store the power data (channels x bands)
         self.bandpwr_percent_data = np.roll(self.bandpwr_percent_data, -1, axis=0)
-        self.bandpwr_percent_data[-1, :] = band_powers_percentage
+        self.bandpwr_percent_data[-1] = band_powers_percentage
 
-        # Update the stacked plot
+        # Redraw the stacked plot at the next frame
+        self.mark_dirty()
+
+    @override
+    def latest_results(self):
+        # Newest interval's power share of each band
+        return {band: self.bandpwr_percent_data[-1, :, i] for i, band in enumerate(self.bands_utils.bands)}
+
+    @override
+    def redraw_display_channel(self):
         self.update_stack_plot()
 
     def update_stack_plot(self):
         """Update the display of the stacked plot."""
-        x_data = np.arange(self.max_epochs_to_show)  # X-axis represents the epoch indices
-        cumulative_data = np.zeros(self.max_epochs_to_show)  # For cumulative stacking calculations
-
-        # Update the data for each band
-        for i, (fill, curve) in enumerate(zip(self.fill_plots, self.curves)):
-            # Update the boundary line
-            y_data = cumulative_data + self.bandpwr_percent_data[:, i]
-            curve.setData(x_data, y_data)
-
-            # Update the filled region
-            if i == 0:
-                # The first band uses 0 as the lower boundary
-                fill.setCurves(pg.PlotDataItem(x_data, np.zeros_like(x_data)), curve)
-            else:
-                # Other bands use the previous band's upper boundary
-                fill.setCurves(self.curves[i - 1], curve)
-
-            # Update the cumulative value
-            cumulative_data = y_data
+        # Stack the bands of the displayed channel: upper boundary of each band (bands x epochs)
+        channel_data = self.bandpwr_percent_data[:, self.display_channel, :]
+        np.cumsum(channel_data.T, axis=0, out=self.stacked_data)
+
+        # Update the boundary line of each band; the filled regions follow
+        for curve, y_data in zip(self.curves, self.stacked_data):
+            curve.setData(self.x_data, y_data)
 
         # Dynamically adjust the Y-axis range
-        max_power = np.sum(self.bandpwr_percent_data, axis=1).max()  # Maximum power after stacking
+        max_power = self.stacked_data[-1].max()  # Maximum power after stacking
         min_power = 0  # The minimum power of the stacked plot is 0
         if self.curves:
             self.curves[0].getViewBox().setYRange(min_power, max_power + 0.1 * max_power)
@@ -1,13 +1,17 @@
 from typing import override
 
 import numpy as np
-import pyqtgraph as pg
 
 # Inherit from the base class
 from __BaseIndicator import BaseIndicatorHandler
+from __Data_IO_Utils import DataMgr_Raw_In_Intervals
 from __bands.WaveBands_Utils import Bands_Utils
 
 class BandPowerRatio_Wave_Handler(BaseIndicatorHandler):
+    overload_policy = DataMgr_Raw_In_Intervals.COALESCE
+    max_pending_intervals = 4
+    hidden_policy = BaseIndicatorHandler.CATCH_UP
+
     @override
     def __init__(self):
         super().__init__(indicator_update_interval=2)  # Update every 2 seconds
@@ -18,15 +22,22 @@ class BandPowerRatio_Wave_Handler(BaseIndicatorHandler):
         # Create PyQtGraph graphical layout
         self.plot_widget = None
 
+        self.band_curves = []  # Store the curve for each frequency band
+
         # Initialize the cache
-        self.bandpwr_percent_data = (  # Cache the power proportion for each frequency band
-            np.zeros((self.max_epochs_to_show, self.bands_utils.num_bands)))
+        self.allocate_indicator_buffers()
 
-        self.band_curves = []  # Store the curve for each frequency band
+    @override
+    def allocate_indicator_buffers(self):
+        # Cache the power proportion for each channel and frequency band
+        self.bandpwr_percent_data = (
+            np.zeros((self.max_epochs_to_show, self.num_channels, self.bands_utils.num_bands)))
 
     @override
     def create_pyqtgraph_plotWidget(self):
         """Create a plot widget to display the power variation of brainwave frequency bands"""
+        import pyqtgraph as pg  # Only needed to plot; the computation also runs headless
+
         self.plot_widget = pg.GraphicsLayoutWidget()
         self.plot_widget.setWindowTitle("Real-time Brainwave Frequency Band Power Curves")
 
@@ -51,18 +62,28 @@ class BandPowerRatio_Wave_Handler(BaseIndicatorHandler):
         total_power, band_powers_percentage = (
             self.bands_utils.calc_bandpwr_percentage(interval_data, self.stream_sample_freq))
 
-        # Roll and store power data
+        # Roll and store power data (channels x bands)
         self.bandpwr_percent_data = np.roll(self.bandpwr_percent_data, -1, axis=0)
-        self.bandpwr_percent_data[-1, :] = band_powers_percentage
+        self.bandpwr_percent_data[-1] = band_powers_percentage
+
+        # Redraw the power plot at the next frame
+        self.mark_dirty()
 
-        # Update the power plot
+    @override
+    def latest_results(self):
+        # Newest interval's power share of each band
+        return {band: self.bandpwr_percent_data[-1, :, i] for i, band in enumerate(self.bands_utils.bands)}
+
+    @override
+    def redraw_display_channel(self):
         self.update_power_plot()
 
     def update_power_plot(self):
         """Update the display of the power curves"""
         x_data = np.arange(self.max_epochs_to_show)  # X-axis corresponds to epoch indices
+        channel_data = self.bandpwr_percent_data[:, self.display_channel, :]
         for i, curve in enumerate(self.band_curves):
-            curve.setData(x_data, self.bandpwr_percent_data[:, i])  # Each curve corresponds to the power data of one frequency band
+            curve.setData(x_data, channel_data[:, i])  # Each curve corresponds to the power data of one frequency band
 
 
 if __name__ == '__main__':
@@ -1,10 +1,14 @@
 from typing import override
 import numpy as np
-import pyqtgraph as pg
 from __BaseIndicator import BaseIndicatorHandler
+from __Data_IO_Utils import DataMgr_Raw_In_Intervals
 from __bands.WaveBands_Utils import Bands_Utils
 
 class BandPowerRatio_Sigma_Handler(BaseIndicatorHandler):
+    overload_policy = DataMgr_Raw_In_Intervals.COALESCE
+    max_pending_intervals = 4
+    hidden_policy = BaseIndicatorHandler.CATCH_UP
+
     @override
     def __init__(self):
         super().__init__(indicator_update_interval=2)
@@ -14,11 +18,18 @@ class BandPowerRatio_Sigma_Handler(BaseIndicatorHandler):
         self.bands_utils = Bands_Utils(6)
         
         # Initialize data buffer
-        self.bandpwr_percent_data = np.zeros((self.max_epochs_to_show, self.bands_utils.num_bands))
         self.band_curves = []
+        self.allocate_indicator_buffers()
+
+    @override
+    def allocate_indicator_buffers(self):
+        self.bandpwr_percent_data = (
+            np.zeros((self.max_epochs_to_show, self.num_channels, self.bands_utils.num_bands)))
 
     @override
     def create_pyqtgraph_plotWidget(self):
+        import pyqtgraph as pg
+
         self.plot_widget = pg.GraphicsLayoutWidget()
         self.plot_widget.setWindowTitle("Sigma Band (11-16Hz) Power Ratio")
         
@@ -46,11 +57,20 @@ class BandPowerRatio_Sigma_Handler(BaseIndicatorHandler):
         total_power, band_powers_percentage = (
             self.bands_utils.calc_bandpwr_percentage(interval_data, self.stream_sample_freq))
         
-        # Roll and update data buffer
+        # Roll and update data buffer (channels x bands)
         self.bandpwr_percent_data = np.roll(self.bandpwr_percent_data, -1, axis=0)
-        self.bandpwr_percent_data[-1, :] = band_powers_percentage
+        self.bandpwr_percent_data[-1] = band_powers_percentage
         
-        # Update plot
+        # Redraw at the next frame
+        self.mark_dirty()
+
+    @override
+    def latest_results(self):
+        sigma_index = list(self.bands_utils.bands.keys()).index("Sigma")
+        return {"Sigma": self.bandpwr_percent_data[-1, :, sigma_index]}
+
+    @override
+    def redraw_display_channel(self):
         self.update_power_plot()
 
     def update_power_plot(self):
@@ -59,7 +79,7 @@ class BandPowerRatio_Sigma_Handler(BaseIndicatorHandler):
         sigma_index = list(self.bands_utils.bands.keys()).index("Sigma")
         
         if self.band_curves:
-            self.band_curves[0].setData(x_data, self.bandpwr_percent_data[:, sigma_index])
+            self.band_curves[0].setData(x_data, self.bandpwr_percent_data[:, self.display_channel, sigma_index])
 
 if __name__ == '__main__':
     indicator = BandPowerRatio_Sigma_Handler()
@@ -0,0 +1,126 @@
+from typing import override
+import numpy as np
+import pyqtgraph as pg
+from __BaseIndicator import BaseIndicatorHandler
+from __Data_IO_Utils import DataMgr_Raw_In_Intervals
+from __bands.CrossSpectrum_Utils import CrossSpectrum_Utils
+
+class Coherence_Asymmetry_Handler(BaseIndicatorHandler):
+    """
+    Cross-channel coherence and hemispheric asymmetry.
+    Needs a multi-channel stream (e.g. Muse 2016, all channels); every channel pair is computed at once.
+    """
+    overload_policy = DataMgr_Raw_In_Intervals.COALESCE
+    max_pending_intervals = 4
+    hidden_policy = BaseIndicatorHandler.CATCH_UP
+
+    # Left/right channel pairs searched (in order) for the asymmetry index
+    ASYMMETRY_PAIRS = [("AF7", "AF8"), ("F3", "F4"), ("F7", "F8"), ("Fp1", "Fp2"), ("TP9", "TP10")]
+
+    @override
+    def __init__(self):
+        super().__init__(indicator_update_interval=4)
+        self.max_epochs_to_show = 120
+        self.matrix_band = "Alpha"  # Band shown in the coherence matrices
+
+        self.update_sample_freq_state()
+        self.band_names = list(self.cross_spectrum_utils.bands_utils.bands.keys())
+        self.matrix_band_index = self.band_names.index(self.matrix_band)
+        self.allocate_indicator_buffers()
+
+    @override
+    def update_sample_freq_state(self):
+        # 1 s Welch segments with 50% overlap: 7 segments per 4 s interval
+        self.cross_spectrum_utils = CrossSpectrum_Utils(5, self.stream_sample_freq, segment_secs=1.0)
+
+    @override
+    def allocate_indicator_buffers(self):
+        self.coherence = np.eye(self.num_channels)[:, :, None].repeat(len(self.band_names), axis=2)
+        self.imag_coherence = np.zeros_like(self.coherence)
+        self.asymmetry_data = np.full((self.max_epochs_to_show, len(self.band_names)), np.nan)
+
+    @override
+    def create_pyqtgraph_plotWidget(self):
+        self.plot_widget = pg.GraphicsLayoutWidget()
+        self.plot_widget.setWindowTitle("Coherence and Asymmetry")
+
+        # Coherence matrices of the selected band (channel x channel)
+        self.coherence_plot = self.plot_widget.addPlot(row=0, col=0, title=f"{self.matrix_band} Coherence")
+        self.coherence_image = pg.ImageItem(axisOrder='row-major')
+        self.coherence_image.setLookupTable(pg.colormap.get('viridis').getLookupTable(nPts=256))
+        self.coherence_plot.addItem(self.coherence_image)
+
+        self.imag_coherence_plot = self.plot_widget.addPlot(row=0, col=1, title=f"{self.matrix_band} Imaginary Coherence")
+        self.imag_coherence_image = pg.ImageItem(axisOrder='row-major')
+        self.imag_coherence_image.setLookupTable(pg.colormap.get('CET-D1').getLookupTable(nPts=256))
+        self.imag_coherence_plot.addItem(self.imag_coherence_image)
+
+        for plot_item in (self.coherence_plot, self.imag_coherence_plot):
+            plot_item.setAspectLocked(True)
+            plot_item.invertY(True)
+
+        # Asymmetry history, one curve per band
+        self.asymmetry_plot = self.plot_widget.addPlot(row=1, col=0, colspan=2, title="Asymmetry ln(Right) - ln(Left)")
+        bottom_txt = f"TimeSeries (Update Interval = {self.indicator_update_interval} Seconds)"
+        self.asymmetry_plot.setLabel("bottom", bottom_txt)
+        self.asymmetry_plot.showGrid(x=True, y=True)
+        self.asymmetry_plot.addLegend()
+        self.asymmetry_plot.addLine(y=0, pen=pg.mkPen('w', style=pg.QtCore.Qt.PenStyle.DashLine))
+        colors = self.cross_spectrum_utils.bands_utils.colors
+        self.asymmetry_curves = [
+            self.asymmetry_plot.plot(pen=pg.mkPen(color=colors[i], width=3 if name == self.matrix_band else 1), name=name)
+            for i, name in enumerate(self.band_names)
+        ]
+
+        self.update_plot()
+        return self.plot_widget
+
+    @override
+    def process_1_interval_rawdata_and_update_plot(self, interval_data):
+        band_power, self.coherence, self.imag_coherence = (
+            self.cross_spectrum_utils.calc_band_connectivity(interval_data))
+
+        self.asymmetry_data = np.roll(self.asymmetry_data, -1, axis=0)
+        pair = self.find_asymmetry_pair()
+        self.asymmetry_data[-1] = (
+            np.nan if pair is None else self.cross_spectrum_utils.calc_asymmetry(band_power, *pair))
+
+        self.mark_dirty()
+
+    @override
+    def redraw_display_channel(self):
+        # Matrices and asymmetry cover all channels: the displayed channel does not matter
+        self.update_plot()
+
+    def find_asymmetry_pair(self):
+        """
+        Rows of the (left, right) channels used for the asymmetry index.
+        :return: Known electrode pair if present, else the first two rows; None for a single channel.
+        """
+        for left, right in self.ASYMMETRY_PAIRS:
+            if left in self.channel_names and right in self.channel_names:
+                left_row, right_row = self.channel_names.index(left), self.channel_names.index(right)
+                if max(left_row, right_row) < self.num_channels:
+                    return left_row, right_row
+        return (0, 1) if self.num_channels > 1 else None
+
+    def update_plot(self):
+        self.coherence_image.setImage(self.coherence[:, :, self.matrix_band_index], autoLevels=False, levels=(0, 1))
+        self.imag_coherence_image.setImage(self.imag_coherence[:, :, self.matrix_band_index],
+                                           autoLevels=False, levels=(-1, 1))
+
+        # Label matrix rows/columns with channel names when they match the data
+        names = self.channel_names if len(self.channel_names) == self.num_channels else [
+            str(i) for i in range(self.num_channels)]
+        ticks = [[(i + 0.5, name) for i, name in enumerate(names)]]
+        for plot_item in (self.coherence_plot, self.imag_coherence_plot):
+            plot_item.getAxis('left').setTicks(ticks)
+            plot_item.getAxis('bottom').setTicks(ticks)
+
+        x_data = np.arange(self.max_epochs_to_show)
+        for i, curve in enumerate(self.asymmetry_curves):
+            curve.setData(x_data, self.asymmetry_data[:, i], connect='finite')
+
+if __name__ == '__main__':
+    indicator = Coherence_Asymmetry_Handler()
+    indicator.test_current_indicator_with_simulated_data()
@@ -3,9 +3,14 @@ import numpy as np
 import pyqtgraph as pg
 import pywt
 from __BaseIndicator import BaseIndicatorHandler
+from __Data_IO_Utils import DataMgr_Raw_In_Intervals
 
 
 class WaveletCWT_Handler(BaseIndicatorHandler):
+    overload_policy = DataMgr_Raw_In_Intervals.COALESCE
+    max_pending_intervals = 4
+    hidden_policy = BaseIndicatorHandler.CATCH_UP
+
     @override
     def __init__(self):
         super().__init__(indicator_update_interval=2)
@@ -13,12 +18,17 @@ class WaveletCWT_Handler(BaseIndicatorHandler):
         # Initialize heatmap data
         self.num_frequencies = 128  # Frequency resolution (number of scales in CWT)
         self.heatmap_columns = 60  # Time window width (number of columns) for the heatmap
-        self.grey_heatmap_data = np.zeros((self.num_frequencies, self.heatmap_columns), dtype=np.float32)  # Single-channel grayscale
+        self.allocate_indicator_buffers()
 
         # Select wavelet
         self.wavelet = 'cmor1.5-1.0'  # Define Morse wavelet with bandwidth and center frequency
         self.init_completed = True
 
+    @override
+    def allocate_indicator_buffers(self):
+        # One grayscale heatmap per channel (channels x frequencies x columns)
+        self.grey_heatmap_data = np.zeros((self.num_channels, self.num_frequencies, self.heatmap_columns), dtype=np.float32)
+
     @override
     def create_pyqtgraph_plotWidget(self):
         # Create the heatmap display window
@@ -34,7 +44,7 @@ class WaveletCWT_Handler(BaseIndicatorHandler):
         plot_item.setLabel("left", "Frequency (Hz)")
 
         # Initialize heatmap with data
-        self.heatmap_widget.setImage(self.grey_heatmap_data, autoLevels=True)
+        self.heatmap_widget.setImage(self.grey_heatmap_data[self.display_channel], autoLevels=True)
 
         # Create a green colormap
         green_cmap = pg.ColorMap(
@@ -58,39 +68,43 @@ class WaveletCWT_Handler(BaseIndicatorHandler):
     def compute_cwt(self, signal):
         """
         Perform Continuous Wavelet Transform (CWT) to analyze the signal in the time-frequency domain
-        :param signal: Input signal (1D array)
-        :return: Spectrum intensity from the CWT (2D array)
+        :param signal: Input signal (channels x samples)
+        :return: Spectrum intensity from the CWT (scales x channels x samples)
         """
         # Define the range of wavelet scales to cover the frequency range
         sampling_rate = self.stream_sample_freq  # Assume sampling rate is 256 Hz
         frequencies = np.linspace(1, self.num_frequencies, self.num_frequencies)
         scales = pywt.scale2frequency(self.wavelet, frequencies) * sampling_rate
 
-        # Perform the CWT using pywt.cwt
-        cwt_coefficients, _ = pywt.cwt(signal, scales, self.wavelet, sampling_period=1/sampling_rate)
+        # Perform the CWT of all channels at once using pywt.cwt: (scales x channels x samples)
+        cwt_coefficients, _ = pywt.cwt(signal, scales, self.wavelet, sampling_period=1/sampling_rate, axis=-1)
 
         # Compute spectrum intensity (absolute values)
         spectrum_intensity = np.abs(cwt_coefficients)
 
-        # Normalize to the range [0, 1]
-        normalized_intensity = spectrum_intensity / np.max(spectrum_intensity)
+        # Normalize each channel to the range [0, 1]
+        normalized_intensity = spectrum_intensity / np.max(spectrum_intensity, axis=(0, 2), keepdims=True)
         return normalized_intensity
 
     def update_heatmap(self, new_column):
         """
         Perform a rolling update of the heatmap data
-        :param new_column: Spectrum intensity data from the CWT (2D array)
+        :param new_column: Spectrum intensity data from the CWT (scales x channels x samples)
         """
-        compressed_column = np.mean(new_column, axis=1)  # Compress to 1D (average across the axis)
+        compressed_column = np.mean(new_column, axis=-1).T  # Compress to (channels x scales) (average across time)
 
         # Roll the grey_heatmap_data to update the leftmost column
-        self.grey_heatmap_data = np.roll(self.grey_heatmap_data, shift=-1, axis=1)
+        self.grey_heatmap_data = np.roll(self.grey_heatmap_data, shift=-1, axis=2)
 
         # Insert the new column (latest data at the rightmost position)
-        self.grey_heatmap_data[:, -1] = compressed_column
+        self.grey_heatmap_data[:, :, -1] = compressed_column
 
+        self.mark_dirty()
+
+    @override
+    def redraw_display_channel(self):
         # Update the heatmap display
-        self.heatmap_widget.setImage(self.grey_heatmap_data, autoLevels=False, levels=(0, 1))
+        self.heatmap_widget.setImage(self.grey_heatmap_data[self.display_channel], autoLevels=False, levels=(0, 1))
 
 if __name__ == '__main__':
     indicator = WaveletCWT_Handler()
@@ -4,12 +4,25 @@ import numpy as np
 import pyqtgraph as pg
 
 from __BaseIndicator import BaseIndicatorHandler
+from __Data_IO_Utils import DataMgr_Raw_In_Intervals
 
 class PowerSpectrum_Handler_Histogram(BaseIndicatorHandler):
+    overload_policy = DataMgr_Raw_In_Intervals.SKIP_TO_LATEST
+    hidden_policy = BaseIndicatorHandler.SUSPEND
+
     @override
     def __init__(self):
         super().__init__(indicator_update_interval=2)
-        self.bar_item = None  # Used to store the current bar chart object
+        self.bar_item = None  # Bar chart, created once and updated in place
+        self.update_sample_freq_state()
+
+    @override
+    def update_sample_freq_state(self):
+        n = self.interval_rawdata_len
+        self.freqs = np.fft.rfftfreq(n, d=1.0 / self.stream_sample_freq)[:n // 2]
+        self.log_power_spectrum = None  # Latest spectrum of every channel (channels x freqs)
+        if self.bar_item is not None:
+            self.bar_item.setOpts(x=self.freqs, height=np.zeros_like(self.freqs))
 
     @override
     def create_pyqtgraph_plotWidget(self):
@@ -17,25 +30,31 @@ class PowerSpectrum_Handler_Histogram(BaseIndicatorHandler):
         self.plot_widget.showGrid(x=True, y=True)
         self.plot_widget.setLabels(left='Power', bottom='Frequency (Hz)')
         self.plot_widget.setLogMode(x=False, y=True)
+
+        self.bar_item = pg.BarGraphItem(x=self.freqs, height=np.zeros_like(self.freqs), width=0.5, brush='b')
+        self.plot_widget.addItem(self.bar_item)
         return self.plot_widget
 
     @override
     def process_1_interval_rawdata_and_update_plot(self, interval_data):
-        # Compute the power spectrum
-        fft_data = np.fft.fft(interval_data)
-        power_spectrum = np.abs(fft_data[:len(fft_data) // 2]) ** 2
-        power_spectrum = np.log10(power_spectrum + 1e-8)  # Convert to a logarithmic scale to avoid log(0) issues
-        freqs = np.fft.fftfreq(len(interval_data), d=1.0 / self.stream_sample_freq)
-        freqs = freqs[:len(freqs) // 2]
-
-        # Clear the old bar chart
-        if self.bar_item is not None:
-            self.plot_widget.removeItem(self.bar_item)
+        # Compute the power spectrum of all channels at once
+        n = interval_data.shape[-1]
+        fft_data = np.fft.rfft(interval_data, axis=-1)[:, :n // 2]
+        power_spectrum = np.abs(fft_data) ** 2
+        self.log_power_spectrum = np.log10(power_spectrum + 1e-8)  # Convert to a logarithmic scale to avoid log(0) issues
+
+        self.mark_dirty()
 
-        # Plot the power spectrum using a bar chart
-        self.bar_item = pg.BarGraphItem(x=freqs, height=power_spectrum, width=0.5, brush='b')
+    @override
+    def redraw_display_channel(self):
+        if self.log_power_spectrum is not None:
+            self.update_bar_plot()
+
+    def update_bar_plot(self):
+        """Draw the spectrum of the displayed channel"""
+        # Update the bar heights in place (no new graphics item per interval)
+        self.bar_item.setOpts(height=self.log_power_spectrum[self.display_channel])
         # self.plot_widget.setYRange(-2, 5)  # Adjust the y-range based on the actual power spectrum range
-        self.plot_widget.addItem(self.bar_item)
 
 if __name__ == '__main__':
     indicator = PowerSpectrum_Handler_Histogram()
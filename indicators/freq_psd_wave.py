@@ -3,11 +3,22 @@ from typing import override
 import numpy as np
 import pyqtgraph as pg
 from __BaseIndicator import BaseIndicatorHandler
+from __Data_IO_Utils import DataMgr_Raw_In_Intervals
 
 class PowerSpectrumHandler_Wave(BaseIndicatorHandler):
+    overload_policy = DataMgr_Raw_In_Intervals.SKIP_TO_LATEST
+    hidden_policy = BaseIndicatorHandler.SUSPEND
+
     @override
     def __init__(self):
         super().__init__(indicator_update_interval=1)
+        self.update_sample_freq_state()
+
+    @override
+    def update_sample_freq_state(self):
+        n = self.interval_rawdata_len
+        self.freqs = np.fft.rfftfreq(n, d=1.0 / self.stream_sample_freq)[:n // 2]
+        self.power_spectrum = None  # Latest spectrum of every channel (channels x freqs)
 
     @override
     def create_pyqtgraph_plotWidget(self):
@@ -51,12 +62,17 @@ class PowerSpectrumHandler_Wave(BaseIndicatorHandler):
 
     @override
     def process_1_interval_rawdata_and_update_plot(self, interval_data):
-        fft_data = np.fft.fft(interval_data)
-        power_spectrum = np.abs(fft_data[:len(fft_data) // 2]) ** 2
-        freqs = np.fft.fftfreq(len(interval_data), d=1.0 / self.stream_sample_freq)
-        freqs = freqs[:len(freqs) // 2]
+        # Spectrum of all channels at once
+        n = interval_data.shape[-1]
+        fft_data = np.fft.rfft(interval_data, axis=-1)[:, :n // 2]
+        self.power_spectrum = np.abs(fft_data) ** 2
 
-        self.plotted_wave.setData(freqs, power_spectrum)
+        self.mark_dirty()
+
+    @override
+    def redraw_display_channel(self):
+        if self.power_spectrum is not None:
+            self.plotted_wave.setData(self.freqs, self.power_spectrum[self.display_channel])
 
 
 
@@ -1,51 +1,63 @@
+import logging
+from collections import deque
 from typing import override
 import numpy as np
-import pyqtgraph as pg
-import pathlib, importlib
-
-global torch  # Deferred loading due to high initialization cost
-global resample  # Deferred loading due to high initialization cost
 
 from __BaseIndicator import BaseIndicatorHandler
+from __Data_IO_Utils import DataMgr_Raw_In_Intervals
+from __Resample_Utils import Polyphase_Resampler
 
-from __sleep_staging.EmbedSleepNet_model_arch import EmbedSleepNet  # Assume model file is in the same directory or already in the path
+# torch and the model live in a separate process, shared by all staging handlers
+from __sleep_staging.EmbedSleepNet_Inference_Service import EmbedSleepNet_Inference_Client, EPOCH_LEN
 
 
 class EmbedSleepNet_Staging_Handler(BaseIndicatorHandler):
+    overload_policy = DataMgr_Raw_In_Intervals.QUEUE
+    max_pending_intervals = 4
+    essential = True  # Staging goes on in low-power mode, e.g. overnight
+
     @override
     def __init__(self):
         super().__init__(indicator_update_interval=30)
 
-        # Deferred model loading
-        self.model = None
-        self.device = None
+        self.update_sample_freq_state()
+        self.allocate_channel_buffers()
+
+        # Deferred connection to the inference service
+        self.inference_client = None
+        self.pending_inferences = deque()  # Futures of submitted epochs, in submission order
 
         # Initialize heatmap data
         self.num_stages = 5  # Number of sleep stages in classification
         self.heatmap_columns = 60
-        # Create an RGB heatmap data buffer
-        self.rgb_heatmap_data = np.zeros((self.num_stages, self.heatmap_columns, 3), dtype=np.uint8)
+        self.allocate_indicator_buffers()
 
         # Sleep stage labels (in order: Wake, REM, N1, N2, N3)
         self.sleep_stage_labels = ["Wake", "REM", "N1", "N2", "N3"]
         self.init_completed = False
 
-    def load_model(self):
-        """Deferred model loading"""
-        global torch, resample
+    @override
+    def update_sample_freq_state(self):
+        # The model expects 30 s epochs at 100 Hz: resample the stream continuously as chunks arrive,
+        # and cut epochs from the resampled stream instead of the raw one
+        self.resampler = Polyphase_Resampler(self.stream_sample_freq, EPOCH_LEN // self.indicator_update_interval)
+        self.interval_rawdata_len = EPOCH_LEN
 
-        torch = importlib.import_module("torch")
-        resample = importlib.import_module('scipy.signal').resample
+    @override
+    def allocate_indicator_buffers(self):
+        # Create an RGB heatmap data buffer per channel (channels x stages x columns x RGB)
+        self.rgb_heatmap_data = np.zeros((self.num_channels, self.num_stages, self.heatmap_columns, 3), dtype=np.uint8)
+        self.latest_stage_probs = None  # Newest epoch's probabilities (channels x stages, label order)
+        self.pending_inferences.clear()  # Results of the old channel layout no longer fit
 
-        self.model = EmbedSleepNet()
-        model_path = pathlib.Path(__file__).parent / '__sleep_staging/EmbedSleepNet_model_binary.pth'
-        self.model.load_state_dict(torch.load(model_path, map_location='cpu', weights_only=True))
-        self.model.eval()
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model.to(self.device)
+    def connect_inference_service(self):
+        """Deferred connection to the shared inference service"""
+        self.inference_client = EmbedSleepNet_Inference_Client.get_shared_client()
 
     @override
     def create_pyqtgraph_plotWidget(self):
+        import pyqtgraph as pg  # Staging also runs without a GUI (headless recorder)
+
         # Create the heatmap display window
         self.plot_layout = pg.GraphicsLayoutWidget()
         self.plot_layout.setWindowTitle("Heatmap Graph")
@@ -65,7 +77,7 @@ class EmbedSleepNet_Staging_Handler(BaseIndicatorHandler):
         self.heatmap_widget.setTransform(transform)
 
         # Set initial heatmap data
-        self.heatmap_widget.setImage(self.rgb_heatmap_data, autoLevels=False, levels=(0, 255))
+        self.heatmap_widget.setImage(self.rgb_heatmap_data[self.display_channel], autoLevels=False, levels=(0, 255))
 
         # Set Y-axis tick labels and center-align them
         y_ticks = [(i + 0.5, label) for i, label in enumerate(reversed(self.sleep_stage_labels))]
@@ -73,56 +85,76 @@ class EmbedSleepNet_Staging_Handler(BaseIndicatorHandler):
 
         return self.plot_layout
 
+    @override
+    def process_new_data_and_update_plot(self, data_arrived):
+        # Draw stages whose inference finished since the last call, then handle the new data
+        self.collect_finished_inferences()
+        super().process_new_data_and_update_plot(self.resampler.process(data_arrived))
+
     @override
     def process_1_interval_rawdata_and_update_plot(self, interval_data):
-        # Deferred model loading to improve application startup performance
+        # Deferred service connection to improve application startup performance
         if not self.init_completed:
-            self.load_model()
+            self.connect_inference_service()
             self.init_completed = True
 
-        # Downsample to 3000 points
-        resampled_data = resample(interval_data, 3000)
+        # interval_data is already a 3000-point epoch of the resampled stream, one row per channel;
+        # all channels go in one request. Inference runs asynchronously, the result is drawn by
+        # collect_finished_inferences()
+        self.pending_inferences.append(self.inference_client.submit(interval_data))
 
-        # Prepare data for model inference
-        input_data = torch.tensor(resampled_data, dtype=torch.float32).view(1, 1, 1, 3000)
-        input_data = input_data.to(self.device)
+    def collect_finished_inferences(self):
+        """Update the heatmap with every finished inference, keeping epoch order"""
+        while self.pending_inferences and self.pending_inferences[0].done():
+            future = self.pending_inferences.popleft()
+            try:
+                softmax_output = future.result()  # (channels x classes)
+            except Exception as e:
+                logging.error(f"EmbedSleepNet_Staging_Handler: inference failed: {e}")
+                continue
 
-        # Perform model inference
-        with torch.no_grad():
-            output = self.model(input_data)
+            # Reorder output to: Wake(0), REM(4), N1(1), N2(2), N3(3)
+            reordered_output = softmax_output[:, [0, 4, 1, 2, 3]]
 
-        softmax_output = torch.softmax(output, dim=2).squeeze().cpu().numpy()  # 1D array
-
-        # Reorder output to: Wake(0), REM(4), N1(1), N2(2), N3(3)
-        reordered_output = softmax_output[[0, 4, 1, 2, 3]]
-
-        # Update the heatmap data
-        self.update_heatmap(reordered_output)
+            # Update the heatmap data
+            self.update_heatmap(reordered_output)
 
     def update_heatmap(self, new_column):
         """
         Update the heatmap data using a rolling mechanism.
-        :param new_column: Model's softmax output (1D array with length equal to num_classes)
+        :param new_column: Model's softmax output (EEG channels x num_classes)
         """
+        self.latest_stage_probs = new_column
+
         # Normalize new_column to the range 0-255
         normalized_data = (new_column * 255).astype(np.uint8)
 
         # Roll the rgb_heatmap_data to update the last column
-        self.rgb_heatmap_data = np.roll(self.rgb_heatmap_data, shift=-1, axis=1)  # Roll columns
+        self.rgb_heatmap_data = np.roll(self.rgb_heatmap_data, shift=-1, axis=2)  # Roll columns
+
+        # Copy normalized data to the end of each color channel, for all EEG channels
+        self.rgb_heatmap_data[:, :, -1, :] = normalized_data[:, :, None]
 
-        # Copy normalized data to the end of each channel
-        self.rgb_heatmap_data[:, -1, 0] = normalized_data  # Red channel
-        self.rgb_heatmap_data[:, -1, 1] = normalized_data  # Green channel
-        self.rgb_heatmap_data[:, -1, 2] = normalized_data  # Blue channel
+        max_pos = np.argmax(normalized_data, axis=1)  # Index of the maximum value per EEG channel
+        max_value = normalized_data[np.arange(len(max_pos)), max_pos].astype(int)
 
-        max_pos = np.argmax(normalized_data)  # Get the index of the maximum value
-        max_value = normalized_data[max_pos].item()  # Get the maximum value as a scalar
+        # Update the blue channel with enhanced intensity
+        self.rgb_heatmap_data[np.arange(len(max_pos)), max_pos, -1, 2] = np.minimum(max_value + 122, 255)  # Ensure it does not exceed 255
 
-        # Update the red channel with enhanced intensity
-        self.rgb_heatmap_data[max_pos, -1, 2] = min(max_value + 122, 255)  # Ensure it does not exceed 255
+        self.mark_dirty()
 
+    @override
+    def latest_results(self):
+        if self.latest_stage_probs is None:
+            return None
+        results = {"stage": np.asarray(self.sleep_stage_labels)[np.argmax(self.latest_stage_probs, axis=1)]}
+        results.update(zip(self.sleep_stage_labels, self.latest_stage_probs.T))
+        return results
+
+    @override
+    def redraw_display_channel(self):
         # Update heatmap display
-        self.heatmap_widget.setImage(self.rgb_heatmap_data, autoLevels=False, levels=(0, 255))
+        self.heatmap_widget.setImage(self.rgb_heatmap_data[self.display_channel], autoLevels=False, levels=(0, 255))
 
 
 if __name__ == '__main__':
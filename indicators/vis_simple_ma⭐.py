@@ -4,15 +4,22 @@ from typing import override
 import numpy as np
 import pyqtgraph as pg
 from __BaseIndicator import BaseIndicatorHandler
+from __Resample_Utils import Polyphase_Resampler
 
 class Simple_Waveform_MA_Handler(BaseIndicatorHandler):
     @override
     def __init__(self):
         super().__init__(indicator_update_interval=0.1, indicator_wave_columns=200)
+        self.update_sample_freq_state()
+
+    @override
+    def update_sample_freq_state(self):
+        # Anti-aliased decimation to one point per update interval, applied to chunks as they arrive
+        self.decimator = Polyphase_Resampler(self.stream_sample_freq, round(1 / self.indicator_update_interval))
 
     @override
     def create_pyqtgraph_plotWidget(self):
-        self.plot_widget = pg.PlotWidget(title="Waveform Down-Sampled with Averaging")
+        self.plot_widget = pg.PlotWidget(title="Waveform Down-Sampled with Anti-Aliasing")
         self.plot_widget.showGrid(x=True, y=True)
         self.plot_widget.setLabels(left='Amplitude (μV)')
         buttom_txt = f"TimeSeries (Update Interval = {self.indicator_update_interval} Seconds)"
@@ -23,13 +30,23 @@ class Simple_Waveform_MA_Handler(BaseIndicatorHandler):
         return self.plot_widget
 
     @override
-    def process_1_interval_rawdata_and_update_plot(self, interval_data):
-        logging.debug(f"Simple_Waveform_MA_Handler: sliced_data rcvd {interval_data.shape}")
-        
-        avg_value = np.mean(interval_data)
-        self.waveDataIn1D_mgr.append(avg_value)
-   
-        self.plotted_wave.setData(self.waveDataIn1D_mgr.buf)
+    def process_new_data_and_update_plot(self, data_arrived):
+        """
+        Note: like vis_simple_raw, this indicator does not use `intervalsData_mgr`.
+        The decimator already yields one point per update interval.
+        """
+        decimated = self.decimator.process(self.as_channels_x_samples(data_arrived))
+        if decimated.size == 0:
+            return
+
+        logging.debug(f"Simple_Waveform_MA_Handler: decimated data rcvd {decimated.shape}")
+        self.waveDataIn1D_mgr.append(decimated)
+
+        self.mark_dirty()
+
+    @override
+    def redraw_display_channel(self):
+        self.plotted_wave.setData(self.waveDataIn1D_mgr.buf[self.display_channel])
 
 if __name__ == '__main__':
     indicator = Simple_Waveform_MA_Handler()
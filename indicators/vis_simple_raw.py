@@ -3,14 +3,30 @@ from typing import override
 import numpy as np
 import pyqtgraph as pg
 from __BaseIndicator import BaseIndicatorHandler
+from __Data_IO_Utils import DataMgr_MinMax_Pyramid
 
 class Simple_Waveform_Raw_Handler(BaseIndicatorHandler):
-    """Real-time EEG waveform processing module"""
+    """
+    Real-time EEG waveform processing module.
+    Samples are kept in a min/max pyramid: each redraw draws about one min/max pair per horizontal pixel
+    of the visible range (exact samples when zoomed in), so the window length does not cost drawing time.
+    """
+    window_secs = 30
 
     @override
     def __init__(self):
-        super().__init__(indicator_update_interval=0.1, indicator_wave_columns=2000)
-        # Note: The parameter `indicator_update_interval` is not actually used, only `indicator_graph_columns` is utilized.
+        super().__init__(indicator_update_interval=0.1)
+        # Note: The parameter `indicator_update_interval` is not actually used.
+        self.update_sample_freq_state()
+        self.allocate_indicator_buffers()
+
+    @override
+    def update_sample_freq_state(self):
+        self.window_len = int(self.window_secs * self.stream_sample_freq)
+
+    @override
+    def allocate_indicator_buffers(self):
+        self.wave_pyramid = DataMgr_MinMax_Pyramid(self.window_len, self.num_channels)
 
     @override
     def create_pyqtgraph_plotWidget(self):
@@ -24,6 +40,14 @@ class Simple_Waveform_Raw_Handler(BaseIndicatorHandler):
         self.plot_widget.getViewBox().setMouseEnabled(x=True, y=False)
         
         self.plotted_wave = self.plot_widget.plot(pen='y')  # Plot the curve
+
+        # Zooming or resizing changes the level of detail
+        view_box = self.plot_widget.getViewBox()
+        view_box.setLimits(xMin=0, xMax=self.window_secs)
+        view_box.setXRange(0, self.window_secs, padding=0)
+        view_box.setAutoVisible(y=True)
+        view_box.sigXRangeChanged.connect(lambda *_: self.mark_dirty())
+        view_box.sigResized.connect(lambda *_: self.mark_dirty())
         return self.plot_widget
 
     @override
@@ -34,14 +58,22 @@ class Simple_Waveform_Raw_Handler(BaseIndicatorHandler):
         As a result, it does not use `rawDataInEpochs_Mgr`.
         Be cautious when using this indicator file as a template.
         """
-        # Update the buffer
-        self.waveDataIn1D_mgr.append(data_arrived)
-        indicator_wave_columns = self.waveDataIn1D_mgr.buf_len
-        # Compute the time axis based on the sampling frequency
-        time_axis = np.arange(indicator_wave_columns) / self.stream_sample_freq  # Time axis (seconds)
-
-        # Update the curve
-        self.plotted_wave.setData(time_axis, self.waveDataIn1D_mgr.buf)  # Use the time axis as x data
+        # Update the buffer (all channels); normalize first, it may reallocate the buffer
+        data = self.as_channels_x_samples(data_arrived)
+        self.wave_pyramid.append(data)
+        self.mark_dirty()
+
+    @override
+    def redraw_display_channel(self):
+        # Visible part of the window, in samples, and the number of pixels to fill
+        view_box = self.plot_widget.getViewBox()
+        x_min, x_max = view_box.viewRange()[0]
+        first = int(np.floor(x_min * self.stream_sample_freq))
+        last = int(np.ceil(x_max * self.stream_sample_freq)) + 1
+        x, y = self.wave_pyramid.envelope(self.display_channel, first, last, max(int(view_box.width()), 100))
+
+        # Update the curve; x in seconds
+        self.plotted_wave.setData(x / self.stream_sample_freq, y)
 
 
 if __name__ == '__main__':
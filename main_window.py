@@ -1,22 +1,40 @@
 import inspect
+import json
+import logging
 import os
-import sys
-import importlib.util
 import traceback
 import time
 import argparse
+from datetime import datetime
 
 from pyqtgraph.Qt import QtWidgets, QtCore
 import pyqtgraph.dockarea as pg_dockarea
 from GUIComp_StreamMgmt import EEGStreamManager
+from GUIComp_IndicatorRegistry import IndicatorRegistry
+from GUIComp_Latency import LatencyTracker, PaintWatcher
+from GUIComp_Metrics import MetricsHTTPServer
+from GUIComp_Power import ScreenLockMonitor
+from GUIComp_Profiler import ProfileCapture
+from GUIComp_Render import RenderScheduler
+from GUIComp_Watchdog import StallWatchdog
+from GUIComp_Utils import GUI_Utils
 
+MODULES_IMPORTED_AT = time.time()  # Startup timing (see startup_benchmark.py)
 
 
 class MainWindow(QtWidgets.QMainWindow):
     """Main Window Class"""
 
-    def __init__(self, debug_mode=False):
+    def __init__(self, debug_mode=False, render_fps=20, startup_report=False, preload_indicators=()):
+        """
+        :param startup_report: Print the startup phase times (JSON) and quit once ready, for startup_benchmark.py.
+        :param preload_indicators: Indicator files loaded in the background once the window is shown.
+        """
         self.debug_mode = debug_mode
+        self.render_fps = render_fps
+        self.preload_indicators = list(preload_indicators)
+        self.startup_report = startup_report
+        self.startup_times = {"imports": MODULES_IMPORTED_AT}  # {phase: time.time() when it ended}
 
         super().__init__()
         self.setWindowTitle("Real-TIme Single-Channel EEG Explorer")
@@ -28,6 +46,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.init_layout()
 
         self.init_toolbar()
+        self.init_stall_watchdog()
+        self.startup_times["window_built"] = time.time()
 
     # ------------------------ Initialization ------------------------
 
@@ -35,15 +55,43 @@ class MainWindow(QtWidgets.QMainWindow):
         """Initialize state variables"""
         self.stream_mgr: EEGStreamManager
 
+        # Indicator classes and metadata, cached per file version (see GUIComp_IndicatorRegistry)
+        self.indicator_registry = IndicatorRegistry("indicators")
+        self.tree_file_names = []  # Indicator files listed in the file browser
+
+        # Open indicator files are watched and hot-reloaded when saved; new and deleted files update the tree
+        self.indicator_watcher = QtCore.QFileSystemWatcher(self)
+        self.indicator_watcher.addPath(self.indicator_registry.indicators_dir)
+        self.indicator_watcher.fileChanged.connect(self.on_indicator_files_changed)
+        self.indicator_watcher.directoryChanged.connect(self.on_indicator_files_changed)
+        self.indicator_reload_timer = QtCore.QTimer(self)
+        self.indicator_reload_timer.setSingleShot(True)
+        self.indicator_reload_timer.setInterval(300)
+        self.indicator_reload_timer.timeout.connect(self.reload_changed_indicators)
+
         # Store loaded indicator modules
         self.loaded_indicators = []
 
         self.loaded_docks = {}  # {file_name: (dock, indicator_handler)}
 
+        self.channel_selectors = {}  # {file_name: QComboBox choosing the displayed channel}
+
+        self.latency_overlays = {}  # {file_name: QLabel showing the indicator's latency on its plot}
+        self.behind_markers = {}  # {file_name: QLabel shown on the plot while the indicator falls behind}
+        self.dropped_intervals_seen = {}  # {file_name: dropped interval count at the last check}
+        self.latency_overlay_visible = False
+
+        self.metrics_overlay = None  # QLabel summarizing the metrics over the dock area
+        self.metrics_server = None  # MetricsHTTPServer while serving on localhost
+        self.previous_compute_secs = {}  # {indicator: compute time sum at the last overlay refresh}
+
+        self.low_power = False  # Low-power mode: see set_low_power()
+        self.low_power_auto = False  # Whether low-power mode was switched on automatically (screen locked, minimized)
+
     def init_status_bar(self):
         """Initialize the status bar"""
         self.status_bar = self.statusBar()
-        self.status_bar.showMessage("Status: Ready")
+        self.status_bar.showMessage("Status: Starting...")
 
     def init_layout(self):
         """Initialize layout and Dock"""
@@ -62,8 +110,12 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Initialize stream manager only
         self.stream_mgr = EEGStreamManager(self, self.debug_mode)  # Stream management functionality
+        self.render_scheduler = RenderScheduler(self.render_fps, self.stream_mgr.metrics)  # Draws all docks
         self.stream_mgr.add_conn_menu_on_toolbar(tool_bar)
         self.stream_mgr.add_record_menu_on_toolbar(tool_bar)
+        self.add_profiler_menu_on_toolbar(tool_bar)
+        self.add_latency_menu_on_toolbar(tool_bar)
+        self.add_power_menu_on_toolbar(tool_bar)
 
         # Add a spacer to push the GitHub link to the right
         spacer = QtWidgets.QWidget()
@@ -98,6 +150,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.file_tree.itemDoubleClicked.connect(self.on_tree_item_double_clicked)
         self.file_tree.itemSelectionChanged.connect(self.update_load_button_state)
         self.file_tree.setAnimated(True)  # Enable animation for expansion
+        self.file_tree.setMouseTracking(True)  # itemEntered: tooltips reflect what the registry learned so far
+        self.file_tree.itemEntered.connect(self.update_tree_item_tooltip)
 
         # Define the load button
         self.load_button = QtWidgets.QPushButton("Load Indicator")  # Initialize button
@@ -136,7 +190,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.load_button.setEnabled(os.path.isfile(path))
 
     def build_file_tree(self):
-        """Build the directory tree structure"""
+        """Build the directory tree structure from the indicator registry"""
         self.file_tree.clear()
         indicators_dir = "indicators"
 
@@ -144,33 +198,32 @@ class MainWindow(QtWidgets.QMainWindow):
             self.status_bar.showMessage("Status: Indicator folder not found")
             return
 
-        # Recursively scan the directory
-        root_item = self.create_tree_item(indicators_dir, is_dir=True)
+        self.tree_file_names = self.indicator_registry.scan()
+        root_item = self.create_tree_item(indicators_dir)
+        folders = {"": root_item}  # {relative folder path: item}
+        for file_name in self.tree_file_names:
+            folder = ""
+            for part in file_name.split("/")[:-1]:
+                parent, folder = folders[folder], f"{folder}{part}/"
+                if folder not in folders:
+                    folders[folder] = self.create_tree_item(os.path.join(indicators_dir, folder[:-1]))
+                    parent.addChild(folders[folder])
+            folders[folder].addChild(self.create_tree_item(os.path.join(indicators_dir, file_name)))
         self.file_tree.addTopLevelItem(root_item)
         self.file_tree.expandAll()  # Expand all nodes by default
 
-    def create_tree_item(self, path, parent=None, is_dir=False):
-        """Recursively create tree nodes"""
-        name = os.path.basename(path)
-        item = QtWidgets.QTreeWidgetItem([name])
+    def create_tree_item(self, path):
+        """Create a tree node"""
+        item = QtWidgets.QTreeWidgetItem([os.path.basename(path)])
         item.setData(0, QtCore.Qt.ItemDataRole.UserRole, path)  # Store the complete path
-
-        if is_dir:
-            # item.setIcon(0, self.folder_icon)
-            # Add child nodes
-            for entry in os.listdir(path):
-                full_path = os.path.join(path, entry)
-                if os.path.isdir(full_path) and not entry.startswith("__"):
-                    child = self.create_tree_item(full_path, item, is_dir=True)
-                    item.addChild(child)
-                elif entry.endswith(".py") and not entry.startswith("__"):
-                    child = self.create_tree_item(full_path, item)
-                    item.addChild(child)
-        # else:
-        # item.setIcon(0, self.file_icon)
-
         return item
 
+    def update_tree_item_tooltip(self, item, column):
+        """Tooltip of an indicator file: class, settings, interval and buffer sizes, imports (once loaded)"""
+        path = item.data(0, QtCore.Qt.ItemDataRole.UserRole)
+        if os.path.isfile(path):
+            item.setToolTip(0, self.indicator_registry.entry(os.path.relpath(path, "indicators")).describe())
+
     def load_selected_indicator(self):
         """Load the selected indicator file"""
         selected_items = self.file_tree.selectedItems()
@@ -179,97 +232,499 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         for item in selected_items:
-            file_name = item.text(0)
-            self.load_indicator_module(file_name)
+            path = item.data(0, QtCore.Qt.ItemDataRole.UserRole)
+            self.load_indicator_module(os.path.relpath(path, "indicators"))
 
     def load_indicator_module(self, file_name):
-        """Dynamically load an indicator module and create a new Dock on the right"""
+        """Create a new Dock on the right for an indicator file, or close its Dock if it is already loaded"""
+        if file_name in self.loaded_docks:
+            dock, _ = self.loaded_docks[file_name]
+            dock.close()  # Trigger Dock's close behavior
+            return
+        self.open_indicator_dock(file_name)
+
+    def open_indicator_dock(self, file_name, session=None, position=("top",)):
+        """
+        Instantiate the indicator of a file (through the registry: the module is executed only once
+        per version of the file) and show it in a new Dock.
+        :param session: Stream feeding it, default: the active one.
+        :param position: DockArea.addDock() placement, e.g. ("above", dock) to put it in the tab of another Dock.
+        """
         try:
-            indicators_dir = os.path.join(os.getcwd(), "indicators")
-
-            # Add the indicators directory to sys.path if it is not already present
-            if indicators_dir not in sys.path:
-                sys.path.insert(0, indicators_dir)
-
-            module_name = file_name[:-3]  # Remove the `.py` suffix
-            module_path = os.path.join(indicators_dir, file_name)
-
-            # Check if the module has already been loaded
-            if file_name in self.loaded_docks:
-                # If the module is already loaded, invoke the close method
-                dock, _ = self.loaded_docks[file_name]
-                dock.close()  # Trigger Dock's close behavior
-                return
-
-            # Dynamically load the module
-            spec = importlib.util.spec_from_file_location(module_name, module_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-
-            # Get all classes in the module
-            classes = [
-                obj for _, obj in inspect.getmembers(module, inspect.isclass)
-                if obj.__module__ == module_name  # Ensure the class is defined in the module
-            ]
-
-            if not classes:
-                self.status_bar.showMessage(f"Status: No classes found")
-                return
-
-            # Find the first class that implements the process_data_and_update_plot interface
-            IndicatorClass = next(
-                (cls for cls in classes if
-                 hasattr(cls, "process_new_data_and_update_plot") and callable(
-                     getattr(cls, "process_new_data_and_update_plot"))),
-                None
-            )
-
-            if not IndicatorClass:
-                self.status_bar.showMessage(f"Status: No class found implementing process_new_data_and_update_plot")
-                return
-
-            self.status_bar.showMessage(f"Status: Found class {IndicatorClass.__name__}")
-
-            indicator_handler = IndicatorClass()
+            entry = self.indicator_registry.entry(file_name)
+            module_name = entry.module_name
+            indicator_handler = self.indicator_registry.create(file_name)
+            self.status_bar.showMessage(f"Status: Found class {type(indicator_handler).__name__}")
 
             # Create the plotting widget
             plot_widget = indicator_handler.create_pyqtgraph_plotWidget()
+            self.attach_latency_tracker(file_name, indicator_handler, plot_widget)
+            self.attach_behind_marker(file_name, indicator_handler, plot_widget)
+            self.render_scheduler.add(indicator_handler, module_name, lambda: self.is_plot_visible(plot_widget))
+            self.stall_watchdog.watch_module(module_name, entry.path)
 
             # Create a new Dock
             new_dock = pg_dockarea.Dock(file_name, size=(1, 1))  # Set Dock title as file name
             new_dock.setTitle(module_name)
+
+            # Channel selector: the indicator computes all channels, the dock chooses which one is shown
+            channel_selector = QtWidgets.QComboBox()
+            channel_selector.currentIndexChanged.connect(
+                lambda idx, handler=indicator_handler: self.on_channel_selected(handler, idx))
+            self.channel_selectors[file_name] = channel_selector
+            self.fill_channel_selector(channel_selector, [])
+            new_dock.addWidget(channel_selector)
+
             new_dock.addWidget(plot_widget)
 
             # Add Dock to DockArea
-            self.dock_area.addDock(new_dock, 'top')  # Add to the top
+            self.dock_area.addDock(new_dock, *position)
 
             # Save the loaded indicator module and instance
             self.loaded_docks[file_name] = (new_dock, indicator_handler)
             self.loaded_indicators.append(indicator_handler)
+            self.watch_indicator_files()  # Hot reload when the file or a module it imports is saved
+            self.stream_mgr.bind_indicator(indicator_handler, session)  # Fed by the active stream
             self.status_bar.showMessage(f"Status: Successfully loaded indicator {module_name}")
 
-            # Handle Dock close events
-            new_dock.sigClosed.connect(lambda: self.remove_dock(file_name))
+            # Handle Dock close events (a Dock replaced by a reload is no longer the registered one)
+            new_dock.sigClosed.connect(lambda dock: self.remove_dock(file_name, dock))
+            return indicator_handler
 
         except Exception as e:
             traceback.print_exc()
-            self.status_bar.showMessage(f"Status: Failed to load indicator {file_name}")
+            self.status_bar.showMessage(f"Status: Failed to load indicator {file_name}: {e}")
+
+    # ------------------------ Hot Reload ------------------------
+
+    def on_indicator_files_changed(self, *_):
+        """File watcher: editors save in several steps, so changes are handled once they settle"""
+        self.indicator_reload_timer.start()
+
+    def reload_changed_indicators(self):
+        """Rebuild the tree if files were added or removed, and reload the open indicators whose file changed"""
+        if self.indicator_registry.scan() != self.tree_file_names:
+            self.build_file_tree()
+        for file_name in list(self.loaded_docks):
+            if self.indicator_registry.is_modified(file_name):
+                self.reload_indicator(file_name)
+        # Editors that save by replacing the file drop it from the watcher
+        self.watch_indicator_files()
+
+    def watch_indicator_files(self):
+        """Watch the files of the open indicators and of the modules they import from the indicators directory"""
+        paths = set()
+        for file_name in self.loaded_docks:
+            entry = self.indicator_registry.entry(file_name)
+            paths.add(entry.path)
+            paths.update(entry.dependencies)
+        watched = set(self.indicator_watcher.files())
+        if watched - paths:
+            self.indicator_watcher.removePaths(sorted(watched - paths))
+        missing = sorted(path for path in paths - watched if os.path.exists(path))
+        if missing:
+            self.indicator_watcher.addPaths(missing)
+
+    def reload_indicator(self, file_name):
+        """
+        Replace an open indicator by a new instance of its changed file, in the same place and fed by
+        the same stream, without interrupting acquisition. If the new version fails to load, the
+        running one stays.
+        """
+        old_dock, old_handler = self.loaded_docks[file_name]
+        try:
+            self.indicator_registry.get(file_name)
+        except Exception as e:
+            logging.error(f"Reloading {file_name} failed, keeping the running version: {e}")
+            self.status_bar.showMessage(f"Status: Failed to reload {file_name}: {e}")
+            return
 
-    def remove_dock(self, file_name):
+        session = self.stream_mgr.session_of(old_handler)
+        selected_channel = self.channel_selectors[file_name].currentIndex()
+        self.remove_dock(file_name)
+        if self.open_indicator_dock(file_name, session, ("above", old_dock)) is not None:
+            self.channel_selectors[file_name].setCurrentIndex(selected_channel)
+        old_dock.close()
+        self.status_bar.showMessage(f"Status: Reloaded indicator {file_name}")
+
+    def remove_dock(self, file_name, closed_dock=None):
         """Remove records and release resources when the Dock is closed"""
         if file_name in self.loaded_docks:
             dock, indicator_handler = self.loaded_docks[file_name]
+            if closed_dock is not None and closed_dock is not dock:
+                return  # Replaced by a reload, already removed
 
             # Remove from the state
             self.loaded_docks.pop(file_name)
+            self.channel_selectors.pop(file_name, None)
+            self.latency_overlays.pop(file_name, None)
+            self.behind_markers.pop(file_name, None)
+            self.dropped_intervals_seen.pop(file_name, None)
+            self.stall_watchdog.unwatch_module(os.path.join(os.getcwd(), "indicators", file_name))
+            self.watch_indicator_files()  # Its files may still be imported by other open indicators
+            self.stream_mgr.metrics.remove(indicator=file_name[:-3])
+            self.stream_mgr.metrics.remove(module=file_name[:-3])
+            self.previous_compute_secs.pop(file_name[:-3], None)
 
             # If needed, release resources of indicator_handler here
             if indicator_handler in self.loaded_indicators:
                 self.loaded_indicators.remove(indicator_handler)
+            self.stream_mgr.unbind_indicator(indicator_handler)
+            self.render_scheduler.remove(indicator_handler)
 
             # Display status information
             self.status_bar.showMessage(f"Status: Successfully removed indicator {file_name}")
 
+    # ------------------------ Channel Selection ------------------------
+
+    @staticmethod
+    def fill_channel_selector(channel_selector, channel_names):
+        """Populate a dock's channel selector; hidden when there is nothing to choose"""
+        channel_selector.blockSignals(True)
+        selected = max(channel_selector.currentIndex(), 0)
+        channel_selector.clear()
+        channel_selector.addItems(channel_names)
+        channel_selector.setCurrentIndex(min(selected, len(channel_names) - 1))
+        channel_selector.blockSignals(False)
+        channel_selector.setVisible(len(channel_names) > 1)
+
+    def on_indicator_bound(self, indicator_handler, session):
+        """Called by the stream manager when an indicator starts receiving data from a stream"""
+        for file_name, (dock, handler) in self.loaded_docks.items():
+            if handler is indicator_handler:
+                dock.setTitle(f"{file_name[:-3]} @ {session.name}")
+                self.fill_channel_selector(self.channel_selectors[file_name], session.device_info.channel_picks)
+        indicator_handler.set_channel_names(session.device_info.channel_picks)
+
+    def on_channel_selected(self, indicator_handler, channel_idx):
+        if channel_idx >= 0:
+            indicator_handler.set_display_channel(channel_idx)
+
+    # ------------------------ Startup ------------------------
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if "first_paint" not in self.startup_times:
+            self.startup_times["first_paint"] = time.time()
+            # What the window does not need to be drawn starts once it is on screen
+            QtCore.QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """
+        Deferred startup, after the first paint: stream discovery, whose thread imports the LSL library
+        in the background, so the first connection does not wait for it either, and indicator preloading.
+        """
+        self.stream_mgr.discovery.start()
+        if self.preload_indicators:
+            self.indicator_registry.preload(self.preload_indicators)
+        self.startup_times["ready"] = time.time()
+        self.status_bar.showMessage("Status: Ready")
+        logging.info("Startup: " + ", ".join(f"{phase} {(t - self.startup_times['imports']) * 1000:.0f} ms"
+                                             for phase, t in self.startup_times.items() if phase != "imports"))
+        if self.startup_report:
+            print(json.dumps(self.startup_times), flush=True)
+            self.close()
+            QtWidgets.QApplication.quit()
+
+    # ------------------------ Stall Watchdog ------------------------
+
+    def init_stall_watchdog(self):
+        """Detect event-loop stalls and attribute them to the stream manager or an indicator"""
+        self.stall_watchdog = StallWatchdog(self.on_gui_stall)
+        self.stall_watchdog.watch_module("stream manager", inspect.getfile(EEGStreamManager))
+        self.stall_watchdog.start()
+
+    def on_gui_stall(self, stall):
+        module = stall["module"] or "other"
+        metrics = self.stream_mgr.metrics
+        metrics.counter("gui_stalls_total", "Event-loop stalls above the watchdog threshold", module=module).inc()
+        metrics.histogram("gui_stall_seconds", "Duration of event-loop stalls", module=module).observe(stall["duration"])
+
+        # Flag the dock of the indicator that was executing
+        for file_name, (dock, _) in self.loaded_docks.items():
+            if file_name[:-3] == stall["module"]:
+                count = metrics.counter("gui_stalls_total", module=module).value
+                max_secs = metrics.histogram("gui_stall_seconds", module=module).max
+                dock.setTitle(f"{dock.title().split(' ⚠')[0]} ⚠ {count:.0f} stalls, max {max_secs * 1000:.0f} ms")
+                dock.label.setToolTip(f"Last stall: {stall['duration'] * 1000:.0f} ms\n{stall['stack']}")
+        self.status_bar.showMessage(f"Status: GUI stalled {stall['duration'] * 1000:.0f} ms in {module}")
+
+    # ------------------------ Profiling ------------------------
+
+    def add_profiler_menu_on_toolbar(self, toolbar):
+        """Add the profiler menu: time-bounded cProfile + tracemalloc capture of the running session"""
+        self.profile_capture = ProfileCapture()
+        self.profile_timer = QtCore.QTimer()
+        self.profile_timer.setSingleShot(True)
+        self.profile_timer.timeout.connect(self.stop_profile_capture)
+
+        profiler_menu = QtWidgets.QMenu("profiler", toolbar)
+        for secs in (10, 30, 60):
+            profiler_menu.addAction(f"Capture Profile ({secs} s)").triggered.connect(
+                lambda _, secs=secs: self.start_profile_capture(secs))
+        self.stop_profile_action = profiler_menu.addAction("Stop Capture Now")
+        self.stop_profile_action.triggered.connect(self.stop_profile_capture)
+        self.stop_profile_action.setEnabled(False)
+        toolbar.addWidget(GUI_Utils.transform_menu_to_toolbutton("🔬", profiler_menu))
+
+    def start_profile_capture(self, secs):
+        if self.profile_capture.active:
+            self.status_bar.showMessage("Status: A profile capture is already running")
+            return
+        self.profile_capture.start()
+        self.profile_timer.start(int(secs * 1000))
+        self.stop_profile_action.setEnabled(True)
+        self.status_bar.showMessage(f"Status: Profiling for {secs} s...")
+
+    def stop_profile_capture(self):
+        if not self.profile_capture.active:
+            return
+        self.profile_timer.stop()
+        self.stop_profile_action.setEnabled(False)
+
+        # Report the stream manager and each loaded indicator module separately
+        modules = {"stream manager": inspect.getfile(type(self.stream_mgr))}
+        for file_name in self.loaded_docks:
+            modules[file_name[:-3]] = os.path.join(os.getcwd(), "indicators", file_name)
+        report, files = self.profile_capture.stop(modules)
+        self.status_bar.showMessage(f"Status: Profile saved to {files[0]}")
+        self.show_profile_report(report, files)
+
+    def show_profile_report(self, report, files):
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle("Profile Capture")
+        dialog.resize(900, 600)
+        layout = QtWidgets.QVBoxLayout(dialog)
+        layout.addWidget(QtWidgets.QLabel("Saved: " + ", ".join(files)))
+        text = QtWidgets.QPlainTextEdit(report)
+        text.setReadOnly(True)
+        text.setLineWrapMode(QtWidgets.QPlainTextEdit.LineWrapMode.NoWrap)
+        text.setStyleSheet("QPlainTextEdit { font: 9pt monospace; }")
+        layout.addWidget(text)
+        dialog.setAttribute(QtCore.Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+
+    # ------------------------ Low Power ------------------------
+
+    def add_power_menu_on_toolbar(self, toolbar):
+        """Add the power menu: low-power mode for long recordings, switched by hand or while the user is away"""
+        power_menu = QtWidgets.QMenu("power", toolbar)
+        self.low_power_action = power_menu.addAction("Low-Power Mode")
+        self.low_power_action.setCheckable(True)
+        self.low_power_action.toggled.connect(self.set_low_power)
+        self.auto_low_power_action = power_menu.addAction("Automatic While Screen Locked or Minimized")
+        self.auto_low_power_action.setCheckable(True)
+        self.auto_low_power_action.setChecked(True)
+        self.auto_low_power_action.toggled.connect(self.update_auto_low_power)
+        toolbar.addWidget(GUI_Utils.transform_menu_to_toolbutton("🔋", power_menu))
+
+        self.screen_lock_monitor = ScreenLockMonitor(lambda locked: self.update_auto_low_power(), self)
+        self.stream_mgr.metrics.gauge("low_power_mode", "1 while low-power mode is on", fn=lambda: self.low_power)
+
+    def set_low_power(self, enabled):
+        """
+        Low-power mode: plots redrawn about once a second, non-essential indicators paused, data ticks,
+        acquisition pulls and recording writes batched. Essential indicators (sleep staging) and the
+        recording keep running without losing samples.
+        """
+        if enabled == self.low_power:
+            return
+        self.low_power = enabled
+        if not enabled:
+            self.low_power_auto = False
+        self.render_scheduler.set_low_power(enabled)
+        self.stream_mgr.set_low_power(enabled)
+        # Fewer heartbeats; at one frame per second, only long stalls are worth reporting
+        self.stall_watchdog.set_intervals(*((2.0, 0.5) if enabled else (0.2, 0.05)))
+        if self.low_power_action.isChecked() != enabled:
+            self.low_power_action.setChecked(enabled)
+
+    def update_auto_low_power(self, *_):
+        """Enter low-power mode while the user is away; leave it on return, unless it was switched on by hand"""
+        away = self.isMinimized() or self.screen_lock_monitor.locked
+        if away and self.auto_low_power_action.isChecked() and not self.low_power:
+            self.set_low_power(True)
+            self.low_power_auto = True
+        elif not away and self.low_power_auto:
+            self.set_low_power(False)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QtCore.QEvent.Type.WindowStateChange and hasattr(self, "screen_lock_monitor"):
+            self.update_auto_low_power()
+
+    # ------------------------ Latency ------------------------
+
+    def add_latency_menu_on_toolbar(self, toolbar):
+        """Add the latency menu: per-dock overlay, reset and JSON export"""
+        latency_menu = QtWidgets.QMenu("latency", toolbar)
+        overlay_action = latency_menu.addAction("Show Latency Overlay")
+        overlay_action.setCheckable(True)
+        overlay_action.toggled.connect(self.set_latency_overlay_visible)
+        latency_menu.addAction("Reset Latency Statistics").triggered.connect(self.reset_latency)
+        latency_menu.addAction("Export Latency (JSON)").triggered.connect(self.export_latency)
+        latency_menu.addSeparator()
+        metrics_overlay_action = latency_menu.addAction("Show Metrics Overlay")
+        metrics_overlay_action.setCheckable(True)
+        metrics_overlay_action.toggled.connect(self.set_metrics_overlay_visible)
+        latency_menu.addAction("Export Metrics (Prometheus text)").triggered.connect(lambda: self.export_metrics(".prom"))
+        latency_menu.addAction("Export Metrics (JSON)").triggered.connect(lambda: self.export_metrics(".json"))
+        serve_action = latency_menu.addAction(f"Serve Metrics on localhost:{MetricsHTTPServer.DEFAULT_PORT}")
+        serve_action.setCheckable(True)
+        serve_action.toggled.connect(self.set_metrics_server_running)
+        toolbar.addWidget(GUI_Utils.transform_menu_to_toolbutton("⏱", latency_menu))
+
+        self.latency_timer = QtCore.QTimer()
+        self.latency_timer.timeout.connect(self.update_latency_overlays)
+        self.latency_timer.timeout.connect(self.update_metrics_overlay)
+        self.latency_timer.timeout.connect(self.update_behind_markers)
+        self.latency_timer.start(1000)
+
+    def attach_latency_tracker(self, file_name, indicator_handler, plot_widget):
+        """Measure the indicator's latency up to the paint of its widget, and overlay it on the plot"""
+        tracker = LatencyTracker()
+        indicator_handler.latency_tracker = tracker
+        metrics = self.stream_mgr.metrics
+        tracker.observers = {
+            stage: metrics.histogram(f"indicator_{stage}_seconds", f"Indicator {stage} latency",
+                                     indicator=file_name[:-3])
+            for stage in ("queue", "compute", "render", "total")}
+
+        # pyqtgraph widgets are graphics views: their content is painted on the viewport
+        painted_widget = plot_widget.viewport() if hasattr(plot_widget, "viewport") else plot_widget
+        painted_widget.installEventFilter(PaintWatcher(tracker, painted_widget))
+
+        overlay = QtWidgets.QLabel(plot_widget)
+        overlay.setStyleSheet("QLabel { background: rgba(0, 0, 0, 160); color: #9f9; font: 9pt monospace; padding: 3px; }")
+        overlay.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        overlay.move(4, 4)
+        overlay.setVisible(self.latency_overlay_visible)
+        self.latency_overlays[file_name] = overlay
+
+    def set_latency_overlay_visible(self, visible):
+        self.latency_overlay_visible = visible
+        for overlay in self.latency_overlays.values():
+            overlay.setVisible(visible)
+        self.update_latency_overlays()
+
+    def update_latency_overlays(self):
+        if not self.latency_overlay_visible:
+            return
+        for file_name, overlay in self.latency_overlays.items():
+            overlay.setText(self.loaded_docks[file_name][1].latency_tracker.summary_text())
+            overlay.adjustSize()
+
+    def reset_latency(self):
+        for _, indicator_handler in self.loaded_docks.values():
+            indicator_handler.latency_tracker.reset()
+
+    def export_latency(self):
+        """Write the latency histograms of all loaded indicators to ./latency_reports/"""
+        os.makedirs("./latency_reports", exist_ok=True)
+        file_name = f"./latency_reports/latency_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        LatencyTracker.export_json(
+            {name[:-3]: handler.latency_tracker for name, (_, handler) in self.loaded_docks.items()}, file_name)
+        self.status_bar.showMessage(f"Status: Latency exported to {file_name}")
+
+    def is_plot_visible(self, plot_widget):
+        """Whether a dock's plot can be seen: dock shown and not behind another tab, window not minimized"""
+        return plot_widget.isVisible() and not self.isMinimized()
+
+    # ------------------------ Overload ------------------------
+
+    def attach_behind_marker(self, file_name, indicator_handler, plot_widget):
+        """Count the intervals the indicator drops under its overload policy, and mark its plot while behind"""
+        metrics = self.stream_mgr.metrics
+        metrics.counter("indicator_intervals_dropped_total", "Completed intervals dropped by the overload policy",
+                        fn=lambda: indicator_handler.intervalsData_mgr.intervals_dropped, indicator=file_name[:-3])
+        metrics.counter("indicator_intervals_aged_out_total",
+                        "Intervals buffered while hidden (catch_up) that aged out of the backlog",
+                        fn=lambda: indicator_handler.intervalsData_mgr.intervals_aged_out, indicator=file_name[:-3])
+        metrics.gauge("indicator_intervals_pending", "Completed intervals waiting to be processed",
+                      fn=lambda: indicator_handler.intervalsData_mgr.behind, indicator=file_name[:-3])
+
+        marker = QtWidgets.QLabel(plot_widget)
+        marker.setStyleSheet("QLabel { background: rgba(160, 0, 0, 200); color: white; font: bold 9pt; padding: 3px; }")
+        marker.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        marker.hide()
+        self.behind_markers[file_name] = marker
+        self.dropped_intervals_seen[file_name] = 0
+
+    def update_behind_markers(self):
+        """Show the marker on indicators that dropped intervals in the last second or still have some waiting"""
+        for file_name, marker in self.behind_markers.items():
+            indicator_handler = self.loaded_docks[file_name][1]
+            intervals = indicator_handler.intervalsData_mgr
+            # The interval manager is reallocated (counters reset) when the channel count changes
+            dropped = max(intervals.intervals_dropped - self.dropped_intervals_seen[file_name], 0)
+            self.dropped_intervals_seen[file_name] = intervals.intervals_dropped
+            if not indicator_handler.visible:  # Nothing to mark; a hidden backlog is caught up on show
+                marker.hide()
+                continue
+            if dropped:
+                logging.warning(f"{file_name[:-3]}: dropped {dropped} interval(s) ({intervals.policy})")
+            behind = dropped > 0 or intervals.behind > 0
+            marker.setVisible(behind)
+            if behind:
+                marker.setText(f"BEHIND: {intervals.behind} waiting, {dropped} dropped ({intervals.policy})")
+                marker.adjustSize()
+                marker.move(marker.parentWidget().width() - marker.width() - 4, 4)
+
+    # ------------------------ Metrics ------------------------
+
+    def set_metrics_overlay_visible(self, visible):
+        if self.metrics_overlay is None:
+            self.metrics_overlay = QtWidgets.QLabel(self.dock_area)
+            self.metrics_overlay.setStyleSheet(
+                "QLabel { background: rgba(0, 0, 0, 160); color: #9cf; font: 9pt monospace; padding: 3px; }")
+            self.metrics_overlay.setAttribute(QtCore.Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.metrics_overlay.setVisible(visible)
+        self.metrics_overlay.raise_()
+        self.update_metrics_overlay()
+
+    def update_metrics_overlay(self):
+        """Compact view of the registry: stream rates and backlogs, indicator compute load, GUI tick and writer lag"""
+        if self.metrics_overlay is None or not self.metrics_overlay.isVisible():
+            return
+        lines = []
+        for metric in self.stream_mgr.metrics.collect():
+            if metric.name == "eeg_stream_sample_rate_hz":
+                lines.append(f"{metric.labels['stream']:<16} {metric.value:7.1f} Hz")
+            elif metric.name == "eeg_stream_ring_backlog_samples":
+                lines.append(f"{metric.labels['stream']:<16} {metric.value:7.0f} samples behind")
+            elif metric.name == "indicator_compute_seconds":
+                # Share of GUI thread time spent computing the indicator since the last refresh
+                indicator = metric.labels["indicator"]
+                load_ms = (metric.sum - self.previous_compute_secs.get(indicator, metric.sum)) * 1000
+                self.previous_compute_secs[indicator] = metric.sum
+                lines.append(f"{indicator:<16} {load_ms:7.1f} ms/s  p95 {metric.quantile(0.95) * 1000:g} ms")
+            elif metric.name == "gui_tick_seconds":
+                lines.append(f"{'GUI tick':<16} p95 {metric.quantile(0.95) * 1000:g} ms")
+            elif metric.name == "recording_writer_lag_seconds" and self.stream_mgr.recording:
+                lines.append(f"{'writer lag':<16} {metric.value * 1000:7.1f} ms")
+        self.metrics_overlay.setText("\n".join(lines) if lines else "metrics: no data")
+        self.metrics_overlay.adjustSize()
+        self.metrics_overlay.move(self.dock_area.width() - self.metrics_overlay.width() - 4, 4)
+
+    def export_metrics(self, extension):
+        """Write the metrics registry to ./metrics_reports/ as Prometheus text (.prom) or JSON"""
+        os.makedirs("./metrics_reports", exist_ok=True)
+        file_name = f"./metrics_reports/metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}"
+        self.stream_mgr.metrics.write_file(file_name)
+        self.status_bar.showMessage(f"Status: Metrics exported to {file_name}")
+
+    def set_metrics_server_running(self, running):
+        if running and self.metrics_server is None:
+            try:
+                self.metrics_server = MetricsHTTPServer(self.stream_mgr.metrics).start()
+                self.status_bar.showMessage(f"Status: Serving metrics on {self.metrics_server.address}")
+            except OSError as e:
+                self.status_bar.showMessage(f"Status: Cannot serve metrics: {e}")
+        elif not running and self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+            self.status_bar.showMessage("Status: Stopped serving metrics")
+
     # ------------------------ Dock Initialization ------------------------
 
     def init_dock_area(self):
@@ -285,9 +740,16 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def closeEvent(self, event):
         """Window close event"""
+        if self.stream_mgr.recording:
+            self.stream_mgr.stop_recording()  # The writer thread finishes the file
+        self.stream_mgr.check_closing_files(wait=True)
+        self.stream_mgr.discovery.stop()
+        self.stall_watchdog.stop()
+        self.render_scheduler.timer.stop()
+        self.set_metrics_server_running(False)
         if self.stream_mgr.timer:
             self.stream_mgr.timer.stop()
-            self.stream_mgr.disconnect_stream()
+            self.stream_mgr.disconnect_stream()  # All streams
             event.accept()
 
 
@@ -298,6 +760,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='ChannelSigExplorer - EEG Data Analysis Tool')
     parser.add_argument('--debug', type=str, choices=['true', 'false'], default='false',
                         help='Enable debug mode (true/false)')
+    parser.add_argument('--render-fps', type=float, default=20,
+                        help='Maximum plot redraws per second, across all docks; data acquisition and recording do not depend on it')
+    parser.add_argument('--startup-report', action='store_true',
+                        help='Print the startup phase times as JSON and quit once ready (see startup_benchmark.py)')
+    parser.add_argument('--preload', nargs='*', default=[], metavar='INDICATOR',
+                        help='Indicator files to load in the background at startup, so that they open at once')
 
     # Parse command line arguments
     args = parser.parse_args()
@@ -307,6 +775,6 @@ if __name__ == "__main__":
     # print(f"Startup parameters: Debug mode={debug_mode}")
     
     app = QtWidgets.QApplication([])  
-    win = MainWindow(debug_mode)
+    win = MainWindow(debug_mode, args.render_fps, args.startup_report, args.preload)
     win.show()
     app.exec()
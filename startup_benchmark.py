@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Imported on first use (connect, record, indicator load): finding one at startup is a regression
+LAZY_MODULES = ("mne", "mne_lsl", "scipy", "pyedflib", "yaml", "torch")
+
+STARTUP_PHASES = ("imports", "window_built", "first_paint", "ready")  # See MainWindow.startup_times
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def measure_imports(module="main_window"):
+    """
+    Import tree of `module` in a fresh interpreter (python -X importtime).
+    :return: [(name, depth, self_ms, cumulative_ms)] in import order; a module's time counts for whoever imports it first
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=PROJECT_DIR,
+                            capture_output=True, text=True, env=dict(os.environ, QT_QPA_PLATFORM="offscreen"))
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, (len(indent) - 1) // 2, int(self_us) / 1000, int(cumulative_us) / 1000))
+    # Children are listed before their parent: keep the subtree of `module`, not the interpreter's own startup
+    end = max(i for i, (name, depth, _, _) in enumerate(imports) if name == module and depth == 0)
+    start = max((i + 1 for i, (_, depth, _, _) in enumerate(imports[:end]) if depth == 0), default=0)
+    return imports[start:end + 1]
+
+
+def measure_startup(runs, platform=None):
+    """
+    Launch the GUI `runs` times with --startup-report.
+    :return: {phase: [ms after the process was spawned, one per run]}
+    """
+    env = dict(os.environ, QT_QPA_PLATFORM=platform) if platform else None
+    phases = {phase: [] for phase in STARTUP_PHASES}
+    for _ in range(runs):
+        spawned = time.time()
+        result = subprocess.run([sys.executable, "main_window.py", "--startup-report"], cwd=PROJECT_DIR,
+                                capture_output=True, text=True, env=env, timeout=60)
+        report = next((line for line in reversed(result.stdout.splitlines()) if line.startswith("{")), None)
+        if report is None:
+            raise RuntimeError(f"main_window.py did not report its startup:\n{result.stderr[-2000:]}")
+        for phase, t in json.loads(report).items():
+            phases.setdefault(phase, []).append((t - spawned) * 1000)
+    return phases
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='ChannelSigExplorer - startup time benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='GUI launches; phase times are their median')
+    parser.add_argument('--budget-ms', type=float, default=1000,
+                        help='Maximum time from process spawn to the ready window; exceeding it fails the benchmark')
+    parser.add_argument('--platform', help='Qt platform plugin, e.g. offscreen on machines without a display')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    imports = measure_imports()
+    print("Import time of main_window (cumulative ms, direct imports and project modules):")
+    for name, depth, self_ms, cumulative_ms in imports:
+        if depth == 1 or name.startswith("GUIComp_") or name == "main_window":
+            print(f"  {'  ' * max(depth - 1, 0)}{name:<{40 - 2 * max(depth - 1, 0)}} {cumulative_ms:8.1f}")
+    eager = sorted({name for name, *_ in imports if name.split(".")[0] in LAZY_MODULES and "." not in name})
+    if eager:
+        print(f"Imported at startup although used later: {', '.join(eager)}")
+
+    phases = measure_startup(args.runs, args.platform)
+    print(f"Startup (ms after spawn, median of {args.runs}):")
+    medians = {phase: statistics.median(times) for phase, times in phases.items() if times}
+    for phase, ms in medians.items():
+        print(f"  {phase:<14} {ms:8.1f}   (min {min(phases[phase]):.1f}, max {max(phases[phase]):.1f})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"imports_ms": {name: cumulative_ms for name, depth, _, cumulative_ms in imports if depth <= 1},
+                       "eager_lazy_modules": eager, "startup_ms": medians}, f, indent=1)
+
+    over_budget = medians["ready"] > args.budget_ms
+    if over_budget:
+        print(f"Ready after {medians['ready']:.0f} ms: over the {args.budget_ms:.0f} ms budget")
+    sys.exit(1 if over_budget or eager else 0)
@@ -0,0 +1,99 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GUIComp_Recording import CompressedRecordReader, CompressedRecordWriter, RecordWriter
+
+
+def record_csig(file_name, sample_freq, secs, annotations):
+    """Record `secs` of a ramp in 1 s chunks; `annotations` is {second: text}, added after that second's chunk"""
+    writer = CompressedRecordWriter(file_name, RecordWriter.make_signal_headers(["Fp1"], sample_freq), sample_freq)
+    for second in range(secs):
+        writer.append(np.full((1, sample_freq), float(second % 100)))
+        if second + 1 in annotations:
+            writer.annotate(annotations[second + 1])
+    writer.close()
+    assert writer.wait(10) and writer.error is None
+    return writer.file_name
+
+
+def test_csig_annotation_mid_record_round_trip(tmp_path):
+    # 10 s records: an annotation at 35 s falls in the middle of the fourth record
+    file_name = record_csig(str(tmp_path / "rec.csig"), 256, 50, {35: "Stream gap: 12 samples missing"})
+
+    reader = CompressedRecordReader(file_name)
+    assert reader.n_samples == 50 * 256
+    assert reader.annotations == [(35 * 256, "Stream gap: 12 samples missing")]
+    reader.close()
+
+
+def test_csig_annotation_survives_edf_export(tmp_path):
+    import pyedflib
+
+    file_name = record_csig(str(tmp_path / "rec.csig"), 256, 20, {7: "mark"})
+    reader = CompressedRecordReader(file_name)
+    edf_file = str(tmp_path / "rec.edf")
+    reader.to_edf(edf_file)
+    reader.close()
+
+    edf = pyedflib.EdfReader(edf_file)
+    try:
+        onsets, _, texts = edf.readAnnotations()
+        assert list(texts) == ["mark"]
+        assert abs(onsets[0] - 7.0) < 1e-3
+    finally:
+        edf.close()
+
+
+def test_sample_freq_is_normalized_and_validated(tmp_path):
+    headers = RecordWriter.make_signal_headers(["Fp1"], 256)
+    writer = CompressedRecordWriter(str(tmp_path / "rec.csig"), headers, 256.0)
+    writer.close()
+    writer.wait(10)
+    assert writer.sample_freq == 256 and isinstance(writer.sample_freq, int)
+    reader = CompressedRecordReader(writer.file_name)
+    assert reader.sample_freq == 256
+    reader.close()
+
+    for sample_freq in (0, -1, float("nan")):
+        try:
+            CompressedRecordWriter(str(tmp_path / "bad.csig"), headers, sample_freq)
+        except ValueError:
+            continue
+        raise AssertionError(f"{sample_freq} Hz was accepted")
+
+
+def test_fractional_sample_freq_records_and_exports(tmp_path):
+    import pyedflib
+
+    from GUIComp_Recording import EDFRecordWriter
+
+    sample_freq = 250.4
+    headers = RecordWriter.make_signal_headers(["Fp1"], sample_freq)
+    data = np.sin(np.arange(2504) / 10.0)[None, :] * 100  # 10 s
+
+    edf_writer = EDFRecordWriter(str(tmp_path / "rec.edf"), headers, sample_freq)
+    assert edf_writer.record_secs == 5 and edf_writer.record_len == 1252
+    edf_writer.append(data)
+    edf_writer.close()
+    assert edf_writer.wait(10) and edf_writer.error is None
+
+    csig_writer = CompressedRecordWriter(str(tmp_path / "rec.csig"), headers, sample_freq)
+    csig_writer.append(data)
+    csig_writer.close()
+    assert csig_writer.wait(10) and csig_writer.error is None
+    reader = CompressedRecordReader(csig_writer.file_name)
+    reader.to_edf(str(tmp_path / "export.edf"))
+    reader.close()
+
+    for edf_file in (edf_writer.file_name, str(tmp_path / "export.edf")):
+        edf = pyedflib.EdfReader(edf_file)
+        try:
+            assert abs(edf.getSampleFrequency(0) - sample_freq) < 1e-6
+            assert edf.getNSamples()[0] == 2504
+            assert np.allclose(edf.readSignal(0), data[0], atol=0.05)
+        finally:
+            edf.close()